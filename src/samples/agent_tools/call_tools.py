@@ -1,5 +1,3 @@
-# pip install openai
-
 from __future__ import annotations
 
 import datetime as dt
@@ -7,14 +5,10 @@ import json
 import random
 from typing import Dict, Any
 
-from openai import OpenAI
-
-client = OpenAI(
-    base_url="http://localhost:11434/v1",  # ollama default
-    api_key="ollama",  # any non-empty string works
-)
+from src.samples.agent_tools.tool_args import IncrementalArguments, parse_arguments
+from src.samples.llm_clients import llm_settings, sync_client
 
-MODEL = "gpt-oss:20b"  # try others: "qwen2.5", "phi3", etc.
+MODEL = llm_settings().model  # LLM_MODEL, e.g. "qwen2.5", "phi3"
 
 
 def get_weather(city: str) -> Dict[str, Any]:
@@ -77,6 +71,8 @@ TOOLS = [
     },
 ]
 
+SCHEMAS = {tool["function"]["name"]: tool["function"]["parameters"] for tool in TOOLS}
+
 # --- 4) A helpful system prompt for models that aren't fine-tuned for tools ---
 SYSTEM_PROMPT = """\
 You are a helpful assistant. If a tool is relevant, ALWAYS call it with JSON arguments.
@@ -86,7 +82,7 @@ If user asks for math, use the `add` tool when appropriate. For weather question
 
 
 def chat_once(messages, tools=None, tool_choice="auto"):
-    return client.chat.completions.create(
+    return sync_client().chat.completions.create(
         model=MODEL,
         messages=messages,
         tools=tools,
@@ -95,46 +91,126 @@ def chat_once(messages, tools=None, tool_choice="auto"):
     )
 
 
-def run_chat(user_prompt: str):
+def chat_stream(messages, tools=None, tool_choice="auto"):
+    """
+    Streamed chat: prints the answer as it arrives and assembles tool calls,
+    repairing their arguments fragment by fragment. Returns (content, calls)
+    with calls as (id, name, ParsedArguments).
+    """
+    stream = sync_client().chat.completions.create(
+        model=MODEL,
+        messages=messages,
+        tools=tools,
+        tool_choice=tool_choice,
+        temperature=0,
+        stream=True,
+    )
+    content, calls = [], {}
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content.append(delta.content)
+            print(delta.content, end="", flush=True)
+        for part in delta.tool_calls or []:
+            call = calls.setdefault(part.index, {"id": None, "name": "", "args": None})
+            call["id"] = part.id or call["id"]
+            if part.function and part.function.name:
+                call["name"] += part.function.name
+            if part.function and part.function.arguments:
+                if call["args"] is None:
+                    # the name may come in several deltas, but all of it
+                    # before the first argument fragment
+                    call["args"] = IncrementalArguments(SCHEMAS.get(call["name"]))
+                call["args"].feed(part.function.arguments)
+    if content:
+        print()
+    return "".join(content), [
+        (
+            c["id"],
+            c["name"],
+            (
+                c["args"].close()
+                if c["args"]
+                else parse_arguments("", SCHEMAS.get(c["name"]))
+            ),
+        )
+        for _, c in sorted(calls.items())
+    ]
+
+
+def call_tool(name: str, parsed) -> Dict[str, Any]:
+    if name not in TOOL_IMPLS:
+        return {"error": f"Unknown tool: {name}"}
+    if not parsed.ok:
+        # say what was wrong, so the retry has something to go on
+        return {
+            "error": f"Bad arguments for {name}: {parsed.error}",
+            "expected": SCHEMAS[name],
+        }
+    try:
+        return TOOL_IMPLS[name](**parsed.arguments)
+    except TypeError as e:
+        return {"error": f"Bad arguments for {name}: {e}"}
+    except Exception as e:
+        return {"error": f"Tool {name} failed: {e}"}
+
+
+def run_chat(user_prompt: str, stream: bool = False):
     messages = [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": user_prompt},
     ]
 
     while True:
-        resp = chat_once(messages, tools=TOOLS, tool_choice="auto")
-        choice = resp.choices[0]
-        msg = choice.message
+        if stream:
+            content, calls = chat_stream(messages, tools=TOOLS, tool_choice="auto")
+        else:
+            msg = (
+                chat_once(messages, tools=TOOLS, tool_choice="auto").choices[0].message
+            )
+            content = msg.content
+            # (Many open-source models will put arguments as an almost-JSON string;
+            # parse_arguments repairs it against the tool's schema.)
+            calls = [
+                (
+                    call.id,
+                    call.function.name,
+                    parse_arguments(
+                        call.function.arguments, SCHEMAS.get(call.function.name)
+                    ),
+                )
+                for call in getattr(msg, "tool_calls", None) or []
+            ]
 
         # If the model made a tool call, execute it and feed back the result.
-        tool_calls = getattr(msg, "tool_calls", None)
-        if tool_calls:
-            # (Many open-source models will put arguments as a JSON string.)
-            for call in tool_calls:
-                name = call.function.name
-                try:
-                    args = json.loads(call.function.arguments or "{}")
-                except json.JSONDecodeError:
-                    # Fallback: try to coerce simple cases
-                    args = {}
-
-                if name not in TOOL_IMPLS:
-                    tool_result = {"error": f"Unknown tool: {name}"}
-                else:
-                    try:
-                        tool_result = TOOL_IMPLS[name](**args)
-                    except TypeError as e:
-                        tool_result = {"error": f"Bad arguments for {name}: {e}"}
-                    except Exception as e:
-                        tool_result = {"error": f"Tool {name} failed: {e}"}
-
+        if calls:
+            messages.append(
+                {
+                    "role": "assistant",
+                    "content": content or None,
+                    "tool_calls": [
+                        {
+                            "id": call_id,
+                            "type": "function",
+                            "function": {
+                                "name": name,
+                                "arguments": json.dumps(parsed.arguments),
+                            },
+                        }
+                        for call_id, name, parsed in calls
+                    ],
+                }
+            )
+            for call_id, name, parsed in calls:
                 # Append tool result for the model to use
                 messages.append(
                     {
                         "role": "tool",
-                        "tool_call_id": call.id,  # echo back the id
+                        "tool_call_id": call_id,  # echo back the id
                         "name": name,
-                        "content": json.dumps(tool_result),
+                        "content": json.dumps(call_tool(name, parsed)),
                     }
                 )
 
@@ -142,7 +218,8 @@ def run_chat(user_prompt: str):
             continue
 
         # No tool calls -> we have the assistant's final answer
-        print(msg.content)
+        if not stream:
+            print(content)
         break
 
 
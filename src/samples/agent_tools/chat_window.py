@@ -0,0 +1,145 @@
+"""
+Token-budgeted sliding window over a Semantic Kernel ChatHistory.
+
+The window is kept incrementally: each turn appends the user message, any tool
+call / tool result messages produced by auto function calling and the assistant
+reply, and updates a running token estimate. When the estimate exceeds the
+budget the oldest whole turns are dropped (system messages stay pinned, a tool
+call is never separated from its result), so the history passed to the prompt
+and the work done per turn are bounded no matter how long the session runs.
+
+  window = ChatWindow(max_tokens=3000)
+  window.add_system_message("You recommend movies and TV shows")
+  result = await kernel.invoke(chat_fn, KernelArguments(
+      chat_history=window.history, user_input=user_input))
+  window.record_turn(user_input, result)
+
+The prompt template renders the window with `{{$chat_history}}{{$user_input}}`.
+
+Configuration (optional):
+  CHAT_HISTORY_MAX_TOKENS   token budget of the window (default 3000)
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+
+from semantic_kernel.contents import (
+    AuthorRole,
+    ChatHistory,
+    ChatMessageContent,
+    FunctionCallContent,
+    FunctionResultContent,
+)
+from semantic_kernel.functions import FunctionResult
+
+# rough chars-per-token ratio for English text; good enough for budgeting
+_CHARS_PER_TOKEN = 4
+# per-message overhead of the role / XML wrapper in the rendered prompt
+_MESSAGE_OVERHEAD = 4
+
+
+def estimate_text_tokens(text: str) -> int:
+    """Estimate for a plain text message, e.g. one read back from a session log."""
+    return len(text) // _CHARS_PER_TOKEN + _MESSAGE_OVERHEAD
+
+
+def estimate_tokens(message: ChatMessageContent) -> int:
+    chars = len(message.content or "")
+    for item in message.items:
+        if isinstance(item, FunctionCallContent):
+            chars += len(item.name or "") + len(str(item.arguments or ""))
+        elif isinstance(item, FunctionResultContent):
+            chars += len(str(item.result or ""))
+    return chars // _CHARS_PER_TOKEN + _MESSAGE_OVERHEAD
+
+
+class ChatWindow:
+    def __init__(self, max_tokens: int | None = None):
+        self.max_tokens = max_tokens or int(
+            os.getenv("CHAT_HISTORY_MAX_TOKENS", "3000")
+        )
+        self.history = ChatHistory()
+        self.tokens = 0
+        self.dropped_turns = 0
+        self._pinned = 0  # leading system messages, never dropped
+        # (message count, tokens) per turn, oldest first
+        self._turns: deque[tuple[int, int]] = deque()
+
+    def __len__(self) -> int:
+        return len(self.history.messages)
+
+    @property
+    def turns(self) -> int:
+        """Turns currently in the window (system messages not counted)."""
+        return len(self._turns)
+
+    def add_system_message(self, content: str) -> None:
+        """System messages are pinned; add them before the first turn."""
+        if self._turns:
+            raise ValueError("system messages must be added before any turn")
+        message = ChatMessageContent(role=AuthorRole.SYSTEM, content=content)
+        self.history.add_message(message)
+        self._pinned += 1
+        self.tokens += estimate_tokens(message)
+
+    def add_turn(self, messages: list[ChatMessageContent]) -> None:
+        """Append one turn (user message, tool traffic, reply) and trim to budget."""
+        if not messages:
+            return
+        tokens = 0
+        for message in messages:
+            self.history.add_message(message)
+            tokens += estimate_tokens(message)
+        self._turns.append((len(messages), tokens))
+        self.tokens += tokens
+        self._trim()
+
+    def add_exchange(self, user: str, assistant: str) -> None:
+        self.add_turn(
+            [
+                ChatMessageContent(role=AuthorRole.USER, content=user),
+                ChatMessageContent(role=AuthorRole.ASSISTANT, content=assistant),
+            ]
+        )
+
+    def record_turn(self, user_input: str, result: FunctionResult) -> None:
+        """
+        Record a turn from the FunctionResult of a chat prompt rendered from this
+        window: the user message, the tool messages added while the model called
+        functions, and the final assistant message(s).
+        """
+        turn = [ChatMessageContent(role=AuthorRole.USER, content=user_input)]
+        # The prompt function's own chat history is the rendered window + user
+        # message, followed by whatever auto function calling appended.
+        messages = (result.metadata or {}).get("messages")
+        if messages is not None:
+            rendered = len(self.history.messages) + 1
+            turn.extend(
+                m
+                for m in messages.messages[rendered:]
+                if any(
+                    isinstance(i, (FunctionCallContent, FunctionResultContent))
+                    for i in m.items
+                )
+            )
+
+        value = result.value
+        replies = value if isinstance(value, list) else [value]
+        for reply in replies:
+            if isinstance(reply, ChatMessageContent):
+                turn.append(reply)
+            elif reply is not None:
+                turn.append(
+                    ChatMessageContent(role=AuthorRole.ASSISTANT, content=str(reply))
+                )
+        self.add_turn(turn)
+
+    def _trim(self) -> None:
+        # Always keep the latest turn, even if it alone exceeds the budget.
+        while self.tokens > self.max_tokens and len(self._turns) > 1:
+            count, tokens = self._turns.popleft()
+            del self.history.messages[self._pinned : self._pinned + count]
+            self.tokens -= tokens
+            self.dropped_turns += 1
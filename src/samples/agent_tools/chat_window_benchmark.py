@@ -0,0 +1,87 @@
+"""
+Per-turn prompt-preparation cost over a long chat session, without an LLM:
+the old loop (join every message into a `history` string, unbounded ChatHistory)
+vs. ChatWindow rendered through `{{$chat_history}}{{$user_input}}`.
+
+  python -m src.samples.agent_tools.chat_window_benchmark --turns 500
+"""
+
+import argparse
+import asyncio
+import time
+
+from semantic_kernel import Kernel
+from semantic_kernel.contents import ChatHistory
+from semantic_kernel.functions import KernelArguments
+from semantic_kernel.prompt_template import KernelPromptTemplate, PromptTemplateConfig
+
+from src.samples.agent_tools.chat_window import ChatWindow
+
+_REPLY = "Try Heat (1995), a tense crime epic with a legendary shoot-out. " * 6
+
+
+async def old_loop(kernel, turns: int) -> list[float]:
+    template = KernelPromptTemplate(
+        prompt_template_config=PromptTemplateConfig(template="{{$user_input}}")
+    )
+    history = ChatHistory()
+    history.add_system_message("You recommend movies and TV shows")
+    timings = []
+    for i in range(turns):
+        started = time.perf_counter()
+        user_input = f"Something like movie number {i}?"
+        arguments = KernelArguments(
+            user_input=user_input,
+            history="\n".join(f"{m.role}: {m.content}" for m in history),
+            chat_history=history,
+        )
+        await template.render(kernel, arguments)
+        timings.append(time.perf_counter() - started)
+        history.add_user_message(user_input)
+        history.add_assistant_message(_REPLY)
+    return timings
+
+
+async def window_loop(kernel, turns: int, max_tokens: int) -> list[float]:
+    template = KernelPromptTemplate(
+        prompt_template_config=PromptTemplateConfig(
+            template="{{$chat_history}}{{$user_input}}"
+        )
+    )
+    window = ChatWindow(max_tokens=max_tokens)
+    window.add_system_message("You recommend movies and TV shows")
+    timings = []
+    for i in range(turns):
+        started = time.perf_counter()
+        user_input = f"Something like movie number {i}?"
+        arguments = KernelArguments(user_input=user_input, chat_history=window.history)
+        await template.render(kernel, arguments)
+        window.add_exchange(user_input, _REPLY)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    chunk = max(1, len(timings) // 5)
+    means = [
+        sum(timings[i : i + chunk]) / len(timings[i : i + chunk]) * 1e3
+        for i in range(0, len(timings), chunk)
+    ]
+    print(f"{name:<8}" + "".join(f"{m:>9.3f}" for m in means))
+
+
+async def main(turns: int, max_tokens: int) -> None:
+    kernel = Kernel()
+    old = await old_loop(kernel, turns)
+    new = await window_loop(kernel, turns, max_tokens)
+    print(f"mean ms per turn, {turns} turns in 5 buckets")
+    report("old", old)
+    report("window", new)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--max-tokens", type=int, default=3000)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.max_tokens))
@@ -1,34 +1,35 @@
 import asyncio
+import os
+import time
 
 import semantic_kernel as sk
 from semantic_kernel.connectors.ai import FunctionChoiceBehavior
-from semantic_kernel.connectors.ai.ollama import (
-    OllamaChatCompletion,
-    OllamaChatPromptExecutionSettings,
-)
-from semantic_kernel.contents import ChatHistory
 from semantic_kernel.functions import KernelArguments
 from semantic_kernel.prompt_template import PromptTemplateConfig, InputVariable
 
+from src.samples.agent_tools.chat_window import ChatWindow
 from src.samples.agent_tools.plugins.tmdb import TMDbService
+from src.samples.agent_tools.profiler import InvocationProfiler
+from src.samples.agent_tools.tmdb_prefetch import GenrePrefetcher
+from src.samples.llm_clients import chat_completion_service, chat_execution_settings
+from src.samples.semantic_cache import SemanticCache
 
 kernel = sk.Kernel()
 SERVICE_ID = "ollama-gpt"
-MODEL_ID = "gpt-oss:20b"
-chat = OllamaChatCompletion(
-    ai_model_id=MODEL_ID,
-    host="http://localhost:11434",  # default Ollama endpoint
-    service_id=SERVICE_ID,  # <-- pick any id; reuse below
-)
+# endpoint / model come from LLM_BASE_URL / LLM_MODEL (Ollama's /v1 by default)
+chat = chat_completion_service(SERVICE_ID)
 kernel.add_service(chat)
 
-chatbot_execution_settings = OllamaChatPromptExecutionSettings(
-    service_id=SERVICE_ID,
-    ai_model_id=MODEL_ID,
+# SK_PROFILE=1 records a span tree per turn (LLM / render / tool / HTTP time)
+profiler = InvocationProfiler.from_env()
+if profiler:
+    profiler.register(kernel)
+
+chatbot_execution_settings = chat_execution_settings(
+    SERVICE_ID,
     max_tokens=5120,
     temperature=0.7,
     top_p=0.8,
-    tool_choice="auto",
     function_choice_behavior=FunctionChoiceBehavior.Auto(
         filters={
             "excluded_plugins": ["ChatBot"]
@@ -37,18 +38,25 @@ chatbot_execution_settings = OllamaChatPromptExecutionSettings(
 )
 
 prompt_template_config = PromptTemplateConfig(
-    template="{{$user_input}}",
+    template="{{$chat_history}}{{$user_input}}",
     execution_settings=chatbot_execution_settings,
-    input_variables=[InputVariable(name="user_input", description="User's request")],
+    input_variables=[
+        InputVariable(name="chat_history", description="Recent conversation"),
+        InputVariable(name="user_input", description="User's request"),
+    ],
 )
 
-history = ChatHistory()
+# token-budgeted sliding window; per-turn cost stays flat however long the session
+history = ChatWindow()
 
-history.add_system_message("You recommend movies and TV shows")
-history.add_user_message("Hi, who are you?")
-history.add_assistant_message(
-    "I am movie recommend bot. I want to try to find what user wants"
+SYSTEM_MESSAGE = "You recommend movies and TV shows"
+history.add_system_message(SYSTEM_MESSAGE)
+history.add_exchange(
+    "Hi, who are you?",
+    "I am movie recommend bot. I want to try to find what user wants",
 )
+# the canned exchange above; past it, answers depend on what the user said
+STARTER_TURNS = history.turns
 
 
 kernel.add_function(
@@ -59,6 +67,23 @@ kernel.add_function(
 
 plugin = kernel.add_plugin(TMDbService, plugin_name="TMDbService")
 
+# TMDB_PREFETCH=1 starts fetching the genres the user mentions while the model
+# is still thinking; the tool call then finds them in TMDbService's cache
+prefetcher = GenrePrefetcher.from_env(
+    TMDbService() if os.getenv("TMDB_BEARER_TOKEN") else None
+)
+
+# SEMANTIC_CACHE=1 answers near-identical questions from earlier answers
+cache = SemanticCache.from_env()
+cache_scope = cache and cache.scope(
+    SYSTEM_MESSAGE,
+    [
+        f.fully_qualified_name
+        for f in kernel.get_full_list_of_function_metadata()
+        if f.plugin_name != "ChatBot"
+    ],
+)
+
 
 async def chat() -> bool:
     try:
@@ -73,17 +98,45 @@ async def chat() -> bool:
     if user_input == "exit":
         print("\n\nExiting chat...")
         return False
+    # once the user has turns of their own, the answer depends on them and is
+    # neither served from nor stored in the shared cache
+    cacheable = history.turns + history.dropped_turns == STARTER_TURNS
+    hit = cache.lookup(user_input, cache_scope) if cache and cacheable else None
+    if hit:
+        history.add_exchange(user_input, hit.answer)
+        print(f"GPT Agent:> {hit.answer}")
+        if hit.audit:
+            # answer again without the history and compare; this delays the
+            # next prompt, but only for the sampled hits
+            fresh_history = ChatWindow()
+            fresh_history.add_system_message(SYSTEM_MESSAGE)
+            fresh = await kernel.invoke(
+                arguments=KernelArguments(
+                    user_input=user_input, chat_history=fresh_history.history
+                ),
+                plugin_name="ChatBot",
+                function_name="chat",
+            )
+            cache.audit(hit, str(fresh))
+        return True
+
+    if prefetcher:
+        prefetcher.watch(user_input)
     arguments = KernelArguments(
         user_input=user_input,
-        history=("\n").join([f"{msg.role}: {msg.content}" for msg in history]),
+        chat_history=history.history,
     )
+    started = time.perf_counter()
     result = await kernel.invoke(
         arguments=arguments,
         plugin_name="ChatBot",
         function_name="chat",
-        chat_history=history,
     )
+    history.record_turn(user_input, result)
     print(f"GPT Agent:> {result}")
+    if cache and cacheable:
+        generation_ms = (time.perf_counter() - started) * 1e3
+        cache.store(user_input, str(result), cache_scope, generation_ms)
     return True
 
 
@@ -91,6 +144,14 @@ async def main() -> None:
     chatting = True
     while chatting:
         chatting = await chat()
+    if profiler:
+        print(profiler.format_summary())
+        profiler.close()
+    if prefetcher:
+        print(prefetcher.format_summary())
+        prefetcher.close()
+    if cache:
+        print(cache.format_summary())
 
 
 if __name__ == "__main__":
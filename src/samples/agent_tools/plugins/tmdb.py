@@ -1,11 +1,31 @@
 # --- Standard library / deps are imported inside the file to keep the class top line as requested ---
 import os
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import Future
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 
 import requests
+from requests.adapters import HTTPAdapter
 from semantic_kernel.functions import kernel_function
 
+from src.samples.agent_tools.profiler import note, span
+from src.samples.cassettes import active_cassette
+from src.samples.cassettes.requests_adapter import CassetteAdapter
+
+# set while a GenrePrefetcher warms the cache, so its fetches are told apart
+_prefetching: ContextVar[bool] = ContextVar("tmdb_prefetching", default=False)
+
+
+@dataclass
+class _CacheEntry:
+    future: Future = field(default_factory=Future)
+    started: float = field(default_factory=time.perf_counter)
+    finished: float = float("inf")
+    expires: float = float("inf")
+    prefetched: bool = False  # until the first tool call uses it
+
 
 class TMDbService:
     """
@@ -18,6 +38,8 @@ class TMDbService:
       3) (Optional) Set a default language/region:
            export TMDB_LANGUAGE="en-US"
            export TMDB_REGION="US"
+      4) (Optional) Keep responses for TMDB_CACHE_TTL_SEC (default 0, off; 600
+         once a GenrePrefetcher is running, since it fetches into the cache)
 
     Usage with Semantic Kernel (Python):
       from semantic_kernel import Kernel
@@ -32,9 +54,29 @@ class TMDbService:
       # - tmdb.get_top_movies_by_genre
     """
 
-    _BASE_URL = "https://api.themoviedb.org/3"
+    _BASE_URL = os.environ.get("TMDB_BASE_URL", "https://api.themoviedb.org/3")
     _GENRE_ENDPOINT = "/genre/movie/list"
     _DISCOVER_ENDPOINT = "/discover/movie"
+    _SEARCH_ENDPOINT = "/search/movie"
+
+    # One keep-alive connection pool shared by every instance (and thread).
+    _session: requests.Session | None = None
+    _session_lock = threading.Lock()
+
+    # Responses shared by every instance for TMDB_CACHE_TTL_SEC (0 disables).
+    # A request already in flight is joined rather than sent twice, so a
+    # prefetch and the tool call that needs the same data make one request.
+    _cache: dict[tuple, _CacheEntry] = {}
+    _cache_ttl_default = 0.0  # see enable_cache
+    _cache_lock = threading.Lock()
+    _CACHE_MAX_ENTRIES = 1024
+    cache_stats = {
+        "hits": 0,
+        "misses": 0,
+        "prefetches": 0,
+        "prefetch_hits": 0,
+        "saved_ms": 0.0,
+    }
 
     @dataclass
     class _Config:
@@ -57,6 +99,9 @@ class TMDbService:
           TMDB_BEARER_TOKEN (required), TMDB_LANGUAGE, TMDB_REGION
         """
         token = bearer_token or os.environ.get("TMDB_BEARER_TOKEN")
+        cassette = active_cassette()
+        if not token and cassette is not None and not cassette.recording:
+            token = "cassette-replay"  # never sent anywhere
         if not token:
             raise ValueError(
                 "TMDB_BEARER_TOKEN is not set. Please export a TMDb v4 API Read Access Token."
@@ -69,6 +114,22 @@ class TMDbService:
 
     # ------------------------- Internal helpers -------------------------
 
+    @classmethod
+    def _http(cls) -> requests.Session:
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    pool_size = int(os.environ.get("TMDB_POOL_SIZE", "16"))
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                    cassette = active_cassette()
+                    if cassette is not None:
+                        adapter = CassetteAdapter(adapter, cassette)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)  # TMDB_BASE_URL stand-ins
+                    cls._session = session
+        return cls._session
+
     def _headers(self) -> dict:
         return {
             "Authorization": f"Bearer {self.config.bearer_token}",
@@ -84,10 +145,88 @@ class TMDbService:
         if self.config.region and "region" not in params:
             params["region"] = self.config.region
 
+        ttl = float(os.environ.get("TMDB_CACHE_TTL_SEC", self._cache_ttl_default))
+        if ttl <= 0:
+            with span(f"tmdb GET {path}", kind="http"):
+                return self._get_with_retries(url, params)
+
+        key = (path, tuple(sorted((k, str(v)) for k, v in params.items())))
+        prefetching = _prefetching.get()
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry.expires < time.monotonic():
+                entry = None
+            owner = entry is None
+            if owner:
+                entry = self._cache[key] = _CacheEntry(prefetched=prefetching)
+                self._prune_cache()
+            stats = self.cache_stats
+            stats["prefetches" if prefetching else "misses"] += owner
+
+        if owner:
+            try:
+                with span(f"tmdb GET {path}", kind="http"):
+                    data = self._get_with_retries(url, params)
+            except BaseException as e:
+                with self._cache_lock:
+                    self._cache.pop(key, None)
+                # resolve it whatever happened, or joiners wait forever; they
+                # retry on an Exception, so do not hand them a KeyboardInterrupt
+                if not isinstance(e, Exception):
+                    e = RuntimeError(f"tmdb GET {path} interrupted")
+                entry.future.set_exception(e)
+                raise
+            entry.finished = time.perf_counter()
+            entry.expires = time.monotonic() + ttl
+            entry.future.set_result(data)
+            return data
+
+        joined = time.perf_counter()
+        try:
+            data = entry.future.result()
+        except Exception:
+            if prefetching:
+                raise
+            return self._get(path, params)  # the prefetch failed; try ourselves
+        if not prefetching:
+            note("cache_hit")
+            with self._cache_lock:
+                stats["hits"] += 1
+                if entry.prefetched:
+                    entry.prefetched = False
+                    stats["prefetch_hits"] += 1
+                    # the part of the fetch done before the tool call asked
+                    saved = min(joined, entry.finished) - entry.started
+                    stats["saved_ms"] += saved * 1e3
+        return data
+
+    @classmethod
+    def _prune_cache(cls) -> None:
+        if len(cls._cache) <= cls._CACHE_MAX_ENTRIES:
+            return
+        now = time.monotonic()
+        for key in [k for k, e in cls._cache.items() if e.expires < now]:
+            del cls._cache[key]
+        while len(cls._cache) > cls._CACHE_MAX_ENTRIES:
+            del cls._cache[next(iter(cls._cache))]  # oldest first
+
+    @classmethod
+    def enable_cache(cls, ttl_sec: float = 600.0) -> None:
+        """Cache responses for `ttl_sec` unless TMDB_CACHE_TTL_SEC says otherwise."""
+        cls._cache_ttl_default = ttl_sec
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._cache_lock:
+            cls._cache.clear()
+            for name in cls.cache_stats:
+                cls.cache_stats[name] = 0
+
+    def _get_with_retries(self, url: str, params: dict) -> dict:
         last_err = None
         for attempt in range(1, self.config.max_retries + 1):
             try:
-                resp = requests.get(
+                resp = self._http().get(
                     url,
                     headers=self._headers(),
                     params=params,
@@ -100,6 +239,7 @@ class TMDbService:
                             "Retry-After", self.config.backoff_sec * attempt
                         )
                     )
+                    note("retry")
                     time.sleep(retry_after)
                     continue
                 resp.raise_for_status()
@@ -108,12 +248,36 @@ class TMDbService:
                 last_err = e
                 if attempt >= self.config.max_retries:
                     break
+                note("retry")
                 time.sleep(self.config.backoff_sec * attempt)
         raise RuntimeError(f"TMDb request failed after retries: {last_err}")
 
     def _normalize_genre(self, name: str) -> str:
         return name.strip().lower()
 
+    # ------------------------- Plain helpers (not exposed as tools) -------------------------
+
+    def prefetch_top_movies_by_genre(self, genre_name: str) -> None:
+        """Warm the cache for get_top_movies_by_genre (see tmdb_prefetch.py)."""
+        token = _prefetching.set(True)
+        try:
+            self.get_top_movies_by_genre(genre_name)
+        finally:
+            _prefetching.reset(token)
+
+    def find_movie_id(self, title: str, year: int | None = None) -> int | None:
+        """
+        Return the TMDb id of the best match for a movie title, or None if nothing matches.
+        Used to compare titles by identity rather than spelling (e.g. 'Se7en' vs 'Seven').
+        """
+        if not title or not title.strip():
+            return None
+        params = {"query": title.strip(), "include_adult": "false", "page": 1}
+        if year:
+            params["year"] = year
+        results = self._get(self._SEARCH_ENDPOINT, params=params).get("results", [])
+        return int(results[0]["id"]) if results else None
+
     # ------------------------- Exposed SK functions -------------------------
 
     @kernel_function(
@@ -0,0 +1,423 @@
+"""
+Span-tree profiler for Semantic Kernel invocations, registered as kernel filters.
+
+Every `kernel.invoke` / `invoke_stream` becomes a trace: one span per function
+invocation (the prompt function, each tool it calls, nested prompt renders),
+with durations, token usage and counters such as HTTP retries or cache hits.
+A prompt function span's self time (duration minus its render and tool child
+spans) is the time spent in the LLM.
+
+  profiler = InvocationProfiler(jsonl_path="traces.jsonl", otlp_path="otlp.jsonl")
+  profiler.register(kernel)
+  ...
+  print(profiler.format_summary())           # p50/p95/p99 per category
+
+Code outside Semantic Kernel reports into the current span with `note()` and
+`span()`; both are no-ops (one ContextVar lookup) when nothing is profiled:
+
+  note("retry")                  # counters["retry"] += 1 on the current span
+  with span("tmdb GET /discover/movie", kind="http"):
+      ...
+
+Exports: an in-process histogram per category (`histogram()`, `summary()`),
+one JSON line per finished span (`jsonl_path`) and OTLP/JSON trace requests,
+one per line as written by the OpenTelemetry collector file exporter (`otlp_path`).
+
+Enable in the samples with SK_PROFILE=1 (SK_PROFILE_JSONL / SK_PROFILE_OTLP
+for the files).
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from semantic_kernel import Kernel
+from semantic_kernel.filters import (
+    FilterTypes,
+    FunctionInvocationContext,
+    PromptRenderContext,
+)
+from semantic_kernel.functions import FunctionResult
+
+_FLUSH_SEC = 0.5
+
+# histogram bucket upper bounds, milliseconds
+_BOUNDS_MS = [
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+    30000, 60000,
+]  # fmt: skip
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    wall_start_ns: int
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+    children_ns: int = 0
+    error: str | None = None
+    profiler: InvocationProfiler | None = field(default=None, repr=False)
+    parent: Span | None = field(default=None, repr=False)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    @property
+    def self_ms(self) -> float:
+        # children run concurrently when the model calls several tools at once
+        return max(0, self.end_ns - self.start_ns - self.children_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_unix_ns": self.wall_start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "self_ms": round(self.self_ms, 3),
+            "attributes": self.attributes,
+            "counters": self.counters,
+            "error": self.error,
+        }
+
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "sk_profiler_span", default=None
+)
+
+
+def note(counter: str, amount: int = 1) -> None:
+    """Add to a counter of the current span (no-op outside a profiled call)."""
+    current = _current.get()
+    if current is not None:
+        current.counters[counter] = current.counters.get(counter, 0) + amount
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """A child span of the current one (no-op outside a profiled call)."""
+    parent = _current.get()
+    if parent is None or parent.profiler is None:
+        yield None
+        return
+    child = parent.profiler.start(name, kind, attributes)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = repr(e)
+        raise
+    finally:
+        parent.profiler.finish(child)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile (max for the last)."""
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return (
+                    min(_BOUNDS_MS[i], self.max_ms)
+                    if i < len(_BOUNDS_MS)
+                    else self.max_ms
+                )
+        return self.max_ms
+
+    def buckets(self) -> list[tuple[float, int]]:
+        return list(zip(_BOUNDS_MS + [float("inf")], self.counts))
+
+
+class InvocationProfiler:
+    def __init__(
+        self,
+        jsonl_path: str | None = None,
+        otlp_path: str | None = None,
+        service_name: str = "ai-agent-practice",
+    ):
+        self.service_name = service_name
+        self.traces = 0
+        self._histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._pending: dict[str, list[Span]] = {}  # trace id -> finished spans
+        self._jsonl = open(jsonl_path, "a", encoding="utf-8") if jsonl_path else None
+        self._otlp = open(otlp_path, "a", encoding="utf-8") if otlp_path else None
+        # finished traces are serialized and written off the request path
+        self._exports: queue.SimpleQueue[list[Span] | None] = queue.SimpleQueue()
+        self._writer = None
+        if self._jsonl is not None or self._otlp is not None:
+            self._writer = threading.Thread(
+                target=self._write_loop, name="sk-profiler-writer", daemon=True
+            )
+            self._writer.start()
+
+    @classmethod
+    def from_env(cls) -> InvocationProfiler | None:
+        if os.getenv("SK_PROFILE", "") not in ("1", "true", "yes"):
+            return None
+        return cls(
+            jsonl_path=os.getenv("SK_PROFILE_JSONL") or None,
+            otlp_path=os.getenv("SK_PROFILE_OTLP") or None,
+        )
+
+    def register(self, kernel: Kernel) -> None:
+        kernel.add_filter(FilterTypes.FUNCTION_INVOCATION, self._function_filter)
+        kernel.add_filter(FilterTypes.PROMPT_RENDERING, self._render_filter)
+
+    # ------------------------- Spans -------------------------
+
+    def start(self, name: str, kind: str, attributes: dict | None = None) -> Span:
+        parent = _current.get()
+        started = Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.perf_counter_ns(),
+            wall_start_ns=time.time_ns(),
+            attributes=dict(attributes or {}),
+            profiler=self,
+            parent=parent,
+        )
+        _current.set(started)
+        return started
+
+    def finish(self, finished: Span) -> None:
+        finished.end_ns = time.perf_counter_ns()
+        parent = finished.parent
+        with self._lock:
+            self._pending.setdefault(finished.trace_id, []).append(finished)
+            self._histogram(self._category(finished)).add(finished.self_ms)
+        _current.set(parent)
+        if parent is None:
+            self._export(finished.trace_id)
+        else:
+            parent.children_ns += finished.end_ns - finished.start_ns
+
+    @staticmethod
+    def _category(finished: Span) -> str:
+        if finished.kind == "prompt":
+            return "llm"
+        if finished.kind == "render":
+            return "render"
+        if finished.kind == "function":
+            return f"tool:{finished.name}"
+        return f"{finished.kind}:{finished.name}"
+
+    def _histogram(self, category: str) -> Histogram:
+        histogram = self._histograms.get(category)
+        if histogram is None:
+            histogram = self._histograms[category] = Histogram()
+        return histogram
+
+    # ------------------------- SK filters -------------------------
+
+    async def _function_filter(self, context: FunctionInvocationContext, next):
+        function = context.function
+        kind = "prompt" if function.metadata.is_prompt else "function"
+        current = self.start(function.fully_qualified_name, kind)
+        try:
+            await next(context)
+        except BaseException as e:
+            current.error = repr(e)
+            self.finish(current)
+            raise
+
+        if context.is_streaming and context.result is not None:
+            context.result = FunctionResult(
+                function=context.result.function,
+                value=self._stream(current, context.result.value),
+                metadata=context.result.metadata,
+            )
+            return
+        if context.result is not None:
+            _add_usage(current, context.result.metadata.get("metadata") or [])
+        self.finish(current)
+
+    async def _stream(self, current: Span, stream):
+        try:
+            async for chunks in stream:
+                _add_usage(current, [getattr(c, "metadata", {}) for c in chunks])
+                yield chunks
+        finally:
+            self.finish(current)
+
+    async def _render_filter(self, context: PromptRenderContext, next):
+        current = self.start("render", "render")
+        try:
+            await next(context)
+        finally:
+            if context.rendered_prompt is not None:
+                current.attributes["prompt_chars"] = len(context.rendered_prompt)
+            self.finish(current)
+
+    # ------------------------- Exports -------------------------
+
+    def _export(self, trace_id: str) -> None:
+        with self._lock:
+            spans = self._pending.pop(trace_id, [])
+            self.traces += 1
+        if self._writer is not None:
+            self._exports.put(spans)
+
+    def _write_loop(self) -> None:
+        # Wake up at most every _FLUSH_SEC and write everything queued since:
+        # serializing trace by trace would compete with the event loop for the GIL.
+        closing = False
+        while not closing:
+            batch = [self._exports.get()]
+            time.sleep(_FLUSH_SEC)
+            while not self._exports.empty():
+                batch.append(self._exports.get())
+            closing = None in batch
+            traces = [spans for spans in batch if spans is not None]
+            if self._jsonl is not None:
+                self._jsonl.write(
+                    "".join(
+                        json.dumps(s.to_dict(), default=str) + "\n"
+                        for spans in traces
+                        for s in spans
+                    )
+                )
+                self._jsonl.flush()
+            if self._otlp is not None:
+                self._otlp.write(
+                    "".join(
+                        json.dumps(self.to_otlp(spans), default=str) + "\n"
+                        for spans in traces
+                    )
+                )
+                self._otlp.flush()
+
+    def to_otlp(self, spans: list[Span]) -> dict:
+        """An OTLP/JSON ExportTraceServiceRequest for one trace."""
+        otlp_spans = []
+        for s in spans:
+            attributes = dict(s.attributes)
+            attributes.update({f"count.{k}": v for k, v in s.counters.items()})
+            attributes["span.kind"] = s.kind
+            start = s.wall_start_ns
+            otlp_spans.append(
+                {
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent_id or "",
+                    "name": s.name,
+                    "kind": 1,  # SPAN_KIND_INTERNAL
+                    "startTimeUnixNano": str(start),
+                    "endTimeUnixNano": str(start + s.end_ns - s.start_ns),
+                    "attributes": [
+                        {"key": k, "value": _otlp_value(v)}
+                        for k, v in attributes.items()
+                    ],
+                    "status": {"code": 2, "message": s.error} if s.error else {},
+                }
+            )
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+                }
+            ]
+        }
+
+    def histogram(self, category: str) -> Histogram | None:
+        return self._histograms.get(category)
+
+    def summary(self) -> dict[str, dict]:
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {
+            category: {
+                "count": h.count,
+                "total_ms": round(h.total_ms, 3),
+                "p50_ms": h.percentile(50),
+                "p95_ms": h.percentile(95),
+                "p99_ms": h.percentile(99),
+                "max_ms": round(h.max_ms, 3),
+            }
+            for category, h in sorted(histograms.items())
+        }
+
+    def format_summary(self) -> str:
+        lines = [
+            f"{'category':<40}{'count':>7}{'total ms':>11}{'p50':>9}{'p95':>9}{'p99':>9}"
+        ]
+        for category, s in self.summary().items():
+            lines.append(
+                f"{category:<40}{s['count']:>7}{s['total_ms']:>11.1f}"
+                f"{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._exports.put(None)
+            self._writer.join()
+        for f in (self._jsonl, self._otlp):
+            if f is not None:
+                f.close()
+
+
+def _add_usage(current: Span, metadatas: list) -> None:
+    for metadata in metadatas:
+        usage = (metadata or {}).get("usage")
+        if usage is None:
+            continue
+        for key in ("prompt_tokens", "completion_tokens"):
+            value = getattr(usage, key, None)
+            if value:
+                current.counters[key] = current.counters.get(key, 0) + value
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
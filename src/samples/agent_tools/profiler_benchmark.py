@@ -0,0 +1,128 @@
+"""
+Overhead of InvocationProfiler on `kernel.invoke` of a prompt function that
+renders a template function and calls a fake chat service (fixed latency).
+A kernel with pass-through filters separates Semantic Kernel's own filter
+pipeline cost from the profiler's.
+
+  python -m src.samples.agent_tools.profiler_benchmark --invocations 200 --llm-ms 100
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from semantic_kernel import Kernel
+from semantic_kernel.connectors.ai.chat_completion_client_base import (
+    ChatCompletionClientBase,
+)
+from semantic_kernel.connectors.ai.completion_usage import CompletionUsage
+from semantic_kernel.contents import AuthorRole, ChatMessageContent
+from semantic_kernel.filters import FilterTypes
+from semantic_kernel.functions import kernel_function
+from semantic_kernel.prompt_template import PromptTemplateConfig
+
+from src.samples.agent_tools.profiler import InvocationProfiler, note, span
+
+
+class FakeChat(ChatCompletionClientBase):
+    latency_sec: float = 0.1
+
+    async def _inner_get_chat_message_contents(self, chat_history, settings):
+        await asyncio.sleep(self.latency_sec)
+        return [
+            ChatMessageContent(
+                role=AuthorRole.ASSISTANT,
+                content="Heat (1995)",
+                metadata={
+                    "usage": CompletionUsage(prompt_tokens=42, completion_tokens=7)
+                },
+            )
+        ]
+
+
+class Tools:
+    @kernel_function(name="lookup")
+    def lookup(self) -> str:
+        with span("lookup cache", kind="cache"):
+            note("cache_hit")
+        return "Heat, Thief"
+
+
+async def pass_through(context, next):
+    await next(context)
+
+
+def build_kernel(llm_ms: float):
+    kernel = Kernel()
+    kernel.add_service(FakeChat(ai_model_id="fake", latency_sec=llm_ms / 1000))
+    kernel.add_plugin(Tools(), "Tools")
+    function = kernel.add_function(
+        plugin_name="Bench",
+        function_name="recommend",
+        prompt_template_config=PromptTemplateConfig(
+            template="Seen: {{Tools.lookup}}. Recommend one movie like {{$input}}."
+        ),
+    )
+    return kernel, function
+
+
+async def run(kernel, function, invocations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(invocations):
+        await kernel.invoke(function, input="Heat")
+    return time.perf_counter() - started
+
+
+async def main(invocations: int, llm_ms: float, rounds: int) -> None:
+    plain = build_kernel(llm_ms)
+    filtered = build_kernel(llm_ms)
+    filtered[0].add_filter(FilterTypes.FUNCTION_INVOCATION, pass_through)
+    filtered[0].add_filter(FilterTypes.PROMPT_RENDERING, pass_through)
+    profiled = build_kernel(llm_ms)
+
+    with tempfile.TemporaryDirectory() as root:
+        profiler = InvocationProfiler(
+            jsonl_path=os.path.join(root, "traces.jsonl"),
+            otlp_path=os.path.join(root, "otlp.jsonl"),
+        )
+        profiler.register(profiled[0])
+        setups = {"plain": plain, "filters": filtered, "profiled": profiled}
+        for kernel, function in setups.values():
+            await run(kernel, function, 10)  # warm up
+
+        # interleaved rounds, best of each: asyncio.sleep jitter is larger
+        # than the differences being measured
+        best = dict.fromkeys(setups, float("inf"))
+        for _ in range(rounds):
+            for name, (kernel, function) in setups.items():
+                best[name] = min(best[name], await run(kernel, function, invocations))
+        profiler.close()
+        with open(os.path.join(root, "traces.jsonl")) as f:
+            spans = sum(1 for _ in f)
+
+    per_call = {name: t / invocations for name, t in best.items()}
+    print(f"{invocations} invocations x {rounds} rounds, fake LLM {llm_ms} ms")
+    for name, t in per_call.items():
+        print(f"{name:<10}{t * 1e3:8.3f} ms/invocation")
+    for label, extra in (
+        ("profiler", per_call["profiled"] - per_call["filters"]),
+        ("total", per_call["profiled"] - per_call["plain"]),
+    ):
+        print(
+            f"{label} overhead {extra * 1e6:7.1f} us/invocation "
+            f"({extra / per_call['plain'] * 100:.2f}%)"
+        )
+    print(f"{profiler.traces} traces, {spans} spans exported")
+    print()
+    print(profiler.format_summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--invocations", type=int, default=200)
+    parser.add_argument("--llm-ms", type=float, default=100.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.invocations, args.llm_ms, args.rounds))
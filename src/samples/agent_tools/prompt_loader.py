@@ -0,0 +1,204 @@
+"""
+Compiled, cached Semantic Kernel prompt plugins loaded from YAML files.
+
+`kernel.add_plugin(parent_directory=...)` re-reads and re-parses every YAML file
+(and rebuilds every PromptTemplateConfig / template) each time it is called, and
+`KernelPromptTemplate.render` walks the generic block list and copies the
+arguments on every invocation. Here every template is
+
+  - compiled once into a flat list of segments: merged static text, variable
+    slots (with their escape decision made up front) and function-call blocks,
+  - cached keyed by the file's (mtime, size), so loading the plugin again only
+    costs one `stat` per file and a changed file is recompiled (hot reload).
+
+Rendering then only substitutes variables between precomputed static strings;
+function-call blocks such as `{{MySeenMoviesDatabase.LoadSeenMovies}}` are still
+invoked per render, exactly like the stock template.
+
+  loader = shared_loader()
+  plugin = loader.load_plugin(kernel, "recommend_movie", plugin_dir)
+  ...
+  plugin = loader.load_plugin(kernel, "recommend_movie", plugin_dir)  # picks up edits
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import threading
+from html import escape
+from typing import Any
+
+import yaml
+from pydantic import PrivateAttr
+from semantic_kernel import Kernel
+from semantic_kernel.functions import (
+    KernelArguments,
+    KernelFunctionFromPrompt,
+    KernelPlugin,
+)
+from semantic_kernel.prompt_template import InputVariable, PromptTemplateConfig
+from semantic_kernel.prompt_template.prompt_template_base import PromptTemplateBase
+from semantic_kernel.template_engine.blocks.code_block import CodeBlock
+from semantic_kernel.template_engine.blocks.text_block import TextBlock
+from semantic_kernel.template_engine.blocks.var_block import VarBlock
+from semantic_kernel.template_engine.protocols.text_renderer import TextRenderer
+from semantic_kernel.template_engine.template_tokenizer import TemplateTokenizer
+
+_TEXT, _VAR, _CODE = 0, 1, 2
+
+
+class CompiledPromptTemplate(PromptTemplateBase):
+    """semantic-kernel format template rendered from precompiled segments."""
+
+    _segments: list[tuple[int, Any, bool]] = PrivateAttr(default_factory=list)
+    _has_code: bool = PrivateAttr(default=False)
+
+    def model_post_init(self, _: Any) -> None:
+        blocks = TemplateTokenizer.tokenize(self.prompt_template_config.template or "")
+        seen = {iv.name.lower() for iv in self.prompt_template_config.input_variables}
+
+        segments: list[tuple[int, Any, bool]] = []
+        for block in blocks:
+            if isinstance(block, VarBlock):
+                self._add_if_missing(block.name, seen)
+                escape_value = (
+                    not self.allow_dangerously_set_content
+                    and self._should_escape(
+                        block.name, self.prompt_template_config.input_variables
+                    )
+                )
+                segments.append((_VAR, block.name, escape_value))
+            elif isinstance(block, CodeBlock):
+                for token in block.tokens:
+                    if isinstance(token, VarBlock):
+                        self._add_if_missing(token.name, seen)
+                segments.append((_CODE, block, False))
+            elif isinstance(block, (TextBlock, TextRenderer)):
+                text = block.render(None, None)
+                if segments and segments[-1][0] == _TEXT:
+                    segments[-1] = (_TEXT, segments[-1][1] + text, False)
+                else:
+                    segments.append((_TEXT, text, False))
+        self._segments = segments
+        self._has_code = any(kind == _CODE for kind, _, _ in segments)
+
+    def _add_if_missing(self, name: str, seen: set) -> None:
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            self.prompt_template_config.input_variables.append(InputVariable(name=name))
+
+    async def render(
+        self, kernel: Kernel, arguments: KernelArguments | None = None
+    ) -> str:
+        arguments = arguments if arguments is not None else KernelArguments()
+        trusted = self._get_trusted_arguments(arguments) if self._has_code else None
+        allow_function_output = self._get_allow_dangerously_set_function_output()
+
+        parts = []
+        for kind, payload, escape_value in self._segments:
+            if kind == _TEXT:
+                parts.append(payload)
+            elif kind == _VAR:
+                value = arguments.get(payload)
+                if value is None:
+                    parts.append("")
+                elif isinstance(value, str):
+                    parts.append(escape(value) if escape_value else value)
+                else:
+                    parts.append(str(value))
+            else:
+                rendered = await payload.render_code(kernel, trusted)
+                parts.append(rendered if allow_function_output else escape(rendered))
+        return "".join(parts)
+
+
+class CompiledPluginLoader:
+    """Loads YAML prompt plugins into compiled functions, cached by file mtime."""
+
+    def __init__(self):
+        # path -> ((mtime_ns, size), function)
+        self._functions: dict[str, tuple[tuple, KernelFunctionFromPrompt]] = {}
+        # (kernel id, plugin name) -> (function ids, plugin)
+        self._plugins: dict[tuple[int, str], tuple[tuple[int, ...], KernelPlugin]] = {}
+        self._lock = threading.Lock()
+        self.compiles = 0
+        self.cache_hits = 0
+
+    def load_function(
+        self, path: str, plugin_name: str | None = None
+    ) -> KernelFunctionFromPrompt:
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._functions.get(path)
+            if cached is not None and cached[0] == version:
+                self.cache_hits += 1
+                return cached[1]
+
+        function = self._compile(path, plugin_name)
+        with self._lock:
+            self._functions[path] = (version, function)
+            self.compiles += 1
+        return function
+
+    def load_plugin(
+        self, kernel: Kernel, plugin_name: str, parent_directory: str
+    ) -> KernelPlugin:
+        """
+        Add (or refresh) the plugin `parent_directory/plugin_name` on the kernel.
+        Cheap when nothing changed: returns the plugin already registered.
+        """
+        directory = os.path.join(parent_directory, plugin_name)
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"Plugin directory does not exist: {directory}")
+        paths = sorted(
+            glob.glob(os.path.join(directory, "*.yaml"))
+            + glob.glob(os.path.join(directory, "*.yml"))
+        )
+        functions = [self.load_function(os.path.abspath(p), plugin_name) for p in paths]
+
+        key = (id(kernel), plugin_name)
+        ids = tuple(id(f) for f in functions)
+        registered = self._plugins.get(key)
+        if (
+            registered is not None
+            and registered[0] == ids
+            and plugin_name in kernel.plugins
+        ):
+            return registered[1]
+
+        plugin = KernelPlugin(name=plugin_name, functions=functions)
+        kernel.add_plugin(plugin)
+        self._plugins[key] = (ids, plugin)
+        return plugin
+
+    @staticmethod
+    def _compile(path: str, plugin_name: str | None) -> KernelFunctionFromPrompt:
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"Prompt YAML must be a mapping: {path}")
+        config = PromptTemplateConfig(**data)
+        if config.template_format != "semantic-kernel":
+            raise ValueError(
+                f"{path}: only the semantic-kernel template format can be precompiled"
+            )
+        return KernelFunctionFromPrompt(
+            function_name=config.name,
+            plugin_name=plugin_name,
+            description=config.description,
+            prompt_template=CompiledPromptTemplate(prompt_template_config=config),
+        )
+
+
+_shared: CompiledPluginLoader | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_loader() -> CompiledPluginLoader:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = CompiledPluginLoader()
+        return _shared
@@ -0,0 +1,107 @@
+"""
+Load and render time for hundreds of YAML prompt functions:
+stock `kernel.add_plugin(parent_directory=...)` + KernelPromptTemplate
+vs. CompiledPluginLoader + CompiledPromptTemplate.
+
+  python -m src.samples.agent_tools.prompt_loader_benchmark --functions 500
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from semantic_kernel import Kernel
+from semantic_kernel.functions import KernelArguments
+from semantic_kernel.prompt_template import KernelPromptTemplate
+
+from src.samples.agent_tools.prompt_loader import CompiledPluginLoader
+
+_TEMPLATE = """name: Recommend_{i}
+description: Recommend similar movies based on a seed title
+template_format: semantic-kernel
+template: |
+  system:
+  You are a film expert who recommends movies with brief reasons. ({i})
+  Always answer in {{{{$language}}}} and keep every reason under twenty words.
+
+  user:
+  Recommend {{{{$count}}}} movies similar to "{{{{$input}}}}".
+  Return as a numbered list with a one-line reason each.
+input_variables:
+  - name: input
+    description: seed movie title
+    is_required: true
+"""
+
+
+def write_plugin(root: str, plugin_name: str, n: int) -> None:
+    directory = os.path.join(root, plugin_name)
+    os.makedirs(directory)
+    for i in range(n):
+        with open(os.path.join(directory, f"Recommend_{i}.yaml"), "w") as f:
+            f.write(_TEMPLATE.format(i=i))
+
+
+async def render_all(kernel, templates, arguments, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for template in templates:
+            await template.render(kernel, arguments)
+    return time.perf_counter() - started
+
+
+async def main(n: int, rounds: int) -> None:
+    arguments = KernelArguments(input="Heat", count="5", language="English")
+    with tempfile.TemporaryDirectory() as root:
+        write_plugin(root, "bench", n)
+
+        kernel = Kernel()
+        started = time.perf_counter()
+        stock = kernel.add_plugin(plugin_name="bench", parent_directory=root)
+        stock_load = time.perf_counter() - started
+        started = time.perf_counter()
+        kernel.add_plugin(plugin_name="bench", parent_directory=root)
+        stock_reload = time.perf_counter() - started
+        stock_templates = [
+            KernelPromptTemplate(
+                prompt_template_config=f.prompt_template.prompt_template_config
+            )
+            for f in stock.functions.values()
+        ]
+
+        kernel = Kernel()
+        loader = CompiledPluginLoader()
+        started = time.perf_counter()
+        compiled = loader.load_plugin(kernel, "bench", root)
+        compiled_load = time.perf_counter() - started
+        started = time.perf_counter()
+        loader.load_plugin(kernel, "bench", root)
+        compiled_reload = time.perf_counter() - started
+        compiled_templates = [f.prompt_template for f in compiled.functions.values()]
+
+        stock_render = await render_all(kernel, stock_templates, arguments, rounds)
+        compiled_render = await render_all(
+            kernel, compiled_templates, arguments, rounds
+        )
+
+    renders = n * rounds
+    print(f"{n} functions, {renders} renders")
+    print(f"{'':<10}{'load ms':>10}{'reload ms':>12}{'render us':>12}")
+    print(
+        f"{'stock':<10}{stock_load * 1e3:>10.1f}{stock_reload * 1e3:>12.1f}"
+        f"{stock_render / renders * 1e6:>12.1f}"
+    )
+    print(
+        f"{'compiled':<10}{compiled_load * 1e3:>10.1f}{compiled_reload * 1e3:>12.1f}"
+        f"{compiled_render / renders * 1e6:>12.1f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--functions", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.functions, args.rounds))
@@ -0,0 +1,308 @@
+"""
+Deterministic post-filter for movie recommendations.
+
+Prompts such as `Recommend_Movies2` show the model the seen list and trust it to
+avoid those titles; when it does not, re-prompting costs another full generation.
+Instead the answer is parsed as a numbered list, every title is normalized
+(case, punctuation, release year) and checked against the indexed seen-set and,
+when a TMDbService is given, against the TMDb ids of the seen titles. Only the
+rejected slots are asked for again with a small top-up prompt.
+
+  recommender = RecommendationFilter(get_seen_movies_store(), tmdb=TMDbService())
+  picks = await recommender.recommend_unseen(
+      kernel, plugin["Recommend_Movies2"], KernelArguments(settings=settings)
+  )
+  print(format_numbered_list(picks))
+
+`python -m src.samples.agent_tools.recommendation_filter` checks the list
+parser against the formats models are known to produce.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+
+from semantic_kernel import Kernel
+from semantic_kernel.functions import (
+    KernelArguments,
+    KernelFunction,
+    KernelFunctionFromPrompt,
+)
+from semantic_kernel.prompt_template import InputVariable, PromptTemplateConfig
+
+from src.samples.agent_tools.seen_movies import SeenMoviesStore, normalize_title
+
+_ITEM_RE = re.compile(r"^\s*(\d+)[.)]\s+(.*\S)\s*$")
+# **Title**, __Title__, *Title*, _Title_, "Title" and the rest of the line
+_EMPHASIS_RE = re.compile(r"^(\*\*|__|\*|_)(.+?)\1(?![*_\w])(.*)$")
+_QUOTED_RE = re.compile(r"^([\"“'])(.+?)[\"”'](?!\w)(.*)$")
+_YEAR_RE = re.compile(r"\s*\((\d{4})\)")
+_DASH_RE = re.compile(r"\s+[-–—]\s+")
+_COLON_RE = re.compile(r":\s+")
+_LEADING_SEPARATOR_RE = re.compile(r"^[\s:,;.*_\-–—]+")
+# a colon followed by at least this many words introduces the reason;
+# a shorter tail is part of the title ("Mission: Impossible")
+_COLON_REASON_WORDS = 3
+
+_TOP_UP_PROMPT = """
+system:
+You are a film expert who recommends movies with brief reasons.
+
+user:
+Recommend exactly {{$count}} more movies similar to {{$seed}}.
+Do not recommend any of these: {{$exclude}}.
+Return as a numbered list with a one-line reason each.
+"""
+
+
+@dataclass
+class Recommendation:
+    title: str
+    reason: str = ""
+    raw: str = ""
+    year: int | None = None
+
+
+def _split_item(body: str) -> tuple[str, int | None, str]:
+    """(title, year, reason) of one list item's text."""
+    quoted = _EMPHASIS_RE.match(body) or _QUOTED_RE.match(body)
+    if quoted:
+        title, rest = quoted.group(2), quoted.group(3)
+        year = _YEAR_RE.match(rest)  # "**Heat** (1995) – ..."
+        if year:
+            rest = rest[year.end() :]
+        reason = rest
+    else:
+        year = _YEAR_RE.search(body)
+        if year:
+            # the year closes the title: "Mission: Impossible – Fallout (2018) – ..."
+            title, reason = body[: year.start()], body[year.end() :]
+        else:
+            title, reason = _split_reason(body)
+    inner_year = _YEAR_RE.search(title)  # "**Heat (1995)**: ..."
+    if inner_year:
+        title = title[: inner_year.start()] + title[inner_year.end() :]
+        year = year or inner_year
+    return (
+        title.strip().strip("*_\"'“”").strip(),
+        int(year.group(1)) if year else None,
+        _LEADING_SEPARATOR_RE.sub("", reason).strip(),
+    )
+
+
+def _split_reason(body: str) -> tuple[str, str]:
+    parts = _DASH_RE.split(body, maxsplit=1)
+    if len(parts) == 2:
+        return parts[0], parts[1]
+    for colon in reversed(list(_COLON_RE.finditer(body))):
+        if len(body[colon.end() :].split()) >= _COLON_REASON_WORDS:
+            return body[: colon.start()], body[colon.end() :]
+    return body, ""
+
+
+def parse_numbered_list(text: str) -> list[Recommendation]:
+    """
+    Items of a numbered list ("1. Title – reason", "2) **Title (1999)**: reason",
+    "3. *Title* (1999) - reason"). The release year goes to `year`, whether it
+    sits inside the emphasis or after it. Lines that are not list items (intro /
+    outro chatter) are skipped.
+    """
+    items = []
+    for line in text.splitlines():
+        match = _ITEM_RE.match(line)
+        if not match:
+            continue
+        body = match.group(2)
+        title, year, reason = _split_item(body)
+        if title:
+            items.append(Recommendation(title, reason, body, year))
+    return items
+
+
+def format_numbered_list(items: list[Recommendation]) -> str:
+    return "\n".join(
+        f"{i}. {item.title}"
+        + (f" ({item.year})" if item.year else "")
+        + (f" – {item.reason}" if item.reason else "")
+        for i, item in enumerate(items, 1)
+    )
+
+
+class RecommendationFilter:
+    def __init__(
+        self,
+        store: SeenMoviesStore,
+        tmdb=None,
+        max_seen_lookups: int = 200,
+        lookups_per_call: int = 20,
+        max_concurrent_lookups: int = 4,
+        failure_ttl_sec: float = 60.0,
+    ):
+        """
+        `tmdb` (a TMDbService) is optional; without it titles are compared by their
+        normalized spelling only. At most `max_seen_lookups` of the most recently
+        seen titles are resolved to TMDb ids, each once per process, and at most
+        `lookups_per_call` of them per `filter()` call (the rest on later calls),
+        `max_concurrent_lookups` at a time. A failed lookup is not retried for
+        `failure_ttl_sec`; the title is compared by spelling until then.
+        """
+        self.store = store
+        self.tmdb = tmdb
+        self.max_seen_lookups = max_seen_lookups
+        self.lookups_per_call = lookups_per_call
+        self.failure_ttl_sec = failure_ttl_sec
+        self.rejected = 0
+        self.top_ups = 0
+        self._ids: dict[str, int | None] = {}  # normalized title -> TMDb id
+        self._failed: dict[str, float] = {}  # normalized title -> retry after
+        self._lookups = asyncio.Semaphore(max_concurrent_lookups)
+        self._top_up = KernelFunctionFromPrompt(
+            function_name="Recommend_More",
+            plugin_name="RecommendationFilter",
+            prompt_template_config=PromptTemplateConfig(
+                template=_TOP_UP_PROMPT,
+                template_format="semantic-kernel",
+                input_variables=[
+                    InputVariable(name="count", is_required=True),
+                    InputVariable(name="seed", is_required=True),
+                    InputVariable(name="exclude", is_required=True),
+                ],
+            ),
+        )
+
+    # ------------------------- TMDb identity -------------------------
+
+    def _needs_lookup(self, key: str, now: float) -> bool:
+        return key not in self._ids and self._failed.get(key, 0.0) <= now
+
+    async def _tmdb_id(self, title: str, year: int | None = None) -> int | None:
+        key = normalize_title(title)
+        if not self._needs_lookup(key, time.monotonic()):
+            return self._ids.get(key)
+        async with self._lookups:
+            if not self._needs_lookup(key, time.monotonic()):
+                return self._ids.get(key)  # resolved while this one waited
+            try:
+                self._ids[key] = await asyncio.to_thread(
+                    self.tmdb.find_movie_id, title, year
+                )
+            except (RuntimeError, ValueError):
+                # TMDb unavailable: spelling only for this title, for a while
+                self._failed[key] = time.monotonic() + self.failure_ttl_sec
+                return None
+        self._failed.pop(key, None)
+        return self._ids[key]
+
+    async def _seen_ids(self) -> set[int]:
+        titles = self.store.relevant(self.max_seen_lookups)
+        now = time.monotonic()
+        missing = [t for t in titles if self._needs_lookup(normalize_title(t), now)]
+        await asyncio.gather(
+            *(self._tmdb_id(t) for t in missing[: self.lookups_per_call])
+        )
+        ids = (self._ids.get(normalize_title(t)) for t in titles)
+        return {i for i in ids if i is not None}
+
+    # ------------------------- Filtering -------------------------
+
+    async def filter(
+        self, items: list[Recommendation], exclude: set[str] | None = None
+    ) -> tuple[list[Recommendation], list[Recommendation]]:
+        """Split `items` into (unseen, rejected); duplicates count as rejected."""
+        seen = self.store.normalized_titles()
+        taken = set(exclude or ())
+        seen_ids = await self._seen_ids() if self.tmdb is not None else set()
+
+        kept, rejected = [], []
+        for item in items:
+            key = normalize_title(item.title)
+            if not key or key in seen or key in taken:
+                rejected.append(item)
+                continue
+            if seen_ids and await self._tmdb_id(item.title, item.year) in seen_ids:
+                rejected.append(item)
+                continue
+            taken.add(key)
+            kept.append(item)
+        self.rejected += len(rejected)
+        return kept, rejected
+
+    async def recommend_unseen(
+        self,
+        kernel: Kernel,
+        function: KernelFunction,
+        arguments: KernelArguments | None = None,
+        want: int = 5,
+        max_rounds: int = 2,
+    ) -> list[Recommendation]:
+        """
+        Invoke `function` once, drop titles already seen, then ask for just the
+        missing slots (up to `max_rounds` small top-ups). May return fewer than
+        `want` items if the model keeps suggesting seen titles.
+        """
+        arguments = arguments if arguments is not None else KernelArguments()
+        result = await kernel.invoke(function, arguments)
+        kept, rejected = await self.filter(parse_numbered_list(str(result)))
+        kept = kept[:want]
+
+        for _ in range(max_rounds):
+            missing = want - len(kept)
+            if missing <= 0:
+                break
+            exclude = [item.title for item in kept + rejected]
+            top_up_arguments = KernelArguments(
+                settings=arguments.execution_settings,
+                count=str(missing),
+                seed=", ".join(self.store.relevant(20)) or "popular classics",
+                exclude=", ".join(exclude) or "none",
+            )
+            self.top_ups += 1
+            result = await kernel.invoke(self._top_up, top_up_arguments)
+            more, more_rejected = await self.filter(
+                parse_numbered_list(str(result)),
+                exclude={normalize_title(item.title) for item in kept},
+            )
+            kept.extend(more[:missing])
+            rejected.extend(more_rejected)
+        return kept
+
+
+# list item -> (title, year, reason)
+_PARSE_CHECKS = {
+    "1. **Heat** (1995) – A tense heist thriller.": (
+        "Heat",
+        1995,
+        "A tense heist thriller.",
+    ),
+    "2) **Ronin (1998)**: car chases": ("Ronin", 1998, "car chases"),
+    "3. *Se7en* (1995) - dark": ("Se7en", 1995, "dark"),
+    "4. _Drive_ (2011)": ("Drive", 2011, ""),
+    '5. "Collateral" — one night in LA': ("Collateral", None, "one night in LA"),
+    "6. Mission: Impossible – Fallout (2018) – action": (
+        "Mission: Impossible – Fallout",
+        2018,
+        "action",
+    ),
+    "7. Mission: Impossible": ("Mission: Impossible", None, ""),
+    "8. Thief: Michael Mann's stylish debut": (
+        "Thief",
+        None,
+        "Michael Mann's stylish debut",
+    ),
+    "9. Heat - classic": ("Heat", None, "classic"),
+}
+
+
+if __name__ == "__main__":
+    failures = 0
+    for line, expected in _PARSE_CHECKS.items():
+        items = parse_numbered_list(line)
+        got = (items[0].title, items[0].year, items[0].reason) if items else None
+        if got != expected:
+            failures += 1
+            print(f"FAIL {line!r}: got {got}, expected {expected}")
+    print(f"{len(_PARSE_CHECKS) - failures}/{len(_PARSE_CHECKS)} list formats parsed")
+    raise SystemExit(1 if failures else 0)
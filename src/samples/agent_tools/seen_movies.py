@@ -0,0 +1,137 @@
+"""
+Indexed store for the seen-movies list used by the movie recommender.
+
+The file is read only when it changes (mtime/size check per access), kept as an
+ordered list plus a set of normalized titles for O(1) membership checks, and
+exposed to prompts through a bounded projection so prompt size stays constant
+no matter how many titles a user has watched.
+
+File format: one title per line, oldest first. A line may carry genres after a
+`|`, e.g. `Heat (1995) | Crime, Thriller`. Blank lines are ignored.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+from src.samples.agent_tools.profiler import note
+
+DEFAULT_PATH = "./resources/extra/seen_movies.txt"
+_NOT_LOADED = object()
+
+_YEAR_RE = re.compile(r"[\(\[]\s*(18|19|20)\d{2}\s*[\)\]]\s*$")  # "Heat (1995)"
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_title(title: str) -> str:
+    """Case-, punctuation- and release-year-insensitive key for a title."""
+    title = _YEAR_RE.sub("", title.strip())
+    title = _PUNCT_RE.sub(" ", title.casefold())
+    return _WS_RE.sub(" ", title).strip()
+
+
+@dataclass
+class SeenMovie:
+    title: str
+    genres: set[str] = field(default_factory=set)
+
+
+class SeenMoviesStore:
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self.reloads = 0
+        self._version: object = _NOT_LOADED
+        self._movies: list[SeenMovie] = []
+        self._index: set[str] = set()
+        self._lock = threading.Lock()
+
+    # ------------------------- Loading -------------------------
+
+    def _refresh(self) -> None:
+        try:
+            stat = os.stat(self.path)
+            version = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            version = None
+        if version == self._version:
+            note("cache_hit")
+            return
+        with self._lock:
+            if version == self._version:
+                note("cache_hit")
+                return
+            movies = self._read() if version is not None else []
+            self._movies = movies
+            self._index = {normalize_title(m.title) for m in movies}
+            self._version = version
+            self.reloads += 1
+
+    def _read(self) -> list[SeenMovie]:
+        movies = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                title, _, genres = line.partition("|")
+                movies.append(
+                    SeenMovie(
+                        title=title.strip(),
+                        genres={
+                            g.strip().casefold() for g in genres.split(",") if g.strip()
+                        },
+                    )
+                )
+        return movies
+
+    # ------------------------- Queries -------------------------
+
+    def __contains__(self, title: str) -> bool:
+        self._refresh()
+        return normalize_title(title) in self._index
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._movies)
+
+    def titles(self) -> list[str]:
+        self._refresh()
+        return [m.title for m in self._movies]
+
+    def normalized_titles(self) -> set[str]:
+        self._refresh()
+        return self._index
+
+    def relevant(self, limit: int = 20, genre: str | None = None) -> list[str]:
+        """
+        At most `limit` titles, most recent first. With a genre, titles tagged with
+        that genre come first and the most recent other titles fill the rest.
+        """
+        self._refresh()
+        recent = reversed(self._movies)
+        if not genre:
+            return [m.title for _, m in zip(range(limit), recent)]
+
+        genre = genre.strip().casefold()
+        matching, others = [], []
+        for movie in recent:
+            (matching if genre in movie.genres else others).append(movie.title)
+            if len(matching) >= limit:
+                break
+        return (matching + others)[:limit]
+
+
+_stores: dict[str, SeenMoviesStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_seen_movies_store(path: str = DEFAULT_PATH) -> SeenMoviesStore:
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SeenMoviesStore(path)
+        return store
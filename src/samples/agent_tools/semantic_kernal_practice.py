@@ -1,29 +1,34 @@
 import asyncio
+import os
 
 import semantic_kernel as sk
-from semantic_kernel.connectors.ai.ollama import (
-    OllamaChatPromptExecutionSettings,
-    OllamaChatCompletion,
-)
 from semantic_kernel.functions import KernelArguments, kernel_function
 from semantic_kernel.prompt_template import PromptTemplateConfig, InputVariable
 
-kernel = sk.Kernel()
-chat = OllamaChatCompletion(
-    ai_model_id="gpt-oss:20b",  # e.g. `ollama pull gpt-oss:20b`
-    host="http://localhost:11434",  # default Ollama endpoint
-    service_id="ollama-gpt",  # <-- pick any id; reuse below
+from src.samples.agent_tools.plugins.tmdb import TMDbService
+from src.samples.agent_tools.prompt_loader import shared_loader
+from src.samples.agent_tools.recommendation_filter import (
+    RecommendationFilter,
+    format_numbered_list,
 )
+from src.samples.agent_tools.seen_movies import get_seen_movies_store
+from src.samples.llm_clients import chat_completion_service, chat_execution_settings
+
+kernel = sk.Kernel()
+# endpoint / model come from LLM_BASE_URL / LLM_MODEL (Ollama's /v1 by default)
+chat = chat_completion_service("ollama-gpt")
 kernel.add_service(chat)
 
 
 class MySeenMoviesDatabase:
+    def __init__(self, limit: int = 20):
+        # file is re-read only when it changes; prompt gets at most `limit` titles
+        self.store = get_seen_movies_store()
+        self.limit = limit
+
     @kernel_function(name="LoadSeenMovies", description="load movie list already seen.")
-    def load_seen_movies(self) -> str:
-        with open("./resources/extra/seen_movies.txt") as f:
-            lines = [line.strip() for line in f.readlines() if line]
-            string = ", ".join(lines)
-        return string
+    def load_seen_movies(self, genre: str = "") -> str:
+        return ", ".join(self.store.relevant(self.limit, genre=genre or None))
 
 
 def get_recommend_prompt_config(execution_settings):
@@ -74,9 +79,8 @@ async def main():
         "MySeenMoviesDatabase",
     )
 
-    execution_settings = OllamaChatPromptExecutionSettings(
-        service_id="ollama-gpt",
-        ai_model_id="gpt-oss:20b",
+    execution_settings = chat_execution_settings(
+        "ollama-gpt",
         max_tokens=5120,
         temperature=0.7,
     )
@@ -101,19 +105,28 @@ async def main():
     # print(recommendation)
 
     plugin_dir = "./resources/semantic_kernel/plugins/MovieRecommender"
-    movie_recommender = kernel.add_plugin(
+    # templates are compiled once and cached by file mtime (edits are hot-reloaded)
+    movie_recommender = shared_loader().load_plugin(
+        kernel,
         plugin_name="recommend_movie",
         parent_directory=plugin_dir,
     )
 
-    recommendation_from_seen = await kernel.invoke(
+    # titles already seen are dropped after generation; only missing slots are re-asked
+    recommender = RecommendationFilter(
+        get_seen_movies_store(),
+        tmdb=TMDbService() if os.getenv("TMDB_BEARER_TOKEN") else None,
+    )
+    recommendation_from_seen = await recommender.recommend_unseen(
+        kernel,
         movie_recommender[
             "Recommend_Movies2"
         ],  # Recommend_Movies2 function in movie_recommender plugin
         KernelArguments(settings=execution_settings),
+        want=5,
     )
 
-    print(recommendation_from_seen)
+    print(format_numbered_list(recommendation_from_seen))
 
 
 if __name__ == "__main__":
@@ -7,17 +7,21 @@ from dotenv import load_dotenv
 from semantic_kernel import Kernel
 
 from src.samples.agent_tools.plugins.tmdb import TMDbService
+from src.samples.cassettes import active_cassette
 
 load_dotenv()
 
 
 def _ensure_token():
     tok = os.environ.get("TMDB_BEARER_TOKEN")
-    if not tok:
+    cassette = active_cassette()
+    if not tok and (cassette is None or cassette.recording):
         raise RuntimeError(
             "TMDB_BEARER_TOKEN env var not set.\n"
             "Get a TMDb v4 Read Access Token and export it, e.g.:\n"
-            '  export TMDB_BEARER_TOKEN="eyJhbGciOi..."'
+            '  export TMDB_BEARER_TOKEN="eyJhbGciOi..."\n'
+            "or replay a recorded session offline:\n"
+            "  CASSETTE_MODE=replay CASSETTE_PATH=cassettes/tmdb.jsonl.gz"
         )
 
 
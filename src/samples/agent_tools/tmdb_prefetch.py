@@ -0,0 +1,163 @@
+"""
+Start TMDb lookups for genres the user mentions before the model asks for them.
+
+The model takes its time (time to first token, then the tool call arguments)
+before get_top_movies_by_genre runs; the genre list and Discover round trips
+then sit on the critical path. GenrePrefetcher looks for genre words in the
+user's message, and in tool call arguments as they stream in, and fetches
+those genres into TMDbService's shared cache on a background thread. When the
+tool call lands it is served from the cache, or joins the fetch in flight.
+
+  prefetcher = GenrePrefetcher.from_env(TMDbService())   # TMDB_PREFETCH=1
+  prefetcher.watch(user_input)
+  watcher = prefetcher.watcher()                           # per streamed turn
+  async for chunks in kernel.invoke_stream(...):
+      watcher.feed(chunks)
+  print(prefetcher.format_summary())
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from semantic_kernel.contents import FunctionCallContent
+
+from src.samples.agent_tools.plugins.tmdb import TMDbService
+
+# words people use -> TMDb movie genre name
+_GENRE_PATTERNS = {
+    r"action": "Action",
+    r"adventures?": "Adventure",
+    r"animated|animation|anime|cartoons?": "Animation",
+    r"comed(?:y|ies)|funny|rom-?coms?": "Comedy",
+    r"crime|heists?|gangsters?|noir": "Crime",
+    r"documentar(?:y|ies)": "Documentary",
+    r"dramas?": "Drama",
+    r"family|kids": "Family",
+    r"fantasy": "Fantasy",
+    r"history|historical|biopics?": "History",
+    r"horror|scary": "Horror",
+    r"musicals?|music": "Music",
+    r"myster(?:y|ies)|whodunits?": "Mystery",
+    r"romance|romantic": "Romance",
+    r"sci-?fi|science fiction|space opera": "Science Fiction",
+    r"thrillers?|suspense": "Thriller",
+    r"war": "War",
+    r"westerns?": "Western",
+}
+_GENRE_RE = re.compile(
+    "|".join(
+        f"(?P<g{i}>\\b(?:{pattern})\\b)" for i, pattern in enumerate(_GENRE_PATTERNS)
+    ),
+    re.IGNORECASE,
+)
+_GENRES = list(_GENRE_PATTERNS.values())
+
+
+def genres_in(text: str) -> list[str]:
+    """TMDb genre names mentioned in `text`, in order of first mention."""
+    found = []
+    for match in _GENRE_RE.finditer(text or ""):
+        genre = _GENRES[int(match.lastgroup[1:])]
+        if genre not in found:
+            found.append(genre)
+    return found
+
+
+class GenrePrefetcher:
+    def __init__(
+        self,
+        service: TMDbService,
+        max_workers: int = 2,
+        max_per_message: int = 3,
+        refresh_sec: float = 300.0,
+    ):
+        self.service = service
+        self.max_per_message = max_per_message
+        self.refresh_sec = refresh_sec
+        self.started = 0
+        self.failed = 0
+        self._recent: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="tmdb-prefetch")
+        # prefetched responses wait in the cache for the tool call
+        TMDbService.enable_cache()
+
+    @classmethod
+    def from_env(cls, service: TMDbService | None) -> GenrePrefetcher | None:
+        if service is None or os.getenv("TMDB_PREFETCH", "0") in ("0", "false", "no"):
+            return None
+        return cls(service)
+
+    def watch(self, text: str) -> list[str]:
+        """Start fetches for the genres in `text` that were not fetched lately."""
+        now = time.monotonic()
+        started = []
+        with self._lock:
+            for genre in genres_in(text)[: self.max_per_message]:
+                if now - self._recent.get(genre, -self.refresh_sec) < self.refresh_sec:
+                    continue
+                self._recent[genre] = now
+                self.started += 1
+                self._pool.submit(self._fetch, genre)
+                started.append(genre)
+        return started
+
+    def watcher(self) -> ToolCallWatcher:
+        return ToolCallWatcher(self)
+
+    def _fetch(self, genre: str) -> None:
+        try:
+            self.service.prefetch_top_movies_by_genre(genre)
+        except Exception:  # speculative; the tool call will fetch and report
+            with self._lock:
+                self.failed += 1
+                self._recent.pop(genre, None)
+
+    def summary(self) -> dict:
+        stats = dict(TMDbService.cache_stats)
+        # tool lookups that needed TMDb: fetched by the tool itself, or by a prefetch
+        needed = stats["misses"] + stats["prefetch_hits"]
+        stats["prefetch_hit_rate"] = stats["prefetch_hits"] / needed if needed else 0.0
+        stats["prefetches_unused"] = stats["prefetches"] - stats["prefetch_hits"]
+        stats["prefetches_started"] = self.started
+        stats["prefetches_failed"] = self.failed
+        return stats
+
+    def format_summary(self) -> str:
+        s = self.summary()
+        needed = s["misses"] + s["prefetch_hits"]
+        return (
+            f"tmdb prefetch: {s['prefetches_started']} genres, "
+            f"{s['prefetch_hits']}/{needed} TMDb lookups done ahead "
+            f"({s['prefetch_hit_rate']:.0%}), {s['prefetches_unused']} unused, "
+            f"{s['saved_ms']:.0f} ms saved"
+        )
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ToolCallWatcher:
+    """Watches one streamed turn's tool call arguments as they arrive."""
+
+    def __init__(self, prefetcher: GenrePrefetcher):
+        self.prefetcher = prefetcher
+        self._arguments: dict = {}
+
+    def feed(self, chunks) -> None:
+        for chunk in chunks or ():
+            for item in getattr(chunk, "items", ()):
+                if not isinstance(item, FunctionCallContent):
+                    continue
+                arguments = item.arguments
+                if not isinstance(arguments, str):
+                    arguments = str(arguments or "")
+                key = item.index if item.index is not None else item.id
+                text = self._arguments.get(key, "") + arguments
+                self._arguments[key] = text
+                self.prefetcher.watch(text)
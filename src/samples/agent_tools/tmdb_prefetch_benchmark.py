@@ -0,0 +1,174 @@
+"""
+Turn latency with and without the TMDb genre prefetcher.
+
+A fake TMDb API (fixed latency per request) and the fake LLM stand in for the
+real services. Each turn asks for the top films of another genre; the fake
+model answers with a get_top_movies_by_genre tool call after --ttft-ms, so
+without prefetching the genre list and Discover requests start only then.
+With the prefetcher they start as soon as the user's message arrives.
+
+  python -m src.samples.agent_tools.tmdb_prefetch_benchmark --tmdb-ms 150 --ttft-ms 300
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.samples.fake_llm.benchmark import percentile
+from src.samples.fake_llm.server import BackgroundServer, FakeConfig
+
+_GENRES = [
+    "Action",
+    "Adventure",
+    "Animation",
+    "Comedy",
+    "Crime",
+    "Documentary",
+    "Drama",
+    "Family",
+    "Fantasy",
+    "History",
+    "Horror",
+    "Mystery",
+    "Romance",
+    "Thriller",
+    "War",
+    "Western",
+]
+
+
+class FakeTMDb:
+    """Just enough of api.themoviedb.org/3 for the genre tools."""
+
+    def __init__(self, latency_ms: float):
+        latency = latency_ms / 1e3
+        self.requests = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.requests += 1
+                time.sleep(latency)
+                url = urlparse(self.path)
+                if url.path.endswith("/genre/movie/list"):
+                    body = {
+                        "genres": [
+                            {"id": i + 1, "name": name}
+                            for i, name in enumerate(_GENRES)
+                        ]
+                    }
+                elif url.path.endswith("/discover/movie"):
+                    genre = parse_qs(url.query).get("with_genres", ["0"])[0]
+                    body = {
+                        "results": [
+                            {
+                                "id": int(genre) * 100 + n,
+                                "title": f"Film {genre}-{n}",
+                                "release_date": "1999-01-01",
+                                "vote_average": 8.0 - n / 10,
+                                "vote_count": 1000,
+                                "overview": "",
+                                "original_language": "en",
+                            }
+                            for n in range(10)
+                        ]
+                    }
+                else:
+                    self.send_error(404)
+                    return
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/3"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+async def run(kernel, function, prefetcher, genres) -> list[float]:
+    from semantic_kernel.contents import ChatHistory
+    from semantic_kernel.functions import KernelArguments
+
+    latencies = []
+    for genre in genres:
+        user_input = f"Show me the top {genre} films"
+        started = time.perf_counter()
+        watcher = None
+        if prefetcher:
+            prefetcher.watch(user_input)
+            watcher = prefetcher.watcher()
+        arguments = KernelArguments(user_input=user_input, chat_history=ChatHistory())
+        async for chunks in kernel.invoke_stream(function, arguments):
+            if watcher:
+                watcher.feed(chunks)
+        latencies.append((time.perf_counter() - started) * 1e3)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tmdb-ms", type=float, default=150.0)
+    parser.add_argument("--ttft-ms", type=float, default=300.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=400.0)
+    args = parser.parse_args()
+
+    tmdb = FakeTMDb(args.tmdb_ms)
+    llm = BackgroundServer(
+        FakeConfig(ttft_ms=args.ttft_ms, tokens_per_sec=args.tokens_per_sec)
+    ).start()
+    os.environ["LLM_BASE_URL"] = f"{llm.base_url}/v1"
+    os.environ["TMDB_BASE_URL"] = tmdb.base_url
+    os.environ["TMDB_BEARER_TOKEN"] = "fake"
+    os.environ.pop("CASSETTE_MODE", None)
+
+    from src.samples.agent_tools.plugins.tmdb import TMDbService
+    from src.samples.agent_tools.tmdb_prefetch import GenrePrefetcher
+    from src.samples.websocket.movie_chat_server import build_kernel
+
+    TMDbService._BASE_URL = tmdb.base_url  # in case it was imported already
+    kernel, function = build_kernel()
+
+    async def compare() -> None:
+        # one event loop for both modes: the shared LLM client is bound to it
+        print(
+            f"{'mode':<10}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}"
+            f"{'tmdb reqs':>11}   prefetch"
+        )
+        for mode in ("off", "prefetch"):
+            TMDbService.clear_cache()
+            tmdb.requests = 0
+            prefetcher = GenrePrefetcher(TMDbService()) if mode == "prefetch" else None
+            latencies = await run(kernel, function, prefetcher, _GENRES)
+            print(
+                f"{mode:<10}{percentile(latencies, 50):9.0f}"
+                f"{percentile(latencies, 95):9.0f}"
+                f"{sum(latencies) / len(latencies):9.0f}{tmdb.requests:11d}   "
+                + (prefetcher.format_summary() if prefetcher else "-")
+            )
+            if prefetcher:
+                prefetcher.close()
+
+    try:
+        asyncio.run(compare())
+    finally:
+        llm.stop()
+        tmdb.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+"""
+Tolerant parsing of tool call arguments from local models.
+
+Small models get the tool and the values right far more often than the JSON:
+they wrap it in code fences, use Python quotes and True/None, leave trailing
+commas, drop quotes around keys, or stop before the closing brace. json.loads
+rejects all of those, the tool is called with no arguments, and the model
+needs another round trip to try again. `parse_arguments` repairs the text in
+one pass and then fits it to the tool's JSON schema: property names are
+matched case-insensitively, "12.5" becomes 12.5 for a number, a lone value
+fills a tool's only required property, and `{"name": ..., "arguments": {...}}`
+echoes are unwrapped.
+
+  parsed = parse_arguments(call.function.arguments, schema)
+  if parsed.ok:
+      result = tool(**parsed.arguments)
+  else:
+      result = {"error": parsed.error}          # tells the model what to fix
+
+Streamed tool calls arrive as argument fragments; `IncrementalArguments` runs
+the same repair as they come in, so `partial()` has the arguments seen so far
+at any point and `close()` costs no second pass.
+
+  args = IncrementalArguments(schema)
+  for fragment in fragments:
+      args.feed(fragment)
+  parsed = args.close()
+"""
+
+from __future__ import annotations
+
+import difflib
+import json
+import re
+from dataclasses import dataclass, field
+
+_NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_FENCE_RE = re.compile(r"^\s*```[\w-]*\s*|\s*```\s*$")
+_LITERALS = {
+    "true": "true",
+    "True": "true",
+    "false": "false",
+    "False": "false",
+    "null": "null",
+    "None": "null",
+    "undefined": "null",
+    "NaN": "null",
+    "nan": "null",
+}
+_ESCAPES = set('"\\/bfnrtu')
+_CLOSERS = {"{": "}", "[": "]"}
+# continue an unquoted value (not a key): http://example.com/a?b=1&c=2
+_VALUE_CHARS = set(":/?=&#%~@")
+_WRAPPER_KEYS = ("arguments", "parameters", "args", "input")
+_BOOLEANS = {
+    "true": True,
+    "yes": True,
+    "1": True,
+    "false": False,
+    "no": False,
+    "0": False,
+}
+
+
+@dataclass
+class ParsedArguments:
+    arguments: dict
+    repairs: list[str] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def repaired(self) -> bool:
+        return bool(self.repairs)
+
+
+class _Repairer:
+    """
+    Character-level rewriter from loose JSON-ish text to strict JSON. Keeps its
+    state between `feed` calls; `text()` closes whatever is still open.
+    """
+
+    def __init__(self):
+        self.out: list[str] = []
+        self.prefix: list[str] = []  # text before the first "{"
+        self.stack: list[list[str]] = []  # [opener, state]
+        self.started = False
+        self.done = False
+        self.in_string = False
+        self.quote = '"'
+        self.escape = False
+        self.token: list[str] = []
+        self.repairs: set[str] = set()
+        self.closing_repairs: set[str] = set()  # added by the last text()
+
+    def feed(self, text: str) -> None:
+        char = self._char
+        for ch in text:
+            char(ch)
+
+    def text(self) -> str:
+        """Strict JSON for everything fed so far, open strings and brackets closed."""
+        if not self.started:
+            return ""
+        clone = _Repairer.__new__(_Repairer)
+        clone.__dict__.update(self.__dict__)
+        clone.out = self.out.copy()
+        clone.stack = [entry.copy() for entry in self.stack]
+        clone.token = self.token.copy()
+        clone.repairs = set(self.repairs)
+        clone._finish()
+        self.closing_repairs = clone.repairs - self.repairs
+        return "".join(clone.out)
+
+    # ------------------------- State machine -------------------------
+
+    def _char(self, ch: str) -> None:
+        if self.done:
+            if not ch.isspace() and ch != "`":
+                self.repairs.add("trailing text")
+            return
+        if not self.started:
+            if ch == "{":
+                self.started = True
+                if "".join(self.prefix).strip():
+                    self.repairs.add("leading text")
+                self.stack.append(["{", "key"])
+                self.out.append("{")
+            else:
+                self.prefix.append(ch)
+            return
+        if self.in_string:
+            self._string_char(ch)
+            return
+        if self.token:
+            if ch.isalnum() or ch in "._+-$":
+                self.token.append(ch)
+                return
+            if self.stack[-1][1] == "value":
+                if ch in _VALUE_CHARS:
+                    self.token.append(ch)  # an unquoted URL or path
+                    return
+                if ch == " " and self.token[0].isalpha():
+                    self.token.append(ch)  # an unquoted value like New York
+                    return
+            self._flush_token()
+
+        if ch == '"' or ch == "'":
+            if ch == "'":
+                self.repairs.add("single quotes")
+            self._value_start()
+            self.in_string, self.quote = True, ch
+            self.out.append('"')
+        elif ch == "{" or ch == "[":
+            self._value_start()
+            self.stack.append([ch, "key" if ch == "{" else "value"])
+            self.out.append(ch)
+        elif ch == "}" or ch == "]":
+            self._close(ch)
+        elif ch == ",":
+            entry = self.stack[-1]
+            if entry[1] == "after":
+                self.out.append(",")
+                entry[1] = "key" if entry[0] == "{" else "value"
+            else:
+                self.repairs.add("extra comma")
+        elif ch == ":":
+            entry = self.stack[-1]
+            if entry[0] == "{" and entry[1] == "colon":
+                self.out.append(":")
+                entry[1] = "value"
+            elif entry[0] == "{" and entry[1] == "key" and self.out[-1] == ",":
+                self.repairs.add("stray characters")
+        elif ch.isspace():
+            pass
+        elif (
+            ch.isalnum()
+            or ch in "._+-$"
+            or (ch == "/" and self.stack[-1][1] in ("value", "colon"))
+        ):
+            self._value_start()
+            self.token.append(ch)
+        else:
+            self.repairs.add("stray characters")
+
+    def _string_char(self, ch: str) -> None:
+        out = self.out
+        if self.escape:
+            self.escape = False
+            if ch == "'" and self.quote == "'":
+                out.append("'")
+            elif ch in _ESCAPES:
+                out.append("\\" + ch)
+            else:
+                out.append("\\\\" + ch)  # an escape JSON does not have: keep it literal
+        elif ch == "\\":
+            self.escape = True
+        elif ch == self.quote:
+            self.in_string = False
+            out.append('"')
+            self._value_end()
+        elif ch == '"':
+            out.append('\\"')
+        elif ch < " ":
+            self.repairs.add("control characters in string")
+            out.append(json.dumps(ch)[1:-1])
+        else:
+            out.append(ch)
+
+    def _value_start(self) -> None:
+        entry = self.stack[-1]
+        if entry[1] == "after":
+            self.repairs.add("missing comma")
+            self.out.append(",")
+            entry[1] = "key" if entry[0] == "{" else "value"
+        elif entry[1] == "colon":
+            self.repairs.add("missing colon")
+            self.out.append(":")
+            entry[1] = "value"
+
+    def _value_end(self) -> None:
+        entry = self.stack[-1]
+        entry[1] = "colon" if entry[0] == "{" and entry[1] == "key" else "after"
+
+    def _flush_token(self) -> None:
+        text = "".join(self.token).rstrip()
+        self.token.clear()
+        if self.stack[-1][1] == "key":
+            self.repairs.add("unquoted keys")
+            self.out.append(json.dumps(text))
+        elif text in _LITERALS:
+            if text != _LITERALS[text]:
+                self.repairs.add("non-JSON literals")
+            self.out.append(_LITERALS[text])
+        elif _NUMBER_RE.fullmatch(text):
+            self.out.append(text)
+        else:
+            try:
+                number = float(text)
+            except ValueError:
+                number = None
+            if number is not None and number == number and abs(number) != float("inf"):
+                self.repairs.add("non-JSON numbers")
+                self.out.append(repr(number))
+            else:
+                self.repairs.add("unquoted strings")
+                self.out.append(json.dumps(text))
+        self._value_end()
+
+    def _close(self, ch: str) -> None:
+        entry = self.stack[-1]
+        if self.out[-1] == ",":
+            self.repairs.add("trailing comma")
+            self.out.pop()
+        if entry[1] == "colon":  # a key with no value
+            self.out.append(":null")
+        elif entry[0] == "{" and entry[1] == "value" and self.out[-1] == ":":
+            self.out.append("null")
+        closer = _CLOSERS[entry[0]]
+        if ch != closer:
+            self.repairs.add("mismatched brackets")
+        self.stack.pop()
+        self.out.append(closer)
+        if self.stack:
+            self._value_end()
+        else:
+            self.done = True
+
+    def _finish(self) -> None:
+        if self.in_string:
+            self.repairs.add("truncated")
+            self.escape = False
+            self.in_string = False
+            self.out.append('"')
+            self._value_end()
+        if self.token:
+            self._flush_token()
+        if self.stack:
+            self.repairs.add("truncated")
+        while self.stack:
+            self._close(_CLOSERS[self.stack[-1][0]])
+
+
+class IncrementalArguments:
+    """Tool call arguments assembled from streamed fragments (see module doc)."""
+
+    def __init__(self, schema: dict | None = None):
+        self.schema = schema or {}
+        self._repairer = _Repairer()
+        self._raw: list[str] = []
+
+    def feed(self, fragment: str | None) -> None:
+        if fragment:
+            self._raw.append(fragment)
+            self._repairer.feed(fragment)
+
+    def partial(self) -> dict:
+        """Arguments as far as they have arrived, without schema checks."""
+        text = self._repairer.text()
+        try:
+            value = json.loads(text) if text else {}
+        except ValueError:
+            return {}
+        return value if isinstance(value, dict) else {}
+
+    def close(self) -> ParsedArguments:
+        return _finish("".join(self._raw), self._repairer, self.schema)
+
+
+def parse_arguments(
+    text: str | dict | None, schema: dict | None = None
+) -> ParsedArguments:
+    """Parse and schema-fit one tool call's arguments (see module doc)."""
+    schema = schema or {}
+    if isinstance(text, dict):
+        return _fit(dict(text), [], schema)
+    if not text or not text.strip():
+        return _fit({}, [], schema)
+    try:
+        value = json.loads(text)
+    except ValueError:
+        pass
+    else:
+        if isinstance(value, dict):
+            return _fit(value, [], schema)
+    repairer = _Repairer()
+    repairer.feed(text)
+    return _finish(text, repairer, schema)
+
+
+# ------------------------- Internals -------------------------
+
+
+def _finish(raw: str, repairer: _Repairer, schema: dict) -> ParsedArguments:
+    if not repairer.started:
+        return _bare_value(raw, schema)
+    if not repairer.repairs and not repairer.stack and not repairer.in_string:
+        text = "".join(repairer.out)
+        repairs = []
+    else:
+        text = repairer.text()
+        repairs = sorted(repairer.repairs | repairer.closing_repairs)
+    try:
+        value = json.loads(text)
+    except ValueError as e:
+        return ParsedArguments({}, repairs, error=f"unreadable arguments: {e}")
+    return _fit(value, repairs, schema)
+
+
+def _bare_value(raw: str, schema: dict) -> ParsedArguments:
+    """No object at all: a lone value fills the only required property."""
+    text = _FENCE_RE.sub("", raw).strip()
+    if not text:
+        return _fit({}, [], schema)
+    required = schema.get("required") or []
+    properties = schema.get("properties") or {}
+    if len(required) == 1:
+        if len(text) > 1 and text[0] == text[-1] and text[0] in "\"'":
+            text = text[1:-1]
+        return _fit({required[0]: text}, ["bare value"], schema)
+    names = ", ".join(required or properties)
+    return ParsedArguments(
+        {}, [], list(required), error=f"expected a JSON object with {names}"
+    )
+
+
+def _fit(arguments: dict, repairs: list[str], schema: dict) -> ParsedArguments:
+    properties: dict = schema.get("properties") or {}
+    required: list[str] = schema.get("required") or []
+    if not properties:
+        return ParsedArguments(arguments, repairs)
+    if all(
+        name in properties and _matches(value, properties[name].get("type"))
+        for name, value in arguments.items()
+    ) and all(name in arguments for name in required):
+        return ParsedArguments(arguments, repairs)  # nothing to fit
+
+    # {"name": "add", "arguments": {...}} and similar echoes of the call itself
+    if not any(key in properties for key in arguments):
+        for key in _WRAPPER_KEYS:
+            inner = arguments.get(key)
+            if isinstance(inner, str):
+                inner = parse_arguments(inner).arguments
+            if isinstance(inner, dict) and inner:
+                arguments = inner
+                repairs = repairs + ["unwrapped"]
+                break
+
+    fitted, unknown = {}, []
+    folded = {_fold(name): name for name in properties}
+    for key, value in arguments.items():
+        name = key if key in properties else folded.get(_fold(key))
+        if name is None:
+            close = difflib.get_close_matches(key, list(properties), n=1, cutoff=0.8)
+            name = close[0] if close else None
+        if name is None:
+            unknown.append((key, value))
+            continue
+        if name != key:
+            repairs = repairs + [f"renamed {key}"]
+        if name in fitted:
+            continue
+        coerced = _coerce(value, properties.get(name) or {})
+        if coerced is not value and coerced != value:
+            repairs = repairs + [f"coerced {name}"]
+        fitted[name] = coerced
+
+    # {"x": 1, "y": 2} for add(a, b): unknown names fill the missing ones in
+    # order, if there are exactly as many and the values fit
+    missing = [name for name in required if name not in fitted]
+    if unknown and len(unknown) == len(missing):
+        guesses = [
+            _coerce(value, properties[name])
+            for (_, value), name in zip(unknown, missing)
+        ]
+        if all(
+            _matches(value, properties[name].get("type", "string"))
+            for value, name in zip(guesses, missing)
+        ):
+            for (key, _), name, value in zip(unknown, missing, guesses):
+                fitted[name] = value
+                repairs = repairs + [f"mapped {key} to {name}"]
+            unknown = []
+    for key, value in unknown:
+        if schema.get("additionalProperties") is False:
+            repairs = repairs + [f"dropped {key}"]
+        else:
+            fitted[key] = value
+
+    for name in required:
+        if name not in fitted and "default" in properties.get(name, {}):
+            fitted[name] = properties[name]["default"]
+    missing = [name for name in required if name not in fitted]
+    error = None
+    if missing:
+        error = f"missing required argument{'s' if len(missing) > 1 else ''}: " + (
+            ", ".join(missing)
+        )
+    else:
+        for name, value in fitted.items():
+            expected = (properties.get(name) or {}).get("type")
+            if expected and not _matches(value, expected):
+                error = f"{name} should be {expected}, got {json.dumps(value)}"
+                break
+    return ParsedArguments(fitted, repairs, missing, error)
+
+
+def _fold(name: str) -> str:
+    return re.sub(r"[\W_]+", "", name).lower()
+
+
+def _coerce(value, spec: dict):
+    kind = spec.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), None)
+    if kind in ("number", "integer") and isinstance(value, str):
+        try:
+            number = float(value.strip().replace(",", ""))
+        except ValueError:
+            return value
+        if kind == "integer" and number.is_integer():
+            return int(number)
+        return number
+    if kind == "integer" and isinstance(value, float) and value.is_integer():
+        return int(value)
+    if (
+        kind == "string"
+        and isinstance(value, (int, float))
+        and not isinstance(value, bool)
+    ):
+        return str(value)
+    if kind == "boolean" and isinstance(value, (str, int)):
+        return _BOOLEANS.get(str(value).strip().lower(), value)
+    if kind == "array" and not isinstance(value, list):
+        if isinstance(value, str) and value.strip().startswith("["):
+            try:
+                return json.loads(value)
+            except ValueError:
+                pass
+        items = spec.get("items") or {}
+        return [_coerce(value, items)]
+    if kind == "object" and isinstance(value, str):
+        return parse_arguments(value, spec).arguments or value
+    return value
+
+
+def _matches(value, kind) -> bool:
+    if kind is None:
+        return True
+    if isinstance(kind, list):
+        return any(_matches(value, k) for k in kind)
+    if kind == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if kind == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if kind == "string":
+        return isinstance(value, str)
+    if kind == "boolean":
+        return isinstance(value, bool)
+    if kind == "array":
+        return isinstance(value, list)
+    if kind == "object":
+        return isinstance(value, dict)
+    if kind == "null":
+        return value is None
+    return True
@@ -0,0 +1,122 @@
+"""
+How many tool turns does the tolerant argument parser save?
+
+Runs every case in tool_args_corpus.jsonl (argument strings of the kinds local
+models produce, with the arguments that were meant) through
+  json     the old call_tools code: json.loads, or {} when that fails
+  repair   tool_args.parse_arguments against the tool's schema
+  stream   IncrementalArguments fed the same text in random fragments
+A turn fails when the tool is not called with the intended arguments: it
+raises, or runs on wrong values ("12.5" + "7.25" is "12.57.25"). Each failure
+costs another LLM round trip for the model to try again. Cases with no
+intended arguments cannot be saved; for those the parser's error message is
+shown instead of the TypeError the model used to get.
+
+  python -m src.samples.agent_tools.tool_args_benchmark
+"""
+
+import json
+import random
+import time
+from collections import Counter
+from pathlib import Path
+
+from src.samples.agent_tools.call_tools import SCHEMAS, TOOL_IMPLS
+from src.samples.agent_tools.tool_args import IncrementalArguments, parse_arguments
+
+CORPUS = Path(__file__).with_name("tool_args_corpus.jsonl")
+
+
+def old_parse(text: str) -> dict:
+    try:
+        return json.loads(text or "{}")
+    except json.JSONDecodeError:
+        return {}
+
+
+def succeeds(tool: str, arguments, expected) -> bool:
+    if expected is None or not isinstance(arguments, dict):
+        return False
+    try:
+        TOOL_IMPLS[tool](**arguments)
+    except Exception:
+        return False
+    return arguments == expected
+
+
+def fragments(text: str, rng: random.Random) -> list[str]:
+    parts, i = [], 0
+    while i < len(text):
+        step = rng.randint(1, 6)
+        parts.append(text[i : i + step])
+        i += step
+    return parts
+
+
+def per_call_us(fn, cases, rounds: int = 200) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for case in cases:
+            fn(case)
+    return (time.perf_counter() - started) / (rounds * len(cases)) * 1e6
+
+
+def main() -> None:
+    cases = [json.loads(line) for line in CORPUS.read_text().splitlines() if line]
+    rng = random.Random(5)
+    old_ok = new_ok = stream_agrees = 0
+    saved_by_form: Counter = Counter()
+    unsaved = []
+    for case in cases:
+        tool, raw, expected = case["tool"], case["arguments"], case["expected"]
+        schema = SCHEMAS[tool]
+        old = succeeds(tool, old_parse(raw), expected)
+        parsed = parse_arguments(raw, schema)
+        new = parsed.ok and succeeds(tool, parsed.arguments, expected)
+
+        incremental = IncrementalArguments(schema)
+        for part in fragments(raw, rng):
+            incremental.feed(part)
+            incremental.partial()  # what a UI or prefetcher would look at
+        streamed = incremental.close()
+        stream_agrees += streamed.arguments == parsed.arguments and (
+            streamed.error == parsed.error
+        )
+
+        old_ok += old
+        new_ok += new
+        if new and not old:
+            saved_by_form[case["form"]] += 1
+        if not new:
+            unsaved.append((case["form"], raw, parsed.error))
+
+    total = len(cases)
+    recoverable = sum(case["expected"] is not None for case in cases)
+    print(f"{total} tool calls, {recoverable} with recoverable intent")
+    print(f"  json.loads or {{}}   {old_ok:3d} turns succeed, {total - old_ok} retried")
+    print(f"  parse_arguments    {new_ok:3d} turns succeed, {total - new_ok} retried")
+    print(f"  saved round trips  {new_ok - old_ok}")
+    print(f"  streamed fragments agree with one-shot parse: {stream_agrees}/{total}")
+    print("saved, by form: " + ", ".join(f"{f} {n}" for f, n in saved_by_form.items()))
+    print("still retried (what the model is told):")
+    for form, raw, error in unsaved:
+        print(f"  {form:<17} {raw!r:<34} {error}")
+
+    valid = [c for c in cases if c["form"] == "valid"]
+    broken = [c for c in cases if c["form"] != "valid" and c["expected"]]
+
+    def old(case):
+        return old_parse(case["arguments"])
+
+    def new(case):
+        return parse_arguments(case["arguments"], SCHEMAS[case["tool"]])
+
+    print(
+        f"cost per call: json.loads {per_call_us(old, valid):.1f} us, "
+        f"parse_arguments on valid JSON {per_call_us(new, valid):.1f} us, "
+        f"on broken JSON {per_call_us(new, broken):.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,8 @@
-from autogen import config_list_from_json, UserProxyAgent, AssistantAgent, Cache
+from autogen import config_list_from_json, UserProxyAgent, AssistantAgent
 
-
-def review_code(receiver, messages, sender, config):
-    return f"""
-    Review following code and give critics.
-    
-    {receiver.chat_messages_for_summary(sender)[-1]['content']}
-"""
+from src.samples.autogen_practice.executor_pool import PooledCodeExecutor, shared_pool
+from src.samples.autogen_practice.llm_cache import shared_cache
+from src.samples.autogen_practice.nested_review import IncrementalReviewer
 
 
 if __name__ == "__main__":
@@ -17,8 +13,8 @@ if __name__ == "__main__":
     user_proxy_agent = UserProxyAgent(
         "user",
         code_execution_config={
-            "work_dir": "working",
-            "use_docker": False,
+            # own temp dir + CPU/memory/time limits per snippet, warm worker pool
+            "executor": PooledCodeExecutor(shared_pool()),
             "last_n_message": 1,
         },
         human_input_mode="ALWAYS",
@@ -51,26 +47,39 @@ if __name__ == "__main__":
         """,
     )
 
+    # content-addressed, size-bounded and shared with every other AutoGen run
+    cache = shared_cache()
+
+    # diff against the last reviewed version; unchanged code is never re-reviewed
+    reviewer = IncrementalReviewer()
+
     user_proxy_agent.register_nested_chats(
         [
             {
                 "recipient": critic,
-                "message": review_code,
+                "message": reviewer.message,
                 "summary_method": "last_msg",
                 "max_turns": 1,
+                # the Reviewer keeps the code it saw, so diff rounds have a base
+                "clear_history": False,
+                "cache": cache,
             }
         ],
         trigger=engineer,
+        reply_func_from_nested_chats=reviewer.reply,
     )
 
     task = """
     create simple python script print hello
     """
 
-    with Cache.disk(cache_seed=42) as cache:
-        response = user_proxy_agent.initiate_chat(
-            recipient=engineer,
-            message=task,
-            max_turns=2,
-            summary_method="last_msg",
-        )
+    response = user_proxy_agent.initiate_chat(
+        recipient=engineer,
+        message=task,
+        max_turns=2,
+        summary_method="last_msg",
+        cache=cache,
+    )
+    print(f"LLM cache: {cache.stats()}")
+    print(f"Reviews: {reviewer.stats}")
+    print(f"Code execution: {shared_pool().summary()}")
@@ -1,5 +1,8 @@
 from autogen import config_list_from_json, ConversableAgent, UserProxyAgent
 
+from src.samples.autogen_practice.executor_pool import PooledCodeExecutor, shared_pool
+from src.samples.autogen_practice.llm_cache import shared_cache
+
 if __name__ == "__main__":
     config_list = config_list_from_json(
         env_or_file="./resources/autogen/config_list.json"
@@ -9,8 +12,8 @@ if __name__ == "__main__":
     user_proxy_agent = UserProxyAgent(
         "user",
         code_execution_config={
-            "work_dir": "working",
-            "use_docker": False,
+            # own temp dir + CPU/memory/time limits per snippet, warm worker pool
+            "executor": PooledCodeExecutor(shared_pool()),
         },
         human_input_mode="ALWAYS",
         is_termination_msg=lambda x: x.get("content", "")
@@ -18,4 +21,6 @@ if __name__ == "__main__":
         .endswith("TERMINATE"),
     )
 
-    user_proxy_agent.initiate_chat(assistant, message="What is capital of France?")
+    user_proxy_agent.initiate_chat(
+        assistant, message="What is capital of France?", cache=shared_cache()
+    )
@@ -0,0 +1,205 @@
+"""
+Local, pooled code execution for AutoGen's UserProxyAgent.
+
+`UserProxyAgent(code_execution_config={"work_dir": "working", "use_docker": False})`
+runs every snippet serially in one shared directory, so concurrent conversations
+overwrite each other's files. `ExecutorPool` keeps N warm worker processes
+(`executor_worker.py`); every snippet runs in a child forked from one of them,
+in its own temporary directory, with CPU / memory / wall-clock limits.
+Conversations running in different threads use different workers concurrently.
+
+This isolates runs from each other, it is not a security sandbox: snippets still
+run as the current user with network access.
+
+  user_proxy = UserProxyAgent(
+      "user", code_execution_config={"executor": PooledCodeExecutor(shared_pool())}
+  )
+
+Configuration (all optional):
+  EXECUTOR_POOL_SIZE     number of warm workers (default: CPU count)
+  EXECUTOR_CPU_SEC       CPU-seconds per snippet (default 10)
+  EXECUTOR_MEM_MB        address-space limit per snippet (default 1024)
+  EXECUTOR_TIMEOUT_SEC   wall-clock limit per snippet (default 30)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from autogen.coding import CodeBlock, CodeResult, MarkdownCodeExtractor
+
+_WORKER = Path(__file__).with_name("executor_worker.py")
+_LANGUAGES = {
+    "python": "python",
+    "py": "python",
+    "sh": "sh",
+    "bash": "bash",
+    "shell": "bash",
+}
+
+
+@dataclass
+class ExecutionResult:
+    exit_code: int
+    output: str
+    wall_sec: float
+    peak_rss_kb: int
+    timed_out: bool
+
+
+class _Worker:
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-u", str(_WORKER)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, job: dict) -> dict:
+        self.proc.stdin.write(json.dumps(job) + "\n")
+        self.proc.stdin.flush()
+        line = self.proc.stdout.readline()
+        if not line:
+            raise RuntimeError("executor worker exited")
+        return json.loads(line)
+
+    def close(self) -> None:
+        if self.alive():
+            self.proc.stdin.close()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+class ExecutorPool:
+    def __init__(
+        self,
+        size: int | None = None,
+        cpu_sec: int | None = None,
+        mem_mb: int | None = None,
+        timeout_sec: float | None = None,
+    ):
+        self.size = size or int(os.getenv("EXECUTOR_POOL_SIZE", os.cpu_count() or 2))
+        self.cpu_sec = cpu_sec or int(os.getenv("EXECUTOR_CPU_SEC", "10"))
+        self.mem_mb = mem_mb or int(os.getenv("EXECUTOR_MEM_MB", "1024"))
+        self.timeout_sec = timeout_sec or float(os.getenv("EXECUTOR_TIMEOUT_SEC", "30"))
+        self.history: list[ExecutionResult] = []
+        self._history_lock = threading.Lock()
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._workers = [_Worker() for _ in range(self.size)]  # started warm, up front
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._submitter = ThreadPoolExecutor(max_workers=self.size)
+
+    def run(self, code: str, lang: str = "python") -> ExecutionResult:
+        """Run one snippet on the next free worker (blocks while all are busy)."""
+        job = {
+            "code": code,
+            "lang": lang,
+            "cpu_sec": self.cpu_sec,
+            "mem_mb": self.mem_mb,
+            "timeout": self.timeout_sec,
+        }
+        worker = self._idle.get()
+        try:
+            if not worker.alive():
+                worker = self._replace(worker)
+            result = ExecutionResult(**worker.run(job))
+        except (RuntimeError, OSError, ValueError) as e:
+            worker = self._replace(worker)
+            result = ExecutionResult(1, f"executor error: {e}", 0.0, 0, False)
+        finally:
+            self._idle.put(worker)
+
+        with self._history_lock:
+            self.history.append(result)
+        return result
+
+    def submit(self, code: str, lang: str = "python") -> Future:
+        return self._submitter.submit(self.run, code, lang)
+
+    def summary(self) -> dict:
+        with self._history_lock:
+            runs = list(self.history)
+        if not runs:
+            return {"runs": 0}
+        walls = sorted(r.wall_sec for r in runs)
+        return {
+            "runs": len(runs),
+            "failed": sum(r.exit_code != 0 for r in runs),
+            "timed_out": sum(r.timed_out for r in runs),
+            "wall_p50_sec": walls[len(walls) // 2],
+            "wall_max_sec": walls[-1],
+            "peak_rss_max_mb": max(r.peak_rss_kb for r in runs) / 1024,
+        }
+
+    def close(self) -> None:
+        self._submitter.shutdown(wait=True)
+        for worker in self._workers:
+            worker.close()
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.close()
+        fresh = _Worker()
+        self._workers[self._workers.index(worker)] = fresh
+        return fresh
+
+
+class PooledCodeExecutor:
+    """AutoGen CodeExecutor that runs the code blocks of a message on an ExecutorPool."""
+
+    def __init__(self, pool: ExecutorPool | None = None):
+        self.pool = pool or shared_pool()
+        self._extractor = MarkdownCodeExtractor()
+
+    @property
+    def code_extractor(self) -> MarkdownCodeExtractor:
+        return self._extractor
+
+    def execute_code_blocks(self, code_blocks: list[CodeBlock]) -> CodeResult:
+        # Blocks of one message run in order (later ones may rely on earlier ones);
+        # concurrency comes from several conversations sharing the pool.
+        outputs = []
+        exit_code = 0
+        for block in code_blocks:
+            lang = _LANGUAGES.get((block.language or "python").lower())
+            if lang is None:
+                outputs.append(f"unknown language {block.language}")
+                exit_code = 1
+                break
+            result = self.pool.run(block.code, lang)
+            outputs.append(result.output)
+            exit_code = result.exit_code
+            if exit_code != 0:
+                break
+        return CodeResult(exit_code=exit_code, output="".join(outputs))
+
+    def restart(self) -> None:
+        # Every snippet already starts from a fresh fork; nothing to reset.
+        pass
+
+
+_shared: ExecutorPool | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool() -> ExecutorPool:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ExecutorPool()
+        return _shared
@@ -0,0 +1,130 @@
+"""
+Warm worker process for `executor_pool.ExecutorPool` (not meant to be run by hand).
+
+Reads one JSON job per line from stdin and answers with one JSON line on stdout.
+Each job is run in a child forked from this already-started interpreter, so
+running a snippet does not pay for a Python startup. The child gets its own
+temporary working directory and CPU / address-space limits; the worker kills it
+after the wall-clock timeout and reports its exit code, output and peak RSS.
+"""
+
+import json
+import os
+import resource
+import runpy
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+_SHELLS = {"sh": "sh", "bash": "bash", "shell": "bash"}
+
+
+def _run_child(job: dict, workdir: str, out_fd: int) -> None:
+    """Runs in the forked child; never returns."""
+    try:
+        os.setsid()  # own process group, so a timeout kills grandchildren too
+        if job.get("cpu_sec"):
+            resource.setrlimit(resource.RLIMIT_CPU, (job["cpu_sec"], job["cpu_sec"]))
+        if job.get("mem_mb"):
+            limit = job["mem_mb"] * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+        os.chdir(workdir)
+        null = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null, 0)
+        os.dup2(out_fd, 1)
+        os.dup2(out_fd, 2)
+
+        lang = job.get("lang", "python")
+        if lang in _SHELLS:
+            with open("script.sh", "w") as f:
+                f.write(job["code"])
+            os.execvp(_SHELLS[lang], [_SHELLS[lang], "script.sh"])
+
+        with open("main.py", "w") as f:
+            f.write(job["code"])
+        sys.argv = ["main.py"]
+        sys.path.insert(0, workdir)
+        code = 0
+        try:
+            runpy.run_path("main.py", run_name="__main__")
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+    except BaseException:
+        traceback.print_exc()
+        os._exit(1)
+
+
+def run_job(job: dict) -> dict:
+    workdir = tempfile.mkdtemp(prefix="exec-")
+    out_path = os.path.join(workdir, ".output")
+    out_fd = os.open(out_path, os.O_WRONLY | os.O_CREAT, 0o600)
+    started = time.perf_counter()
+
+    pid = os.fork()
+    if pid == 0:
+        _run_child(job, workdir, out_fd)
+    os.close(out_fd)
+
+    timed_out = threading.Event()
+
+    def _kill():
+        timed_out.set()
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    timer = threading.Timer(job.get("timeout", 30), _kill)
+    timer.start()
+    _, status, rusage = os.wait4(pid, 0)
+    timer.cancel()
+    wall = time.perf_counter() - started
+
+    with open(out_path, errors="replace") as f:
+        output = f.read()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    exit_code = os.waitstatus_to_exitcode(status)
+    if timed_out.is_set():
+        output += f"\nTimeout: killed after {job.get('timeout', 30)}s"
+        exit_code = 124
+    peak_kb = rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+    return {
+        "exit_code": exit_code,
+        "output": output,
+        "wall_sec": wall,
+        "peak_rss_kb": peak_kb,
+        "timed_out": timed_out.is_set(),
+    }
+
+
+def main() -> None:
+    for line in sys.stdin:
+        job = json.loads(line)
+        try:
+            result = run_job(job)
+        except Exception as e:  # keep the worker alive for the next job
+            result = {
+                "exit_code": 1,
+                "output": f"executor error: {e}",
+                "wall_sec": 0.0,
+                "peak_rss_kb": 0,
+                "timed_out": False,
+            }
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
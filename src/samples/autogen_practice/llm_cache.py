@@ -0,0 +1,228 @@
+"""
+Content-addressed LLM response cache shared by every AutoGen agent in this repo.
+
+Drop-in for `Cache.disk(cache_seed=...)`: pass it as `cache=` to `initiate_chat`
+(and to nested chats). Differences from the built-in disk cache:
+  - the key is a hash of the *normalized* request, not of a fixed seed + raw
+    request, so harmless whitespace changes in system messages still hit
+  - one SQLite file in WAL mode, safe for several processes at once
+  - size-bounded: least recently used entries are evicted above `max_bytes`
+  - hit/miss counters via `stats()`
+
+Configuration (all optional):
+  AUTOGEN_CACHE_PATH    sqlite file (default "./.cache/autogen_llm_cache.sqlite")
+  AUTOGEN_CACHE_MAX_MB  size bound in MB (default 512)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_PATH = "./.cache/autogen_llm_cache.sqlite"
+
+_WS_RE = re.compile(r"\s+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('total_bytes', 0), ('hits', 0), ('misses', 0);
+"""
+
+
+def normalize_request(key: str) -> str:
+    """
+    AutoGen passes the request as a JSON string. Collapse whitespace in system
+    messages and trim the other messages, then re-serialize canonically.
+    Code in user/assistant messages keeps its inner whitespace (indentation matters).
+    """
+    try:
+        request = json.loads(key)
+    except (TypeError, ValueError):
+        return key
+    if not isinstance(request, dict):
+        return key
+
+    for message in request.get("messages") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, str):
+            continue
+        if message.get("role") == "system":
+            message["content"] = _WS_RE.sub(" ", content).strip()
+        else:
+            message["content"] = "\n".join(
+                line.rstrip() for line in content.strip().splitlines()
+            )
+    return json.dumps(
+        request, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+
+
+class SQLiteLLMCache:
+    """Implements AutoGen's AbstractCache protocol (get/set/close + context manager)."""
+
+    def __init__(self, path: str | None = None, max_bytes: int | None = None):
+        self.path = Path(path or os.getenv("AUTOGEN_CACHE_PATH", DEFAULT_PATH))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = (
+            max_bytes or int(os.getenv("AUTOGEN_CACHE_MAX_MB", "512")) * 1024 * 1024
+        )
+        self.hits = 0
+        self.misses = 0
+        self._flushed = (0, 0)
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    # ------------------------- AbstractCache -------------------------
+
+    def get(self, key: str, default=None):
+        digest = self._digest(key)
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value FROM entries WHERE key = ?", (digest,)
+        ).fetchone()
+        if row is None:
+            self._count(hit=False)
+            return default
+        with conn:
+            conn.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), digest)
+            )
+        self._count(hit=True)
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value) -> None:
+        digest = self._digest(key)
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            old = conn.execute(
+                "SELECT size FROM entries WHERE key = ?", (digest,)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (digest, blob, len(blob), time.time()),
+            )
+            conn.execute(
+                "UPDATE meta SET value = value + ? WHERE name = 'total_bytes'",
+                (len(blob) - (old[0] if old else 0),),
+            )
+            self._evict(conn)
+
+    def close(self) -> None:
+        # AutoGen closes the cache after every request; only flush counters and
+        # drop this thread's connection, the next call reopens it.
+        self._flush_stats()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # ------------------------- Stats -------------------------
+
+    def stats(self) -> dict:
+        self._flush_stats()
+        conn = self._conn()
+        meta = dict(conn.execute("SELECT name, value FROM meta"))
+        entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "shared_hits": meta["hits"],  # across every process using this file
+            "shared_misses": meta["misses"],
+            "entries": entries,
+            "bytes": meta["total_bytes"],
+        }
+
+    # ------------------------- Internals -------------------------
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.sha256(normalize_request(key).encode("utf-8")).hexdigest()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute(
+            "SELECT value FROM meta WHERE name = 'total_bytes'"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)  # evict in bulk, not one row per insert
+        freed = 0
+        victims = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ):
+            if total - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        conn.execute(
+            "UPDATE meta SET value = value - ? WHERE name = 'total_bytes'", (freed,)
+        )
+
+    def _count(self, hit: bool) -> None:
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _flush_stats(self) -> None:
+        with self._counter_lock:
+            hits, misses = self.hits - self._flushed[0], self.misses - self._flushed[1]
+            self._flushed = (self.hits, self.misses)
+        if hits or misses:
+            with self._conn() as conn:
+                conn.execute(
+                    "UPDATE meta SET value = value + ? WHERE name = 'hits'", (hits,)
+                )
+                conn.execute(
+                    "UPDATE meta SET value = value + ? WHERE name = 'misses'", (misses,)
+                )
+
+
+_shared: SQLiteLLMCache | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> SQLiteLLMCache:
+    """Process-wide cache instance (the sqlite file itself is shared across processes)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SQLiteLLMCache()
+        return _shared
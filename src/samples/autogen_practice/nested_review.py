@@ -0,0 +1,132 @@
+"""
+Incremental code review for AutoGen nested chats.
+
+The nested Reviewer chat used to receive the Engineer's whole last message on
+every trigger. `IncrementalReviewer` instead
+  - sends a unified diff against the last version the Reviewer saw (the full
+    code for the first round, or when the diff would not be smaller),
+    together with the Reviewer's previous review, and
+  - caches reviews by code hash, so code that did not change is never sent
+    to the Reviewer again.
+
+  reviewer = IncrementalReviewer()
+  user_proxy.register_nested_chats(
+      [{"recipient": critic, "message": reviewer.message, "max_turns": 1,
+        "clear_history": False, ...}],
+      trigger=engineer,
+      reply_func_from_nested_chats=reviewer.reply,
+  )
+
+Keep `clear_history` off in the nested chat config: a diff only makes sense to
+a Reviewer that still has the earlier version in its history.
+"""
+
+from __future__ import annotations
+
+import difflib
+import hashlib
+import re
+from dataclasses import dataclass
+
+from autogen import ConversableAgent
+
+_CODE_BLOCK_RE = re.compile(r"```[\w+-]*\n(.*?)```", re.DOTALL)
+
+
+def extract_code(content: str) -> str:
+    """Code blocks of a message joined together; the whole message if it has none."""
+    blocks = _CODE_BLOCK_RE.findall(content or "")
+    return "\n\n".join(b.strip("\n") for b in blocks) if blocks else (content or "")
+
+
+@dataclass
+class ReviewStats:
+    reviews: int = 0
+    cache_hits: int = 0
+    diff_rounds: int = 0
+    chars_sent: int = 0
+    chars_full: int = 0  # what sending the full code every time would have cost
+
+
+class IncrementalReviewer:
+    def __init__(self, max_diff_ratio: float = 0.6, context_lines: int = 3):
+        """
+        Args:
+            max_diff_ratio: send the full code instead when the diff is longer than
+                this fraction of it.
+            context_lines: unchanged lines shown around each change.
+        """
+        self.max_diff_ratio = max_diff_ratio
+        self.context_lines = context_lines
+        self.stats = ReviewStats()
+        self._reviews: dict[str, str] = {}  # code hash -> review
+        # (sender, receiver) -> code the Reviewer saw last, and its review
+        self._last_reviewed: dict[tuple[str, str], tuple[str, str]] = {}
+        # (sender, receiver) -> code sent to a nested chat that has not replied
+        self._pending: dict[tuple[str, str], str] = {}
+
+    @staticmethod
+    def code_hash(code: str) -> str:
+        return hashlib.sha256(code.strip().encode("utf-8")).hexdigest()
+
+    # ------------------------- Nested chat hooks -------------------------
+
+    def message(self, receiver, messages, sender, config) -> str:
+        """Initial message of the nested Reviewer chat."""
+        content = receiver.chat_messages_for_summary(sender)[-1]["content"]
+        code = extract_code(content)
+        key = (sender.name, receiver.name)
+        self._pending[key] = code
+        self.stats.chars_full += len(code)
+
+        if key in self._last_reviewed:
+            previous, review = self._last_reviewed[key]
+            diff = "\n".join(
+                difflib.unified_diff(
+                    previous.splitlines(),
+                    code.splitlines(),
+                    "reviewed",
+                    "current",
+                    n=self.context_lines,
+                    lineterm="",
+                )
+            )
+            if diff and len(diff) <= self.max_diff_ratio * len(code):
+                self.stats.diff_rounds += 1
+                self.stats.chars_sent += len(diff)
+                return f"""
+    You already reviewed an earlier version of this code. Your review was:
+
+    {review}
+
+    Review only the following changes (unified diff against that version)
+    and give critics.
+
+    {diff}
+"""
+
+        self.stats.chars_sent += len(code)
+        return f"""
+    Review following code and give critics.
+
+    {code}
+"""
+
+    def reply(self, chat_queue, recipient, messages=None, sender=None, config=None):
+        """reply_func_from_nested_chats: serve cached reviews, run the nested chat otherwise."""
+        content = recipient.chat_messages_for_summary(sender)[-1]["content"]
+        digest = self.code_hash(extract_code(content))
+        cached = self._reviews.get(digest)
+        if cached is not None:
+            self.stats.cache_hits += 1
+            return True, cached
+
+        final, review = ConversableAgent._summary_from_nested_chats(
+            chat_queue, recipient, messages, sender, config
+        )
+        code = self._pending.pop((sender.name, recipient.name), None)
+        if review and code is not None:
+            self._reviews[digest] = review
+            self._last_reviewed[(sender.name, recipient.name)] = (code, review)
+            self.stats.reviews += 1
+        return final, review
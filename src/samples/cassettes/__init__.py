@@ -0,0 +1,263 @@
+"""
+Record and replay HTTP traffic of the samples, for offline and repeatable runs.
+
+A cassette is a JSON-lines file (gzip-compressed when the name ends in .gz)
+with one recorded exchange per line: the request key, status, a few response
+headers, and the response body as timed chunks, so streamed completions replay
+with their original token timing. No request headers are stored, so bearer
+tokens and API keys never reach the file.
+
+Hooked into the TMDb session (requests) and the shared LLM clients (httpx):
+
+  CASSETTE_MODE=record CASSETTE_PATH=cassettes/movie_chat.jsonl.gz \\
+      python -m src.samples.agent_tools.movie_chat
+  CASSETTE_MODE=replay CASSETTE_PATH=cassettes/movie_chat.jsonl.gz SK_PROFILE=1 \\
+      python -m src.samples.agent_tools.movie_chat
+
+Configuration:
+  CASSETTE_MODE     "record", "replay" or unset (off)
+  CASSETTE_PATH     cassette file (default cassettes/session.jsonl.gz)
+  CASSETTE_TIMING   replay pacing: "original" (default), "fast" (no waits),
+                    or a factor, e.g. "0.5" for twice the recorded speed
+  CASSETTE_STRICT   "1" to match request bodies exactly (see below)
+
+Requests are matched on method, path, query (minus credentials) and a digest
+of the body. Identical requests replay their recordings in order; once those
+are used up the last one repeats. A request whose body differs from every
+recording (tool results with timestamps or random values do that) gets the
+next unplayed recording of the same endpoint, unless CASSETTE_STRICT=1. Only
+then does it raise CassetteMiss; replay never goes to the network.
+"""
+
+from __future__ import annotations
+
+import codecs
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_SECRET_PARAMS = {"api_key", "apikey", "key", "token", "access_token"}
+_KEPT_HEADERS = ("content-type", "retry-after")
+
+
+class CassetteMiss(LookupError):
+    """A replayed request has no recording."""
+
+
+def clean_url(url: str) -> str:
+    """URL with credentials removed and query parameters in a stable order."""
+    parts = urlsplit(url)
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in _SECRET_PARAMS
+    )
+    return urlunsplit(parts._replace(query=urlencode(query), fragment=""))
+
+
+def request_key(method: str, url: str, body: bytes | None) -> str:
+    # scheme and host are left out so a recording made against
+    # localhost:11434 replays under any LLM_BASE_URL
+    parts = urlsplit(clean_url(url))
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(f"{method.upper()} {parts.path}?{parts.query}\n".encode())
+    if body:
+        try:  # key order and whitespace in JSON bodies must not matter
+            body = json.dumps(json.loads(body), sort_keys=True).encode()
+        except ValueError:
+            pass
+        digest.update(body)
+    return digest.hexdigest()
+
+
+def _route(method: str, url: str) -> str:
+    return f"{method.upper()} {urlsplit(url).path}"
+
+
+@dataclass
+class Interaction:
+    key: str
+    method: str
+    url: str
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    # [ms since the request was sent, text] per chunk; the first offset
+    # includes the time to the response headers
+    chunks: list[list] = field(default_factory=list)
+
+    @property
+    def body(self) -> bytes:
+        return "".join(text for _, text in self.chunks).encode()
+
+    @property
+    def elapsed_ms(self) -> float:
+        return self.chunks[-1][0] if self.chunks else 0.0
+
+
+class ChunkRecorder:
+    """Collects timed body chunks of one response while it is being read."""
+
+    def __init__(self, cassette: Cassette, interaction: Interaction, started: float):
+        self.cassette = cassette
+        self.interaction = interaction
+        self.started = started
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._saved = False
+
+    def add(self, chunk: bytes) -> None:
+        text = self._decoder.decode(chunk)
+        if text:
+            offset = round((time.perf_counter() - self.started) * 1e3, 1)
+            self.interaction.chunks.append([offset, text])
+
+    def finish(self) -> None:
+        if self._saved:
+            return
+        self._saved = True
+        tail = self._decoder.decode(b"", final=True)
+        if tail or not self.interaction.chunks:
+            offset = round((time.perf_counter() - self.started) * 1e3, 1)
+            self.interaction.chunks.append([offset, tail])
+        self.cassette.save(self.interaction)
+
+
+class Cassette:
+    def __init__(
+        self, path: str | Path, mode: str, timing: float = 1.0, strict: bool = False
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"cassette mode must be record or replay, not {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self.timing = timing
+        self.strict = strict
+        self.hits = 0
+        self.fallbacks = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._recorded: list[Interaction] = []
+        self._by_key: dict[str, list[int]] = {}
+        self._by_route: dict[str, list[int]] = {}
+        self._played: set[int] = set()
+        if mode == "replay":
+            for index, interaction in enumerate(self._read()):
+                self._recorded.append(interaction)
+                self._by_key.setdefault(interaction.key, []).append(index)
+                route = _route(interaction.method, interaction.url)
+                self._by_route.setdefault(route, []).append(index)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._open("wt").close()  # a recording starts from an empty file
+
+    @classmethod
+    def from_env(cls) -> Cassette | None:
+        mode = os.getenv("CASSETTE_MODE", "").strip().lower()
+        if mode in ("", "off", "0", "none"):
+            return None
+        timing = os.getenv("CASSETTE_TIMING", "original").strip().lower()
+        factor = {"original": 1.0, "realtime": 1.0, "fast": 0.0}.get(timing)
+        return cls(
+            os.getenv("CASSETTE_PATH", "cassettes/session.jsonl.gz"),
+            mode,
+            float(timing) if factor is None else factor,
+            strict=os.getenv("CASSETTE_STRICT", "0") not in ("0", "false", "no"),
+        )
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def __len__(self) -> int:
+        return len(self._recorded)
+
+    # ------------------------- record -------------------------
+
+    def start(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None,
+        status: int,
+        headers,
+        started: float,
+    ) -> ChunkRecorder:
+        """
+        Begin recording one response (`started` is the perf_counter() value
+        when the request was sent); feed its body to the returned recorder.
+        """
+        interaction = Interaction(
+            key=request_key(method, url, body),
+            method=method.upper(),
+            url=clean_url(url),
+            status=status,
+            headers={k: headers[k] for k in _KEPT_HEADERS if k in headers},
+        )
+        return ChunkRecorder(self, interaction, started)
+
+    def save(self, interaction: Interaction) -> None:
+        line = json.dumps(interaction.__dict__, ensure_ascii=False) + "\n"
+        with self._lock:
+            with self._open("at") as f:
+                f.write(line)
+
+    # ------------------------- replay -------------------------
+
+    def play(self, method: str, url: str, body: bytes | None) -> Interaction:
+        with self._lock:
+            index = self._next(self._by_key.get(request_key(method, url, body)))
+            if index is not None:
+                self.hits += 1
+            elif not self.strict:
+                # the body changed, e.g. a tool result with a timestamp in it:
+                # take the next recording of the same endpoint
+                candidates = self._by_route.get(_route(method, url)) or []
+                index = next((i for i in candidates if i not in self._played), None)
+                self.fallbacks += index is not None
+            if index is None:
+                self.misses += 1
+                raise CassetteMiss(
+                    f"{method.upper()} {clean_url(url)} is not in {self.path}"
+                )
+            self._played.add(index)
+        return self._recorded[index]
+
+    def _next(self, indexes: list[int] | None) -> int | None:
+        """First unplayed recording of a key, else its last one again."""
+        if not indexes:
+            return None
+        return next((i for i in indexes if i not in self._played), indexes[-1])
+
+    def schedule(self, interaction: Interaction):
+        """
+        (seconds after the request, text) per chunk, scaled by the timing factor.
+        Waiting for absolute times keeps sleep overshoot from adding up over a
+        long stream.
+        """
+        for offset, text in interaction.chunks:
+            yield offset / 1e3 * self.timing, text
+
+    # ------------------------- file -------------------------
+
+    def _open(self, mode: str):
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, mode, encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _read(self):
+        with self._open("rt") as f:
+            for line in f:
+                if line.strip():
+                    yield Interaction(**json.loads(line))
+
+
+@lru_cache(maxsize=1)
+def active_cassette() -> Cassette | None:
+    """The process-wide cassette configured by CASSETTE_MODE, or None."""
+    return Cassette.from_env()
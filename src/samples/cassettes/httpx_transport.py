@@ -0,0 +1,143 @@
+"""httpx transports that record to, or replay from, a cassette (sync and async)."""
+
+import asyncio
+import time
+
+import httpx
+
+from src.samples.cassettes import Cassette, ChunkRecorder
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, recorder: ChunkRecorder):
+        self.stream = stream
+        self.recorder = recorder
+
+    def __iter__(self):
+        for chunk in self.stream:
+            self.recorder.add(chunk)
+            yield chunk
+        self.recorder.finish()
+
+    def close(self) -> None:
+        # a stream closed before the end is kept as far as it was read
+        self.recorder.finish()
+        self.stream.close()
+
+
+class _AsyncRecordingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, recorder: ChunkRecorder):
+        self.stream = stream
+        self.recorder = recorder
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.recorder.add(chunk)
+            yield chunk
+        self.recorder.finish()
+
+    async def aclose(self) -> None:
+        self.recorder.finish()
+        await self.stream.aclose()
+
+
+class _ReplayStream(httpx.SyncByteStream):
+    def __init__(self, cassette: Cassette, interaction):
+        self.cassette = cassette
+        self.interaction = interaction
+        self.started = time.perf_counter()
+
+    def __iter__(self):
+        for at, text in self.cassette.schedule(self.interaction):
+            delay = self.started + at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            yield text.encode()
+
+
+class _AsyncReplayStream(httpx.AsyncByteStream):
+    def __init__(self, cassette: Cassette, interaction):
+        self.cassette = cassette
+        self.interaction = interaction
+        self.started = time.perf_counter()
+
+    async def __aiter__(self):
+        for at, text in self.cassette.schedule(self.interaction):
+            delay = self.started + at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield text.encode()
+
+
+def _start(
+    cassette: Cassette, request: httpx.Request, response: httpx.Response, started
+):
+    return cassette.start(
+        request.method,
+        str(request.url),
+        request.content,
+        response.status_code,
+        response.headers,
+        started,
+    )
+
+
+def _replayed(interaction, request: httpx.Request, stream) -> httpx.Response:
+    return httpx.Response(
+        interaction.status,
+        headers=interaction.headers,
+        stream=stream,
+        request=request,
+    )
+
+
+class CassetteTransport(httpx.BaseTransport):
+    def __init__(self, inner: httpx.BaseTransport, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        if self.cassette.recording:
+            # chunks are stored as text, so ask for an uncompressed body
+            request.headers["Accept-Encoding"] = "identity"
+            started = time.perf_counter()
+            response = self.inner.handle_request(request)
+            recorder = _start(self.cassette, request, response, started)
+            response.stream = _RecordingStream(response.stream, recorder)
+            return response
+        interaction = self.cassette.play(
+            request.method, str(request.url), request.content
+        )
+        return _replayed(
+            interaction, request, _ReplayStream(self.cassette, interaction)
+        )
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    def __init__(self, inner: httpx.AsyncBaseTransport, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        if self.cassette.recording:
+            # chunks are stored as text, so ask for an uncompressed body
+            request.headers["Accept-Encoding"] = "identity"
+            started = time.perf_counter()
+            response = await self.inner.handle_async_request(request)
+            recorder = _start(self.cassette, request, response, started)
+            response.stream = _AsyncRecordingStream(response.stream, recorder)
+            return response
+        interaction = self.cassette.play(
+            request.method, str(request.url), request.content
+        )
+        return _replayed(
+            interaction, request, _AsyncReplayStream(self.cassette, interaction)
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
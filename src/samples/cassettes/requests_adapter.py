@@ -0,0 +1,58 @@
+"""requests transport adapter that records to, or replays from, a cassette."""
+
+import time
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from src.samples.cassettes import Cassette
+
+
+def _body(request) -> bytes | None:
+    body = request.body
+    return body.encode() if isinstance(body, str) else body
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    Wraps the adapter that would normally be mounted. Recording reads the whole
+    body before returning it, so use it for plain JSON calls, not streams.
+    """
+
+    def __init__(self, inner: BaseAdapter, cassette: Cassette):
+        super().__init__()
+        self.inner = inner
+        self.cassette = cassette
+
+    def send(self, request, stream=False, **kwargs) -> Response:
+        if self.cassette.recording:
+            started = time.perf_counter()
+            response = self.inner.send(request, stream=stream, **kwargs)
+            recorder = self.cassette.start(
+                request.method,
+                request.url,
+                _body(request),
+                response.status_code,
+                response.headers,
+                started,
+            )
+            recorder.add(response.content)
+            recorder.finish()
+            return response
+
+        interaction = self.cassette.play(request.method, request.url, _body(request))
+        time.sleep(interaction.elapsed_ms / 1e3 * self.cassette.timing)
+        response = Response()
+        response.status_code = interaction.status
+        response.headers = CaseInsensitiveDict(interaction.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = interaction.body
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
@@ -0,0 +1,78 @@
+"""
+Chroma EmbeddingFunction backed by the shared SentenceTransformer provider.
+
+Chroma accepts numpy rows directly, so the encoder output is handed over as a list
+of float32 row views of one contiguous array instead of being converted with
+`.tolist()` (which allocates a Python float for every dimension of every vector).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from chromadb.utils import embedding_functions
+
+from src.samples.crewai_practice.embedding import get_embedding_provider
+
+
+def to_chroma_embeddings(vecs, half_precision: bool = False) -> list[np.ndarray]:
+    """ndarray (n, dim) or (dim,) -> list of n row views, no per-element Python objects."""
+    dtype = np.float16 if half_precision else np.float32
+    arr = np.atleast_2d(np.asarray(vecs)).astype(dtype, copy=False)
+    return list(arr)
+
+
+class ChromaEF(embedding_functions.EmbeddingFunction):
+    """
+    Args:
+        batch_size: texts per forward pass of the encoder.
+        half_precision: return float16 vectors (halves the memory we hold per vector;
+            Chroma widens to float32 inside its own index).
+        normalize: L2-normalize embeddings (cosine == dot product).
+        provider: anything with `encode(texts, **kwargs)`; defaults to the shared
+            embedding provider from `embedding.py`.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 32,
+        half_precision: bool = False,
+        normalize: bool = True,
+        provider=None,
+    ):
+        self.batch_size = batch_size
+        self.half_precision = half_precision
+        self.normalize = normalize
+        self._provider = provider
+
+    @property
+    def provider(self):
+        if self._provider is None:
+            self._provider = get_embedding_provider()
+        return self._provider
+
+    def __call__(self, input):
+        # list[str] -> list[np.ndarray]
+        if isinstance(input, str):
+            input = [input]
+        vecs = self.provider.encode(
+            list(input),
+            batch_size=self.batch_size,
+            normalize_embeddings=self.normalize,
+            convert_to_numpy=True,
+        )
+        return to_chroma_embeddings(vecs, half_precision=self.half_precision)
+
+    @staticmethod
+    def name() -> str:
+        return "crewai_practice_sentence_transformer"
+
+    def get_config(self) -> dict:
+        return {
+            "batch_size": self.batch_size,
+            "half_precision": self.half_precision,
+            "normalize": self.normalize,
+        }
+
+    @staticmethod
+    def build_from_config(config: dict) -> "ChromaEF":
+        return ChromaEF(**config)
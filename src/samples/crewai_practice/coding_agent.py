@@ -1,45 +1,27 @@
 import os
 from textwrap import dedent
 
-import chromadb
-from chromadb.utils import embedding_functions
 from crewai import Agent, Task, Crew, Process, LLM
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
+
+from src.samples.crewai_practice.chroma_ef import ChromaEF
+from src.samples.crewai_practice.crew_runner import ParallelCrewRunner
+from src.samples.crewai_practice.memory_store import PersistentMemoryStore
 
 if __name__ == "__main__":
     load_dotenv()
     base_url = os.getenv("OLLAMA_HOST", "http://localhost:11434")
     model = os.getenv("MODEL", "ollama/gpt-oss:20b")
 
-    embedding_model = SentenceTransformer("BAAI/bge-m3")  # multilingual, multi-function
-
-    def _embed_fn(texts):
-        vecs = embedding_model.encode(
-            texts, normalize_embeddings=True
-        )  # L2-normalize for better performance
-        return [v.tolist() for v in np.atleast_2d(vecs)]
-
-    class ChromaEF(embedding_functions.EmbeddingFunction):
-        def __call__(self, inputs):
-            # list[str] -> list[list[float]]
-            return _embed_fn(inputs)
+    # L2-normalized float32 rows, no list conversion. The model is loaded on first
+    # memory lookup and shared with every other user in the process.
+    embedding_fn = ChromaEF(batch_size=32)
 
-    client = chromadb.Client()
-    collection = client.get_or_create_collection(
-        name="agent_memory",
-        embedding_function=ChromaEF(),
-    )
+    # on-disk (AGENT_MEMORY_PATH), deduplicated by content hash, so runs start warm
+    memory_store = PersistentMemoryStore(embedding_function=embedding_fn)
 
     # ---- CrewAI agents/tasks with memory ----
-    memory_config = {
-        "provider": "chroma",
-        "client": client,  # pass the client so it can reuse the same store
-        "collection": collection,  # optionally pass the ready collection
-        # Fallbacks in case your CrewAI version expects keys instead:
-        "collection_name": "crewai-memory",
-        "embedding_fn": _embed_fn,  # some versions use 'embedding_fn' or 'embed_fn'
-    }
+    memory_config = memory_store.memory_config()
 
     llm = LLM(
         model=model,
@@ -120,6 +102,7 @@ if __name__ == "__main__":
         """,
         expected_output="Make a list of found problems",
         agent=qa_engineer_agent,
+        context=[code_task],
     )
 
     evaluate_task = Task(
@@ -133,6 +116,7 @@ if __name__ == "__main__":
         """,
         expected_output="Final result should be only python code without other contents.",
         agent=chief_qa_engineer_agent,
+        context=[code_task, qa_task],
     )
 
     crew = Crew(
@@ -146,7 +130,14 @@ if __name__ == "__main__":
         process=Process.sequential,
     )
 
-    result = crew.kickoff()
+    # Tasks start as soon as the tasks in their `context` are done; independent
+    # tasks run concurrently under one LLM concurrency cap and the crew's max_rpm.
+    runner = ParallelCrewRunner(
+        crew, max_llm_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+    )
+    result = runner.kickoff()[-1]
 
     print("----------------------")
     print(result)
+    print("----------------------")
+    print(runner.format_timeline())
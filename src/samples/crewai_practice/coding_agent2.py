@@ -1,24 +1,17 @@
 import os
+import time
 from textwrap import dedent
 
 from crewai import Agent, Task, Crew, Process, LLM
 from dotenv import load_dotenv
 
-if __name__ == "__main__":
-    load_dotenv()
-    base_url = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-    model = os.getenv("MODEL", "ollama/gpt-oss:20b")
-
-    llm = LLM(
-        model=model,
-        base_url=base_url,
-        temperature=0.7,
-    )
+from src.samples.crewai_practice.manager_llm import (
+    LocalManagerLLM,
+    build_manager_agent,
+)
 
-    print("Welcome to game crew.")
-    print("---------------------")
-    query = input("What kind of game do you want to create?")
 
+def build_crew(llm, query: str, process=Process.hierarchical, manager_llm=None) -> Crew:
     senior_engineering_agent = Agent(
         role="Senior software engineer",
         goal="Generate software based on requirements.",
@@ -103,48 +96,57 @@ if __name__ == "__main__":
         agent=chief_qa_engineer_agent,
     )
 
-    from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
-
-    TokenProcess()
-
-    # Ollama manager not working
-    # manager_llm = LLM(
-    #     model=model,
-    #     base_url=base_url,
-    #     api_key="NA",  # litellm requires something
-    #     temperature=0.1,  # keep manager deterministic
-    #     timeout=300,  # give local model time
-    #     max_retries=3,
-    #     stream=False,  # avoid stream parsing issues for manager
-    #     max_tokens=5120,
-    #     # Expand context and nudge decoding on Ollama
-    #     extra_body={
-    #         "options": {
-    #             "num_ctx": 8192,  # bigger context helps with hierarchy prompts
-    #             "repeat_penalty": 1.05,
-    #         }
-    #     },
-    # )
-
-    # only Actual openai call is working..
-    # manager_llm = ChatOpenAI(
-    #     model="gpt-4.1",
-    #     temperature=0,
-    # )
-
-    crew = Crew(
-        agents=[
-            senior_engineering_agent,
-            qa_engineer_agent,
-            chief_qa_engineer_agent,
-        ],
-        tasks=[code_task, qa_task, evaluate_task],
+    agents = [
+        senior_engineering_agent,
+        qa_engineer_agent,
+        chief_qa_engineer_agent,
+    ]
+    tasks = [code_task, qa_task, evaluate_task]
+
+    if process == Process.sequential:
+        return Crew(agents=agents, tasks=tasks, verbose=True, process=process)
+
+    if manager_llm is None:
+        manager_llm = LocalManagerLLM(
+            model=llm.model,
+            base_url=llm.base_url,
+            coworkers=[agent.role for agent in agents],
+        )
+    return Crew(
+        agents=agents,
+        tasks=tasks,
         verbose=True,
-        process=Process.hierarchical,
-        manager_llm=manager_llm,
+        process=process,
+        # bounded delegation: the manager must answer after this many steps
+        manager_agent=build_manager_agent(
+            manager_llm,
+            max_delegations=int(os.getenv("MANAGER_MAX_DELEGATIONS", "6")),
+        ),
     )
 
+
+if __name__ == "__main__":
+    load_dotenv()
+    base_url = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+    model = os.getenv("MODEL", "ollama/gpt-oss:20b")
+
+    llm = LLM(
+        model=model,
+        base_url=base_url,
+        temperature=0.7,
+    )
+
+    print("Welcome to game crew.")
+    print("---------------------")
+    query = input("What kind of game do you want to create?")
+
+    # Manager runs on the same local model with deterministic settings and a
+    # parser that repairs the almost-valid delegation calls local models emit.
+    crew = build_crew(llm, query, process=Process.hierarchical)
+
+    started = time.perf_counter()
     result = crew.kickoff()
 
     print("----------------------")
     print(result)
+    print(f"hierarchical crew finished in {time.perf_counter() - started:.1f}s")
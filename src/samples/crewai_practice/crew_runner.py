@@ -0,0 +1,232 @@
+"""
+Run the tasks of a CrewAI crew as a dependency graph instead of a fixed sequence.
+
+Dependencies come from each task's `context`:
+  - context=[t1, t2]  -> waits for t1 and t2 and gets their outputs as context
+  - context=[]        -> independent, starts immediately
+  - context not set   -> sequential semantics: waits for (and sees) every earlier task
+Tasks whose dependencies are done run concurrently, so wall-clock time follows the
+critical path instead of the sum of all stages. Only tasks on different agents
+overlap: a CrewAI agent keeps per-run state (its executor, tools handler and
+counters) and is not thread-safe, so tasks sharing an agent take turns.
+
+All LLM calls made while running go through one gate that enforces a global
+concurrency cap and the crew's `max_rpm`.
+
+  runner = ParallelCrewRunner(crew, max_llm_concurrency=2)
+  outputs = runner.kickoff(inputs={"topic": "New York City"})
+  print(runner.format_timeline())
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+_CONTEXT_SEPARATOR = "\n\n----------\n\n"  # same separator CrewAI uses
+
+
+class RateLimiter:
+    """Sliding one-minute window: at most `max_rpm` acquisitions per 60 seconds."""
+
+    def __init__(self, max_rpm: int):
+        self.max_rpm = max_rpm
+        self._calls: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= 60:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_rpm:
+                    self._calls.append(now)
+                    return
+                wait_sec = 60 - (now - self._calls[0])
+            time.sleep(wait_sec)
+
+
+class LLMGate:
+    """Concurrency cap + optional rate limit shared by every LLM in a run."""
+
+    def __init__(self, max_concurrency: int | None, max_rpm: int | None):
+        self._semaphore = (
+            threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        )
+        self._rate = RateLimiter(max_rpm) if max_rpm else None
+
+    def wrap(self, llm) -> None:
+        """Route llm.call through the gate (idempotent per LLM instance)."""
+        if getattr(llm, "_llm_gate", None) is self:
+            return
+        original = getattr(llm, "_ungated_call", None) or llm.call
+
+        def gated_call(*args, **kwargs):
+            if self._rate:
+                self._rate.acquire()
+            if self._semaphore is None:
+                return original(*args, **kwargs)
+            with self._semaphore:
+                return original(*args, **kwargs)
+
+        llm._ungated_call = original
+        llm._llm_gate = self
+        llm.call = gated_call
+
+
+@dataclass
+class TaskTiming:
+    name: str
+    started: float
+    finished: float
+
+    @property
+    def seconds(self) -> float:
+        return self.finished - self.started
+
+
+class ParallelCrewRunner:
+    def __init__(
+        self,
+        crew,
+        max_llm_concurrency: int | None = None,
+        max_rpm: int | None = None,
+    ):
+        self.crew = crew
+        self.tasks = list(crew.tasks)
+        self.gate = LLMGate(
+            max_llm_concurrency, max_rpm or getattr(crew, "max_rpm", None)
+        )
+        self.timeline: list[TaskTiming] = []
+        self._t0 = 0.0
+        self._agent_locks = {id(task.agent): threading.Lock() for task in self.tasks}
+
+    # ------------------------- Graph -------------------------
+
+    def build_graph(self) -> dict[int, list[int]]:
+        """task index -> indexes of the tasks it depends on."""
+        index = {id(task): i for i, task in enumerate(self.tasks)}
+        graph: dict[int, list[int]] = {}
+        for i, task in enumerate(self.tasks):
+            context = getattr(task, "context", None)
+            if isinstance(context, list):
+                deps = []
+                for dep in context:
+                    if id(dep) not in index:
+                        raise ValueError(
+                            f"Task '{self._name(task)}' depends on a task outside the crew"
+                        )
+                    deps.append(index[id(dep)])
+                graph[i] = deps
+            else:
+                graph[i] = list(range(i))
+        self._check_acyclic(graph)
+        return graph
+
+    @staticmethod
+    def _check_acyclic(graph: dict[int, list[int]]) -> None:
+        state: dict[int, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(node: int) -> None:
+            if state.get(node) == 2:
+                return
+            if state.get(node) == 1:
+                raise ValueError("Task context forms a cycle")
+            state[node] = 1
+            for dep in graph[node]:
+                visit(dep)
+            state[node] = 2
+
+        for node in graph:
+            visit(node)
+
+    # ------------------------- Execution -------------------------
+
+    def kickoff(self, inputs: dict | None = None) -> list:
+        """Run every task; returns TaskOutputs in the crew's task order."""
+        if inputs:
+            for task in self.tasks:
+                task.interpolate_inputs_and_add_conversation_history(inputs)
+            for agent in self.crew.agents:
+                agent.interpolate_inputs(inputs)
+        for task in self.tasks:
+            self.gate.wrap(task.agent.llm)
+
+        graph = self.build_graph()
+        outputs: dict[int, object] = {}
+        remaining = dict(graph)
+        self.timeline = []
+        self._t0 = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=max(1, len(self.tasks))) as pool:
+            running = {}
+            while remaining or running:
+                ready = [
+                    i
+                    for i, deps in remaining.items()
+                    if all(d in outputs for d in deps)
+                ]
+                for i in ready:
+                    del remaining[i]
+                    context = _CONTEXT_SEPARATOR.join(outputs[d].raw for d in graph[i])
+                    running[pool.submit(self._run_task, i, context)] = i
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    outputs[running.pop(future)] = future.result()
+
+        return [outputs[i] for i in range(len(self.tasks))]
+
+    def _run_task(self, i: int, context: str):
+        task = self.tasks[i]
+        name = self._name(task)
+        with self._agent_locks[id(task.agent)]:
+            started = time.perf_counter()
+            logger.info("task '%s' started at +%.2fs", name, started - self._t0)
+            try:
+                return task.execute_sync(
+                    agent=task.agent, context=context or None, tools=task.tools
+                )
+            finally:
+                finished = time.perf_counter()
+                self.timeline.append(
+                    TaskTiming(name, started - self._t0, finished - self._t0)
+                )
+                logger.info(
+                    "task '%s' finished at +%.2fs (%.2fs)",
+                    name,
+                    finished - self._t0,
+                    finished - started,
+                )
+
+    # ------------------------- Reporting -------------------------
+
+    def format_timeline(self, width: int = 40) -> str:
+        if not self.timeline:
+            return "(no tasks run)"
+        total = max(t.finished for t in self.timeline) or 1.0
+        lines = []
+        for t in sorted(self.timeline, key=lambda t: t.started):
+            start_col = int(t.started / total * width)
+            bar_len = max(1, int(t.seconds / total * width))
+            bar = " " * start_col + "#" * bar_len
+            lines.append(
+                f"{t.name[:28]:<28} |{bar:<{width}}| +{t.started:6.1f}s {t.seconds:6.1f}s"
+            )
+        lines.append(
+            f"wall clock {total:.1f}s, sum of stages {sum(t.seconds for t in self.timeline):.1f}s"
+        )
+        return "\n".join(lines)
+
+    @staticmethod
+    def _name(task) -> str:
+        lines = (getattr(task, "description", None) or "").strip().splitlines()
+        return getattr(task, "name", None) or (
+            lines[0] if lines else f"task-{id(task)}"
+        )
@@ -0,0 +1,128 @@
+"""
+Process-wide, lazily loaded SentenceTransformer for the CrewAI samples.
+
+Importing this module is cheap: neither `sentence_transformers` nor `torch` is
+imported and no weights are read until the first `encode` call.
+
+Configuration (all optional):
+  EMBEDDING_MODEL       model name or path (default "BAAI/bge-m3").
+                        Use e.g. "BAAI/bge-small-en-v1.5" or
+                        "intfloat/multilingual-e5-small" for a lighter model.
+  EMBEDDING_BACKEND     "torch" (default), "onnx" or "openvino".
+  EMBEDDING_ONNX_FILE   ONNX file inside the model repo, e.g.
+                        "onnx/model_qint8_avx512_vnni.onnx" for a quantized CPU model.
+  EMBEDDING_DEVICE      "cpu", "cuda", "mps", ... (default: let sentence-transformers pick)
+  EMBEDDING_WARMUP      "1" to start loading in a background thread as soon as
+                        the provider is first requested.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+DEFAULT_MODEL = "BAAI/bge-m3"  # multilingual, multi-function
+
+
+class EmbeddingModelProvider:
+    """Loads a SentenceTransformer on first use and hands out the same instance afterwards."""
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "torch",
+        device: str | None = None,
+        onnx_file: str | None = None,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.device = device
+        self.onnx_file = onnx_file
+        self.load_seconds: float | None = None
+        self._model = None
+        self._lock = threading.Lock()
+        self._warmup_thread: threading.Thread | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def get(self):
+        """Return the model, loading it on the first call (thread-safe)."""
+        model = self._model
+        if model is not None:
+            return model
+        with self._lock:
+            if self._model is None:
+                self._model = self._load()
+            return self._model
+
+    def encode(self, texts, **kwargs):
+        return self.get().encode(texts, **kwargs)
+
+    def warm_up(self, background: bool = True) -> None:
+        """
+        Load the model and run one tiny encode so the first real lookup does not pay
+        for lazy kernel/graph initialisation. With background=True this returns immediately.
+        """
+        if background:
+            if self._warmup_thread is None:
+                self._warmup_thread = threading.Thread(
+                    target=self._warm, name="embedding-warmup", daemon=True
+                )
+                self._warmup_thread.start()
+            return
+        self._warm()
+
+    def _warm(self) -> None:
+        self.encode(["warm up"], normalize_embeddings=True)
+
+    def _load(self):
+        # Heavy import is deferred until a model is really needed.
+        from sentence_transformers import SentenceTransformer
+
+        kwargs = {}
+        if self.device:
+            kwargs["device"] = self.device
+        if self.backend != "torch":
+            kwargs["backend"] = self.backend
+            if self.onnx_file:
+                kwargs["model_kwargs"] = {"file_name": self.onnx_file}
+
+        started = time.perf_counter()
+        model = SentenceTransformer(self.model_name, **kwargs)
+        self.load_seconds = time.perf_counter() - started
+        return model
+
+
+_providers: dict[tuple, EmbeddingModelProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_embedding_provider(
+    model_name: str | None = None,
+    backend: str | None = None,
+    device: str | None = None,
+    onnx_file: str | None = None,
+) -> EmbeddingModelProvider:
+    """
+    Return the shared provider for the given settings (env vars fill in anything not passed).
+    Every caller in the process asking for the same model/backend gets the same instance.
+    """
+    model_name = model_name or os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL)
+    backend = backend or os.getenv("EMBEDDING_BACKEND", "torch")
+    device = device or os.getenv("EMBEDDING_DEVICE") or None
+    onnx_file = onnx_file or os.getenv("EMBEDDING_ONNX_FILE") or None
+
+    key = (model_name, backend, device, onnx_file)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = EmbeddingModelProvider(
+                model_name, backend=backend, device=device, onnx_file=onnx_file
+            )
+            _providers[key] = provider
+            if os.getenv("EMBEDDING_WARMUP") == "1":
+                provider.warm_up(background=True)
+    return provider
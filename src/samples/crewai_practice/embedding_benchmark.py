@@ -0,0 +1,63 @@
+"""
+Startup time / peak RSS of the CrewAI embedding setup, before and after lazy loading.
+
+Each scenario runs in a fresh interpreter so imports and RSS are not shared:
+  eager       old behaviour: import sentence_transformers and build the model at import
+  lazy        import the provider only (what a run without memory lookups pays)
+  lazy+encode provider plus the first encode call (what a run with memory lookups pays)
+
+  python -m src.samples.crewai_practice.embedding_benchmark
+  EMBEDDING_MODEL=BAAI/bge-small-en-v1.5 python -m src.samples.crewai_practice.embedding_benchmark
+  EMBEDDING_BACKEND=onnx python -m src.samples.crewai_practice.embedding_benchmark
+"""
+
+import json
+import subprocess
+import sys
+
+_PRELUDE = """
+import json, resource, sys, time
+started = time.perf_counter()
+"""
+
+_REPORT = """
+elapsed = time.perf_counter() - started
+peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    peak_kb //= 1024
+print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_kb / 1024}))
+"""
+
+SCENARIOS = {
+    "eager": """
+import os
+from sentence_transformers import SentenceTransformer
+model = SentenceTransformer(os.getenv("EMBEDDING_MODEL", "BAAI/bge-m3"))
+""",
+    "lazy": """
+from src.samples.crewai_practice.embedding import get_embedding_provider
+provider = get_embedding_provider()
+""",
+    "lazy+encode": """
+from src.samples.crewai_practice.embedding import get_embedding_provider
+provider = get_embedding_provider()
+provider.encode(["hello world"], normalize_embeddings=True)
+""",
+}
+
+
+def run_scenario(body: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PRELUDE + body + _REPORT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    print(f"{'scenario':<14}{'startup (s)':>14}{'peak RSS (MB)':>16}")
+    for name, body in SCENARIOS.items():
+        result = run_scenario(body)
+        print(f"{name:<14}{result['seconds']:>14.2f}{result['peak_rss_mb']:>16.1f}")
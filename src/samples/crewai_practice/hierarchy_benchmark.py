@@ -0,0 +1,72 @@
+"""
+Wall-clock time of the coding crew run sequentially vs. hierarchically (local manager)
+on the same query, to see whether the manager's extra round trips pay off.
+
+  python -m src.samples.crewai_practice.hierarchy_benchmark --runs 3 \
+      --query "simple snake game with pygame"
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from crewai import LLM, Process
+from dotenv import load_dotenv
+
+from src.samples.crewai_practice.coding_agent2 import build_crew
+from src.samples.crewai_practice.manager_llm import LocalManagerLLM
+
+
+def run_once(llm, query: str, process) -> tuple[float, int]:
+    """Return (seconds, manager repairs) for one kickoff."""
+    manager_llm = None
+    if process == Process.hierarchical:
+        manager_llm = LocalManagerLLM(
+            model=llm.model,
+            base_url=llm.base_url,
+            coworkers=[
+                "Senior software engineer",
+                "Software QA engineer",
+                "Chief software QA engineer",
+            ],
+        )
+    crew = build_crew(llm, query, process=process, manager_llm=manager_llm)
+    started = time.perf_counter()
+    crew.kickoff()
+    elapsed = time.perf_counter() - started
+    return elapsed, manager_llm.repairs if manager_llm else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--query", default="simple number guessing game in the terminal"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    llm = LLM(
+        model=os.getenv("MODEL", "ollama/gpt-oss:20b"),
+        base_url=os.getenv("OLLAMA_HOST", "http://localhost:11434"),
+        temperature=0.0,  # same settings for both processes
+        seed=42,
+    )
+
+    results = {}
+    for process in (Process.sequential, Process.hierarchical):
+        timings, repairs = [], 0
+        for _ in range(args.runs):
+            seconds, fixed = run_once(llm, args.query, process)
+            timings.append(seconds)
+            repairs += fixed
+        results[process] = (timings, repairs)
+
+    print(f"query: {args.query!r}, {args.runs} run(s) each")
+    print(f"{'process':<14}{'median s':>10}{'min s':>10}{'max s':>10}{'repairs':>10}")
+    for process, (timings, repairs) in results.items():
+        print(
+            f"{process.value:<14}{statistics.median(timings):>10.1f}"
+            f"{min(timings):>10.1f}{max(timings):>10.1f}{repairs:>10}"
+        )
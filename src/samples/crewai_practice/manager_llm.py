@@ -0,0 +1,186 @@
+"""
+Manager LLM for hierarchical CrewAI crews running on a local (Ollama) model.
+
+The hierarchical manager has to answer in CrewAI's ReAct format, e.g.
+
+  Thought: the engineer should write the code first
+  Action: Delegate work to coworker
+  Action Input: {"task": "...", "context": "...", "coworker": "Senior software engineer"}
+
+Hosted models do this reliably; local models often wrap it in code fences, use
+Python-style quotes, leave trailing commas or braces open, misspell the coworker
+role, or emit an Action and a Final Answer in the same message. CrewAI rejects
+all of those and burns another manager round trip. `LocalManagerLLM` runs the
+model with deterministic settings and rewrites the reply into the strict format
+before CrewAI parses it.
+
+  manager_llm = LocalManagerLLM(model, base_url, coworkers=[a.role for a in agents])
+  manager = build_manager_agent(manager_llm, max_delegations=6)
+  crew = Crew(..., process=Process.hierarchical, manager_agent=manager)
+"""
+
+from __future__ import annotations
+
+import ast
+import difflib
+import json
+import re
+from textwrap import dedent
+
+from crewai import LLM, Agent
+
+DELEGATE_TOOL = "Delegate work to coworker"
+ASK_TOOL = "Ask question to coworker"
+
+_FENCE_RE = re.compile(r"^```[a-zA-Z]*\s*$", re.MULTILINE)
+_ACTION_RE = re.compile(r"^\s*Action\s*:\s*(.+?)\s*$", re.MULTILINE | re.IGNORECASE)
+_ACTION_INPUT_RE = re.compile(r"Action\s*Input\s*:\s*", re.IGNORECASE)
+_FINAL_RE = re.compile(r"Final\s*Answer\s*:", re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+def parse_loose_json_object(text: str) -> dict | None:
+    """Best-effort parse of the first {...} object in text. None if hopeless."""
+    start = text.find("{")
+    if start < 0:
+        return None
+    candidate = text[start:]
+
+    # Cut at the brace that closes the object (ignoring braces inside strings).
+    depth, in_str, quote, escaped = 0, False, "", False
+    for i, ch in enumerate(candidate):
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                in_str = False
+        elif ch in "\"'":
+            in_str, quote = True, ch
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                candidate = candidate[: i + 1]
+                break
+    else:
+        # Truncated output: close the open string and braces.
+        candidate = candidate.rstrip() + (quote if in_str else "") + "}" * depth
+
+    candidate = _TRAILING_COMMA_RE.sub(r"\1", candidate)
+    for loader in (json.loads, ast.literal_eval):
+        try:
+            value = loader(candidate)
+        except (ValueError, SyntaxError):
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+class LocalManagerLLM(LLM):
+    """
+    Args:
+        model / base_url: same as crewai.LLM (e.g. "ollama/gpt-oss:20b", "http://localhost:11434").
+        coworkers: agent roles the manager may delegate to; used to repair misspelled names.
+        num_ctx: Ollama context window; hierarchy prompts are long.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str,
+        coworkers: list[str] | None = None,
+        num_ctx: int = 8192,
+        **kwargs,
+    ):
+        settings = {
+            "api_key": "NA",  # litellm requires something
+            "temperature": 0.0,  # keep manager deterministic
+            "top_p": 1.0,
+            "seed": 42,
+            "timeout": 300,  # give local model time
+            "max_tokens": 2048,
+            "stream": False,  # avoid stream parsing issues for manager
+            "num_ctx": num_ctx,
+            "repeat_penalty": 1.05,
+        }
+        settings.update(kwargs)
+        super().__init__(model=model, base_url=base_url, **settings)
+        self.coworkers = list(coworkers or [])
+        self.repairs = 0
+
+    def call(self, *args, **kwargs):
+        response = super().call(*args, **kwargs)
+        if not isinstance(response, str):
+            return response
+        fixed = self.normalize(response)
+        if fixed != response:
+            self.repairs += 1
+        return fixed
+
+    # ------------------------- Repair -------------------------
+
+    def normalize(self, text: str) -> str:
+        text = _FENCE_RE.sub("", text).strip()
+
+        action = _ACTION_RE.search(text)
+        final = _FINAL_RE.search(text)
+        if not action:
+            return text
+        if final and final.start() < action.start():
+            # Answered first, then rambled on with an action: keep the answer.
+            return text[: action.start()].rstrip()
+
+        input_match = _ACTION_INPUT_RE.search(text, action.end())
+        if not input_match:
+            return text
+        args = parse_loose_json_object(text[input_match.end() :])
+        if args is None:
+            return text
+
+        if "coworker" in args and self.coworkers:
+            args["coworker"] = self._closest(str(args["coworker"]), self.coworkers)
+        for key in ("task", "question", "context"):
+            if isinstance(args.get(key), (dict, list)):
+                args[key] = json.dumps(args[key], ensure_ascii=False)
+
+        thought = text[: action.start()].rstrip()
+        tool = self._closest(action.group(1).strip(" `*\"'"), [DELEGATE_TOOL, ASK_TOOL])
+        # Dropping everything after the input also drops a premature "Final Answer".
+        return (
+            f"{thought}\nAction: {tool}\n"
+            f"Action Input: {json.dumps(args, ensure_ascii=False)}"
+        ).lstrip()
+
+    @staticmethod
+    def _closest(name: str, choices: list[str]) -> str:
+        by_lower = {c.lower(): c for c in choices}
+        if name.lower() in by_lower:
+            return by_lower[name.lower()]
+        match = difflib.get_close_matches(name.lower(), list(by_lower), n=1, cutoff=0.4)
+        return by_lower[match[0]] if match else name
+
+
+def build_manager_agent(llm: LocalManagerLLM, max_delegations: int = 6) -> Agent:
+    """
+    Manager agent with a bounded number of reasoning/delegation steps. Once
+    `max_delegations` is reached CrewAI forces the manager to give its final answer.
+    """
+    return Agent(
+        role="Crew Manager",
+        goal="Deliver the final result by delegating each task to the right coworker.",
+        backstory=dedent(
+            """
+            You manage a small team. You never do the work yourself.
+            Delegate one task at a time with all the context the coworker needs,
+            and give the Final Answer as soon as the work is complete.
+            """
+        ),
+        allow_delegation=True,
+        max_iter=max_delegations,
+        verbose=True,
+        llm=llm,
+    )
@@ -0,0 +1,241 @@
+"""
+Persistent, deduplicated agent memory on top of a Chroma PersistentClient.
+
+Memories are stored under a content hash, so remembering the same text twice is
+a no-op (and is never re-embedded). `compact()` removes entries older than a
+TTL and trims the store to a maximum size, oldest first.
+
+`memory_config()` hands CrewAI a view of the collection whose add() and
+upsert() go through the store's own add(): CrewAI's ids are replaced by
+content hashes and every memory gets its created_at. Rows written some other
+way (a CrewAI version that opens the collection by name) carry no created_at;
+compaction stamps them when it first sees them, so they age from then on.
+
+Configuration (all optional):
+  AGENT_MEMORY_PATH         on-disk location (default "./.agent_memory")
+  AGENT_MEMORY_TTL_SEC      drop memories older than this on compaction
+  AGENT_MEMORY_MAX_ENTRIES  keep at most this many memories on compaction
+
+Run compaction from cron / a scheduler:
+  python -m src.samples.crewai_practice.memory_store compact
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+import chromadb
+
+DEFAULT_PATH = "./.agent_memory"
+
+
+def _env_number(name: str, cast):
+    value = os.getenv(name)
+    return cast(value) if value else None
+
+
+class PersistentMemoryStore:
+    def __init__(
+        self,
+        path: str | None = None,
+        collection_name: str = "agent_memory",
+        embedding_function=None,
+        ttl_seconds: float | None = None,
+        max_entries: int | None = None,
+    ):
+        self.path = Path(path or os.getenv("AGENT_MEMORY_PATH", DEFAULT_PATH))
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else _env_number("AGENT_MEMORY_TTL_SEC", float)
+        )
+        self.max_entries = (
+            max_entries
+            if max_entries is not None
+            else _env_number("AGENT_MEMORY_MAX_ENTRIES", int)
+        )
+
+        self.embedding_function = embedding_function
+        self.client = chromadb.PersistentClient(path=str(self.path))
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            embedding_function=embedding_function,
+            metadata={"hnsw:space": "cosine"},
+        )
+        self._max_batch = self.client.get_max_batch_size()
+
+    # ------------------------- Write / read -------------------------
+
+    @staticmethod
+    def content_id(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def add(
+        self,
+        texts: list[str],
+        metadatas: list[dict] | None = None,
+        embeddings: list | None = None,
+    ) -> list[str]:
+        """Store texts that are not already present. Returns the ids of all given texts."""
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [self.content_id(t) for t in texts]
+        vectors = embeddings if embeddings is not None else [None] * len(texts)
+
+        # Dedupe within the batch first, then against what is already on disk.
+        pending: dict[str, tuple[str, dict, object]] = {}
+        for id_, text, meta, vector in zip(ids, texts, metadatas, vectors):
+            pending.setdefault(id_, (text, meta or {}, vector))
+        for chunk in self._chunks(list(pending)):
+            existing = self.collection.get(ids=chunk, include=[])["ids"]
+            for id_ in existing:
+                pending.pop(id_, None)
+
+        now = time.time()
+        new_ids = list(pending)
+        for chunk in self._chunks(new_ids):
+            self.collection.add(
+                ids=chunk,
+                documents=[pending[id_][0] for id_ in chunk],
+                metadatas=[{**pending[id_][1], "created_at": now} for id_ in chunk],
+                embeddings=(
+                    [pending[id_][2] for id_ in chunk]
+                    if embeddings is not None
+                    else None
+                ),
+            )
+        return ids
+
+    def recall(self, query: str, k: int = 5) -> list[str]:
+        result = self.collection.query(query_texts=[query], n_results=k)
+        return result["documents"][0] if result["documents"] else []
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def size_bytes(self) -> int:
+        return sum(f.stat().st_size for f in self.path.rglob("*") if f.is_file())
+
+    # ------------------------- Compaction -------------------------
+
+    def compact(
+        self, ttl_seconds: float | None = None, max_entries: int | None = None
+    ) -> int:
+        """Delete expired memories, then the oldest ones above max_entries. Returns #deleted."""
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        max_entries = max_entries if max_entries is not None else self.max_entries
+        deleted = 0
+        self._stamp_unstamped()
+
+        if ttl_seconds is not None:
+            cutoff = time.time() - ttl_seconds
+            expired = self.collection.get(
+                where={"created_at": {"$lt": cutoff}}, include=[]
+            )["ids"]
+            deleted += self._delete(expired)
+
+        if max_entries is not None:
+            excess = self.count() - max_entries
+            if excess > 0:
+                rows = self.collection.get(include=["metadatas"])
+                by_age = sorted(
+                    zip(rows["ids"], rows["metadatas"]),
+                    key=lambda row: (row[1] or {}).get("created_at", 0.0),
+                )
+                deleted += self._delete([id_ for id_, _ in by_age[:excess]])
+
+        return deleted
+
+    def _stamp_unstamped(self) -> None:
+        """Give rows written around add() a created_at, so they can expire."""
+        now = time.time()
+        offset = 0
+        while True:
+            rows = self.collection.get(
+                include=["metadatas"], limit=self._max_batch, offset=offset
+            )
+            if not rows["ids"]:
+                return
+            unstamped = [
+                (id_, meta or {})
+                for id_, meta in zip(rows["ids"], rows["metadatas"])
+                if "created_at" not in (meta or {})
+            ]
+            if unstamped:
+                self.collection.update(
+                    ids=[id_ for id_, _ in unstamped],
+                    metadatas=[{**meta, "created_at": now} for _, meta in unstamped],
+                )
+            offset += len(rows["ids"])
+
+    def _delete(self, ids: list[str]) -> int:
+        for chunk in self._chunks(ids):
+            self.collection.delete(ids=chunk)
+        return len(ids)
+
+    def _chunks(self, items: list):
+        for i in range(0, len(items), self._max_batch):
+            yield items[i : i + self._max_batch]
+
+    # ------------------------- CrewAI glue -------------------------
+
+    def memory_config(self) -> dict:
+        return {
+            "provider": "chroma",
+            "client": self.client,  # pass the client so it can reuse the same store
+            "collection": _StoreCollection(self),  # writes deduped and timestamped
+            # Fallbacks in case your CrewAI version expects keys instead:
+            "collection_name": self.collection.name,
+            "path": str(self.path),
+            "embedding_fn": self.embedding_function,
+        }
+
+
+class _StoreCollection:
+    """The store's collection, with add/upsert routed through store.add()."""
+
+    def __init__(self, store: PersistentMemoryStore):
+        self._store = store
+
+    def __getattr__(self, name: str):
+        return getattr(self._store.collection, name)
+
+    def add(self, ids=None, embeddings=None, metadatas=None, documents=None, **kwargs):
+        # Chroma accepts one item or a list of them
+        if isinstance(metadatas, dict):
+            metadatas = [metadatas]
+        if documents is None:
+            # nothing to hash (e.g. images); keep the caller's ids
+            ids = [ids] if isinstance(ids, str) else ids
+            now = time.time()
+            self._store.collection.add(
+                ids=ids,
+                embeddings=embeddings,
+                metadatas=[
+                    {**(meta or {}), "created_at": now}
+                    for meta in metadatas or [None] * len(ids)
+                ],
+                **kwargs,
+            )
+            return
+        if isinstance(documents, str):
+            documents = [documents]
+            embeddings = [embeddings] if embeddings is not None else None
+        self._store.add(list(documents), metadatas, embeddings)
+
+    # same content, same id: an upsert of a known memory is a no-op
+    upsert = add
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["compact"]:
+        print("usage: python -m src.samples.crewai_practice.memory_store compact")
+        sys.exit(2)
+    store = PersistentMemoryStore()
+    removed = store.compact()
+    print(
+        f"removed {removed} memories; {store.count()} left, {store.size_bytes() / 1e6:.1f} MB"
+    )
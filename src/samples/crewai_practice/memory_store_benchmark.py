@@ -0,0 +1,89 @@
+"""
+Recall latency and on-disk size of PersistentMemoryStore as it grows.
+
+A deterministic fake embedding function is used by default so the numbers show the
+store itself, not the encoder. Pass --real to embed with the shared model instead.
+
+  python -m src.samples.crewai_practice.memory_store_benchmark
+  python -m src.samples.crewai_practice.memory_store_benchmark --max 200000 --dim 1024
+"""
+
+import argparse
+import hashlib
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from chromadb.utils import embedding_functions
+
+from src.samples.crewai_practice.memory_store import PersistentMemoryStore
+
+
+class HashEF(embedding_functions.EmbeddingFunction):
+    """Random but stable unit vector per text."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def __call__(self, input):
+        out = []
+        for text in input:
+            seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+            v = np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32)
+            out.append(v / np.linalg.norm(v))
+        return out
+
+
+def recall_latencies(store: PersistentMemoryStore, queries: list[str]) -> list[float]:
+    latencies = []
+    for q in queries:
+        started = time.perf_counter()
+        store.recall(q, k=5)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max", type=int, default=100_000)
+    parser.add_argument("--step", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument(
+        "--real", action="store_true", help="use the real embedding model"
+    )
+    args = parser.parse_args()
+
+    if args.real:
+        from src.samples.crewai_practice.chroma_ef import ChromaEF
+
+        ef = ChromaEF()
+    else:
+        ef = HashEF(args.dim)
+
+    queries = [f"what did we learn about topic {i}?" for i in range(args.queries)]
+    with tempfile.TemporaryDirectory() as path:
+        store = PersistentMemoryStore(path=path, embedding_function=ef)
+        print(
+            f"{'entries':>10}{'p50 ms':>10}{'p95 ms':>10}{'size MB':>10}{'add s':>10}"
+        )
+        written = 0
+        while written < args.max:
+            batch = [
+                f"memory #{i}: note about topic {i % 997}"
+                for i in range(written, written + args.step)
+            ]
+            started = time.perf_counter()
+            store.add(batch)
+            add_seconds = time.perf_counter() - started
+            # the same batch again must be deduplicated, not re-embedded
+            store.add(batch[:100])
+            written += args.step
+
+            lat = sorted(recall_latencies(store, queries))
+            p95 = lat[int(len(lat) * 0.95) - 1]
+            print(
+                f"{store.count():>10}{statistics.median(lat):>10.2f}{p95:>10.2f}"
+                f"{store.size_bytes() / 1e6:>10.1f}{add_seconds:>10.1f}"
+            )
@@ -0,0 +1,382 @@
+"""
+End-to-end benchmark of the samples against the fake LLM server: every
+subsystem is driven with the same request count and concurrency, and its
+throughput and latency percentiles are compared with a stored baseline.
+
+  python -m src.samples.fake_llm.benchmark                    # compare, exit 1 on regression
+  python -m src.samples.fake_llm.benchmark --update-baseline  # record this machine's numbers
+  python -m src.samples.fake_llm.benchmark --only openai_chat,tool_loop
+
+A subsystem whose client library is not installed is reported as skipped.
+A run counts as a regression when p95 latency grows, or throughput drops, by
+more than --tolerance (default 25%) against the baseline entry of the same name.
+The baseline is only meaningful for the machine and fake settings it was
+recorded with; both are stored with it and a mismatch in settings is refused.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from src.samples.fake_llm.server import BackgroundServer, FakeConfig
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+_CHAT = [{"role": "user", "content": "I loved Heat. What should I watch next?"}]
+
+
+@dataclass
+class Result:
+    name: str
+    requests: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    latencies_ms: list[float] = field(default_factory=list)
+    ttfts_ms: list[float] = field(default_factory=list)
+    skipped: str | None = None
+
+    @property
+    def throughput(self) -> float:
+        return (self.requests - self.errors) / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> dict:
+        summary = {"throughput": round(self.throughput, 2), "errors": self.errors}
+        for p in (50, 95, 99):
+            summary[f"p{p}_ms"] = round(percentile(self.latencies_ms, p), 2)
+        if self.ttfts_ms:
+            summary["ttft_p50_ms"] = round(percentile(self.ttfts_ms, 50), 2)
+            summary["ttft_p95_ms"] = round(percentile(self.ttfts_ms, 95), 2)
+        return summary
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+# ------------------------- subsystems -------------------------
+#
+# Each setup function imports what it needs (ImportError = skipped) and returns
+# a blocking `call()` for one request; `call` returns the time to first token in
+# seconds for streamed requests, or None.
+
+
+def setup_http_chat(base_url: str):
+    """Raw HTTP floor: the fake server and a pooled requests.Session."""
+    import requests
+
+    local = threading.local()
+
+    def call():
+        session = getattr(local, "session", None) or requests.Session()
+        local.session = session
+        response = session.post(
+            f"{base_url}/api/chat",
+            json={"model": "fake", "messages": _CHAT, "stream": False},
+        )
+        response.raise_for_status()
+
+    return call
+
+
+def setup_http_embed(base_url: str):
+    import requests
+
+    local = threading.local()
+
+    def call():
+        session = getattr(local, "session", None) or requests.Session()
+        local.session = session
+        response = session.post(
+            f"{base_url}/api/embed",
+            json={"model": "fake", "input": ["Heat (1995)", "Collateral (2004)"]},
+        )
+        response.raise_for_status()
+
+    return call
+
+
+def setup_ollama_chat(base_url: str):
+    """ollama.Client as used by websocket/simple_websocket_server.py."""
+    from ollama import Client
+
+    client = Client(host=base_url)
+
+    def call():
+        started = time.perf_counter()
+        for _ in client.chat(model="fake", messages=_CHAT, stream=True):
+            return time.perf_counter() - started
+
+    return call
+
+
+def setup_openai_chat(base_url: str):
+    """Shared sync client from llm_clients, as used by ollama_serving.py."""
+    from src.samples.llm_clients import llm_settings, sync_client
+
+    def call():
+        sync_client().chat.completions.create(
+            model=llm_settings().model, messages=_CHAT
+        )
+
+    return call
+
+
+def setup_openai_stream(base_url: str):
+    from src.samples.llm_clients import llm_settings, sync_client
+
+    def call():
+        started = time.perf_counter()
+        ttft = None
+        stream = sync_client().chat.completions.create(
+            model=llm_settings().model, messages=_CHAT, stream=True
+        )
+        for chunk in stream:
+            if ttft is None and chunk.choices and chunk.choices[0].delta.content:
+                ttft = time.perf_counter() - started
+        return ttft
+
+    return call
+
+
+def setup_tool_loop(base_url: str):
+    """call_tools.run_chat: a tool call round trip and the final answer."""
+    from src.samples.agent_tools import call_tools
+
+    def call():
+        call_tools.run_chat("What's the weather in Seoul right now?")
+
+    return call
+
+
+def setup_embeddings(base_url: str):
+    """OllamaEmbeddings as used by langchain_default.py."""
+    from langchain_ollama import OllamaEmbeddings
+
+    embeddings = OllamaEmbeddings(model="nomic-embed-text", base_url=base_url)
+
+    def call():
+        embeddings.embed_documents(["Heat (1995)", "Collateral (2004)"])
+
+    return call
+
+
+def setup_movie_chat_ws(base_url: str):
+    """One turn through websocket/movie_chat_server.py (Semantic Kernel, streaming)."""
+    import websockets.sync.client
+
+    from src.samples.websocket.movie_chat_server import MovieChatServer, build_kernel
+
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    address = {}
+
+    kernel, function = build_kernel()
+
+    async def serve():
+        chat_server = MovieChatServer(kernel, function)
+        async with websockets.serve(chat_server.handler, "127.0.0.1", 0) as server:
+            address["port"] = server.sockets[0].getsockname()[1]
+            ready.set()
+            await asyncio.Future()
+
+    threading.Thread(
+        target=loop.run_until_complete, args=(serve(),), daemon=True
+    ).start()
+    ready.wait()
+    local = threading.local()
+
+    def call():
+        connection = getattr(local, "connection", None)
+        if connection is None:
+            user = threading.get_ident()
+            connection = websockets.sync.client.connect(
+                f"ws://127.0.0.1:{address['port']}/?user=bench-{user}"
+            )
+            connection.recv()  # session frame
+            local.connection = connection
+        started = time.perf_counter()
+        ttft = None
+        connection.send(_CHAT[0]["content"])
+        while True:
+            frame = json.loads(connection.recv())
+            if frame["type"] == "delta" and ttft is None:
+                ttft = time.perf_counter() - started
+            elif frame["type"] == "error":
+                raise RuntimeError(frame["error"])
+            elif frame["type"] == "done":
+                return ttft
+
+    return call
+
+
+SUBSYSTEMS = {
+    "http_chat": setup_http_chat,
+    "http_embed": setup_http_embed,
+    "ollama_chat": setup_ollama_chat,
+    "openai_chat": setup_openai_chat,
+    "openai_stream": setup_openai_stream,
+    "tool_loop": setup_tool_loop,
+    "embeddings": setup_embeddings,
+    "movie_chat_ws": setup_movie_chat_ws,
+}
+
+
+# ------------------------- driver -------------------------
+
+
+def measure(name: str, call, requests: int, concurrency: int) -> Result:
+    result = Result(name=name, requests=requests)
+    lock = threading.Lock()
+
+    def one(_):
+        started = time.perf_counter()
+        try:
+            ttft = call()
+        except Exception:
+            with lock:
+                result.errors += 1
+            return
+        elapsed = time.perf_counter() - started
+        with lock:
+            result.latencies_ms.append(elapsed * 1e3)
+            if ttft is not None:
+                result.ttfts_ms.append(ttft * 1e3)
+
+    for _ in range(min(concurrency, requests)):  # warm up connections and imports
+        one(None)
+    result.latencies_ms.clear()
+    result.ttfts_ms.clear()
+    result.errors = 0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def run(names: list[str], config: FakeConfig, requests: int, concurrency: int):
+    results = []
+    with BackgroundServer(config) as fake:
+        # llm_clients reads its settings once, on first use
+        os.environ["LLM_BASE_URL"] = f"{fake.base_url}/v1"
+        os.environ.pop("TMDB_BEARER_TOKEN", None)  # keep off the real TMDb API
+        # the samples print their answers; redirect once, redirect_stdout is not
+        # safe to enter from several threads
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name in names:
+                try:
+                    call = SUBSYSTEMS[name](fake.base_url)
+                except ImportError as e:
+                    results.append(Result(name=name, skipped=f"missing {e.name or e}"))
+                    continue
+                results.append(measure(name, call, requests, concurrency))
+    return results
+
+
+def compare(results: list[Result], baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if result.skipped or reference is None:
+            continue
+        summary = result.summary()
+        if summary["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: p95 {summary['p95_ms']:.1f} ms "
+                f"vs baseline {reference['p95_ms']:.1f} ms"
+            )
+        if summary["throughput"] < reference["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: throughput {summary['throughput']:.1f}/s "
+                f"vs baseline {reference['throughput']:.1f}/s"
+            )
+        if summary["errors"] > reference.get("errors", 0):
+            regressions.append(f"{result.name}: {summary['errors']} errors")
+    return regressions
+
+
+def print_results(results: list[Result], baseline: dict) -> None:
+    print(
+        f"{'subsystem':<15}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'ttft p50':>10}{'errors':>8}{'base p95':>10}"
+    )
+    for result in results:
+        if result.skipped:
+            print(f"{result.name:<15}skipped ({result.skipped})")
+            continue
+        s = result.summary()
+        reference = baseline.get(result.name)
+        base = f"{reference['p95_ms']:10.1f}" if reference else f"{'-':>10}"
+        ttft = f"{s['ttft_p50_ms']:10.1f}" if "ttft_p50_ms" in s else f"{'-':>10}"
+        print(
+            f"{result.name:<15}{s['throughput']:9.1f}{s['p50_ms']:9.1f}"
+            f"{s['p95_ms']:9.1f}{s['p99_ms']:9.1f}{ttft}{s['errors']:8d}{base}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", help="comma-separated subsystems")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--ttft-ms", type=float, default=20.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=500.0)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(SUBSYSTEMS)
+    unknown = set(names) - set(SUBSYSTEMS)
+    if unknown:
+        parser.error(f"unknown subsystems: {', '.join(sorted(unknown))}")
+
+    config = FakeConfig(
+        ttft_ms=args.ttft_ms, tokens_per_sec=args.tokens_per_sec, embedding_ms=1.0
+    )
+    settings = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "ttft_ms": args.ttft_ms,
+        "tokens_per_sec": args.tokens_per_sec,
+    }
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if stored and not args.update_baseline and stored.get("settings") != settings:
+        print(f"baseline was recorded with {stored.get('settings')}, not {settings}")
+        return 2
+    baseline = stored.get("subsystems", {})
+
+    results = run(names, config, args.requests, args.concurrency)
+    print_results(results, baseline)
+
+    if args.update_baseline:
+        subsystems = dict(baseline)
+        subsystems.update({r.name: r.summary() for r in results if not r.skipped})
+        args.baseline.write_text(
+            json.dumps({"settings": settings, "subsystems": subsystems}, indent=2)
+            + "\n"
+        )
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+LLM router against several local fake endpoints with different speeds.
+
+Three fakes (fast, medium, slow) each serve --parallel requests at a time,
+hold one model at a time, and take --load-ms to switch models. The same mixed-model workload is run
+  single       everything on the fast endpoint (the samples' old setup)
+  no-affinity  router, least-outstanding only
+  router       router with model affinity
+and then once more with the fast endpoint failing every request halfway
+through, to show failover and the circuit breaker.
+
+  python -m src.samples.fake_llm.router_benchmark --requests 300 --concurrency 12
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from openai import OpenAI
+
+from src.samples.fake_llm.benchmark import percentile
+from src.samples.fake_llm.server import BackgroundServer, FakeConfig
+from src.samples.llm_router import Router, RouterTransport
+
+_SPEEDS = {"fast": (20, 400), "medium": (60, 150), "slow": (150, 60)}
+
+
+def client_for(router: Router) -> OpenAI:
+    transport = RouterTransport(httpx.HTTPTransport(), router)
+    return OpenAI(
+        base_url=f"{router.endpoints[0].url}/v1",
+        api_key="fake",
+        max_retries=0,
+        http_client=httpx.Client(transport=transport, timeout=30),
+    )
+
+
+def run(client: OpenAI, models, requests: int, concurrency: int, on_half=None):
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    # chat sessions stick to a model for a while: runs of 8 requests per model
+    runs = [[m] * 8 for m in models] * max(1, requests // (8 * len(models)))
+    random.Random(7).shuffle(runs)
+    workload = [model for run in runs for model in run]
+
+    def one(i):
+        nonlocal errors
+        if on_half and i == len(workload) // 2:
+            on_half()
+        started = time.perf_counter()
+        try:
+            client.chat.completions.create(
+                model=workload[i], messages=[{"role": "user", "content": "hi"}]
+            )
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            latencies.append((time.perf_counter() - started) * 1e3)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(len(workload))))
+    return len(workload), time.perf_counter() - started, latencies, errors
+
+
+def scenario(name, fakes, models, args, single=False, affinity=True, on_half=None):
+    for fake in fakes.values():
+        fake.fake.loaded.clear()
+        fake.fake.stats["loads"] = 0
+        fake.fake.config.fail_rate = 0.0
+    endpoints = (
+        [fakes["fast"].base_url] if single else [f.base_url for f in fakes.values()]
+    )
+    router = Router(
+        endpoints,
+        health_sec=0.5,
+        cooldown_sec=2.0,
+        affinity_slack=args.affinity_slack if affinity else -(10**6),
+    )
+    router.start_health_checks()
+    count, elapsed, latencies, errors = run(
+        client_for(router), models, args.requests, args.concurrency, on_half
+    )
+    router.close()
+    loads = sum(f.fake.stats["loads"] for f in fakes.values())
+    print(
+        f"{name:<12}{count / elapsed:8.1f}{percentile(latencies, 50):9.0f}"
+        f"{percentile(latencies, 95):9.0f}{errors:8d}{loads:7d}   "
+        + " ".join(f"{s['requests']:>4}/{s['failures']}" for s in router.stats())
+    )
+    return router
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=240)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--load-ms", type=float, default=400.0)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--affinity-slack", type=int, default=6)
+    args = parser.parse_args()
+
+    models = ["gpt-oss:20b", "qwen2.5:7b", "llama3.1:8b"]
+    fakes = {
+        name: BackgroundServer(
+            FakeConfig(
+                ttft_ms=ttft,
+                tokens_per_sec=tps,
+                load_ms=args.load_ms,
+                max_loaded=1,
+                parallel=args.parallel,
+                fail_status=503,
+                seed=1,
+            )
+        ).start()
+        for name, (ttft, tps) in _SPEEDS.items()
+    }
+    try:
+        print(
+            f"{'scenario':<12}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}"
+            f"{'loads':>7}   requests/failures per endpoint ({', '.join(fakes)})"
+        )
+        scenario("single", fakes, models, args, single=True)
+        scenario("no-affinity", fakes, models, args, affinity=False)
+        scenario("router", fakes, models, args)
+
+        def break_fast():
+            fakes["fast"].fake.config.fail_rate = 1.0
+
+        router = scenario("failover", fakes, models, args, on_half=break_fast)
+        print(json.dumps(router.stats()[0], indent=None))
+    finally:
+        for fake in fakes.values():
+            fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Semantic cache hit rate, false hits and latency across similarity thresholds.
+
+The workload mixes paraphrases of the same question ("recommend horror
+movies", "any good horror films?") with look-alikes that need another answer
+("recommend horror movies for kids"). Every prompt belongs to a known
+question, so false hits are counted exactly and compared with what the
+audit (run on every hit here) reports.
+
+Embeddings come from the fake server in --embedding-mode words: texts that
+share words are similar, which is cruder than nomic-embed-text but enough to
+show the threshold trade-off; near 0.99 it is about what an exact-match cache
+on normalized text would get. Misses call the fake chat endpoint for their
+latency; the answer text is per question, so the audit can tell answers apart.
+
+  python -m src.samples.fake_llm.semantic_cache_benchmark --requests 400
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import time
+
+from src.samples.fake_llm.benchmark import percentile
+from src.samples.fake_llm.server import BackgroundServer, FakeConfig
+
+_GENRES = ["horror", "comedy", "sci-fi", "crime", "romance", "western", "war", "anime"]
+_PHRASINGS = [
+    "recommend {g} movies",
+    "Recommend some {g} movies, please",
+    "Hi, can you recommend {g} movies?",
+    "any good {g} movies?",
+    "recommend good {g} movies",
+    "{g} movie recommendations",
+    "what are the best {g} movies",
+]
+# same words plus a qualifier: a different question with a different answer
+_QUALIFIERS = ["", " for kids", " from the 80s"]
+SYSTEM_MESSAGE = "You recommend movies and TV shows"
+
+
+def answer_for(question: tuple[str, str]) -> str:
+    digest = hashlib.blake2b(repr(question).encode(), digest_size=16).hexdigest()
+    titles = ", ".join(f"Film{digest[i:i + 4]}" for i in range(0, 16, 4))
+    return f"Try {titles}."
+
+
+def workload(requests: int, seed: int = 3) -> list[tuple[str, tuple[str, str]]]:
+    rng = random.Random(seed)
+    # popular genres are asked about much more often
+    weights = [1 / (rank + 1) for rank in range(len(_GENRES))]
+    prompts = []
+    for _ in range(requests):
+        genre = rng.choices(_GENRES, weights)[0]
+        qualifier = rng.choices(_QUALIFIERS, [6, 1, 1])[0]
+        prompt = rng.choice(_PHRASINGS).format(g=genre) + qualifier
+        prompts.append((prompt, (genre, qualifier)))
+    return prompts
+
+
+def run(cache, scope, prompts, client) -> dict:
+    from src.samples.semantic_cache import normalize_prompt
+
+    latencies = []
+    false_hits = 0
+    questions = {}  # normalized prompt stored -> question it answered
+    for prompt, question in prompts:
+        started = time.perf_counter()
+        hit = cache.lookup(prompt, scope)
+        if hit:
+            latencies.append((time.perf_counter() - started) * 1e3)
+            if questions.get(hit.prompt) != question:
+                false_hits += 1
+            if hit.audit:
+                cache.audit(hit, answer_for(question))
+            continue
+        client.chat.completions.create(
+            model="fake", messages=[{"role": "user", "content": prompt}]
+        )
+        generation_ms = (time.perf_counter() - started) * 1e3
+        latencies.append(generation_ms)
+        cache.store(prompt, answer_for(question), scope, generation_ms)
+        questions[normalize_prompt(prompt)] = question
+    stats = cache.stats()
+    stats["true_false_hits"] = false_hits
+    stats["p50"] = percentile(latencies, 50)
+    stats["mean"] = sum(latencies) / len(latencies)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--ttft-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=400.0)
+    parser.add_argument("--thresholds", default="0.7,0.8,0.85,0.9,0.95,0.99", type=str)
+    args = parser.parse_args()
+
+    fake = BackgroundServer(
+        FakeConfig(
+            ttft_ms=args.ttft_ms,
+            tokens_per_sec=args.tokens_per_sec,
+            embedding_mode="words",
+            embedding_dim=256,
+            embedding_ms=2.0,
+        )
+    ).start()
+    os.environ["LLM_BASE_URL"] = f"{fake.base_url}/v1"
+
+    from src.samples.llm_clients import ollama_embeddings, sync_client
+    from src.samples.semantic_cache import SemanticCache
+
+    embed = ollama_embeddings("nomic-embed-text").embed_query
+    client = sync_client()
+    prompts = workload(args.requests)
+    distinct = len({q for _, q in prompts})
+    print(
+        f"{len(prompts)} prompts, {distinct} distinct questions, "
+        f"{len({p for p, _ in prompts})} distinct strings"
+    )
+    print(
+        f"{'threshold':>9}{'hit rate':>10}{'false':>7}{'audited':>9}{'near':>6}"
+        f"{'p50 ms':>8}{'mean ms':>9}{'saved s':>9}"
+    )
+    try:
+        for threshold in (float(t) for t in args.thresholds.split(",")):
+            cache = SemanticCache(
+                embed=embed, threshold=threshold, audit_rate=1.0, seed=1
+            )
+            scope = cache.scope(SYSTEM_MESSAGE, ["TMDbService-get_top_movies_by_genre"])
+            s = run(cache, scope, prompts, client)
+            print(
+                f"{threshold:9.2f}{s['hit_rate']:10.0%}{s['true_false_hits']:7d}"
+                f"{s['false_hits']:9d}{s['near_misses']:6d}{s['p50']:8.1f}"
+                f"{s['mean']:9.0f}{s['saved_ms'] / 1e3:9.1f}"
+            )
+        # size eviction: far fewer slots than questions
+        cache = SemanticCache(embed=embed, threshold=0.85, max_entries=8, audit_rate=0)
+        s = run(cache, cache.scope(SYSTEM_MESSAGE), prompts, client)
+        print(
+            f"max_entries=8 at 0.85: hit rate {s['hit_rate']:.0%}, "
+            f"{s['evicted']} evicted, {s['entries']} entries"
+        )
+        cache = SemanticCache(embed=embed, threshold=0.85, ttl_sec=0.5, audit_rate=0)
+        s = run(cache, cache.scope(SYSTEM_MESSAGE), prompts[:80], client)
+        print(
+            f"ttl_sec=0.5 at 0.85:    hit rate {s['hit_rate']:.0%}, "
+            f"{s['expired']} expired, {s['entries']} entries"
+        )
+    finally:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,627 @@
+"""
+Local stand-in for Ollama / OpenAI-compatible endpoints, for reproducible
+benchmarks and load tests without a model. Chat replies are canned and streamed
+at a configurable pace, tool calls are made when a request offers a tool whose
+name matches the user's words, and embeddings are deterministic unit vectors
+(the same text always gets the same vector). With --embedding-mode words a
+text's vector is the sum of its words' vectors, so texts that share most of
+their words come out similar, which is enough to exercise similarity search.
+
+  python -m src.samples.fake_llm.server --port 11435 --ttft-ms 150 --tokens-per-sec 60
+  LLM_BASE_URL=http://localhost:11435/v1 python -m src.samples.websocket.movie_chat_server
+
+  with BackgroundServer(FakeConfig(ttft_ms=20)) as fake:    # in-process
+      ... fake.base_url ...
+
+Implemented (HTTP/1.1 with keep-alive):
+  POST /api/chat              Ollama chat, NDJSON stream or not, tool calls
+  POST /api/embed             Ollama embeddings (also legacy /api/embeddings)
+  POST /v1/chat/completions   OpenAI chat, SSE stream or not, tool calls
+  POST /v1/embeddings         OpenAI embeddings (float or base64)
+  GET  /api/ps, /api/tags, /v1/models   models loaded so far
+  GET  /api/version
+  GET  /_fake/stats           request / failure counters
+
+Failure injection (fractions of POST requests, drawn from a seeded RNG):
+  --fail-rate   answered with --fail-status (429 carries Retry-After)
+  --stall-rate  held for --stall-sec before being answered
+  --drop-rate   connection closed halfway through the response
+
+Model loading: the first request for a model waits --load-ms, and the last
+--max-loaded models stay resident, as with Ollama's keep-alive. --parallel
+caps requests served at once (OLLAMA_NUM_PARALLEL); the rest queue.
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import functools
+import hashlib
+import json
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+_REPLY = (
+    "Based on what you like, try Heat (1995), Collateral (2004) and Thief (1981): "
+    "tense, stylish crime stories with memorable leads."
+)
+_TOOL_NAME_SKIP = {"get", "set", "by", "the", "for", "and"}
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# capitalized words that do not start a sentence, e.g. city names
+_CAPITALIZED_RE = re.compile(r"(?<=[a-z,] )[A-Z][a-z]+\b")
+
+
+@dataclass
+class FakeConfig:
+    ttft_ms: float = 150.0
+    tokens_per_sec: float = 60.0
+    reply: str = _REPLY
+    embedding_dim: int = 768
+    embedding_ms: float = 5.0
+    embedding_mode: str = "hash"  # or "words"
+    fail_rate: float = 0.0
+    fail_status: int = 500
+    stall_rate: float = 0.0
+    stall_sec: float = 30.0
+    drop_rate: float = 0.0
+    load_ms: float = 0.0
+    parallel: int = 0  # 0 = unlimited
+    max_loaded: int = 3
+    seed: int | None = None
+
+
+class _Dropped(Exception):
+    """Raised to close the connection in the middle of a response."""
+
+
+class FakeLLMServer:
+    def __init__(self, config: FakeConfig | None = None):
+        self.config = config or FakeConfig()
+        self.active = 0
+        self.stats = {
+            "requests": 0,
+            "chat": 0,
+            "tool_calls": 0,
+            "embeddings": 0,
+            "failed": 0,
+            "stalled": 0,
+            "dropped": 0,
+            "loads": 0,
+        }
+        self.loaded: OrderedDict[str, float] = OrderedDict()
+        self._loading: dict[str, asyncio.Event] = {}
+        # like OLLAMA_NUM_PARALLEL: requests beyond this wait in a queue
+        self._slots = (
+            asyncio.Semaphore(self.config.parallel)
+            if self.config.parallel
+            else contextlib.nullcontext()
+        )
+        self._rng = random.Random(self.config.seed)
+
+    # ------------------------- HTTP plumbing -------------------------
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", "0"))
+                body = await reader.readexactly(length) if length else b""
+                await self.route(method, path.split("?")[0], body, writer)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, _Dropped):
+            pass
+        except asyncio.CancelledError:
+            pass  # BackgroundServer.stop closing an idle keep-alive connection
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body, writer) -> None:
+        handlers = {
+            "/api/chat": self.chat,
+            "/v1/chat/completions": self.chat_completions,
+            "/api/embed": self.embed,
+            "/api/embeddings": self.embed,
+            "/v1/embeddings": self.embeddings,
+        }
+        if method == "POST" and path in handlers:
+            self.stats["requests"] += 1
+            self.active += 1
+            try:
+                if await self.inject_failure(writer):
+                    return
+                request = json.loads(body or b"{}")
+                async with self._slots:
+                    await self.load_model(request.get("model", "fake"))
+                    await handlers[path](request, writer, path)
+            finally:
+                self.active -= 1
+        elif method == "GET" and path == "/_fake/stats":
+            await self.send_json(writer, self.stats | {"active": self.active})
+        elif method == "GET" and path == "/v1/models":
+            models = [{"id": m, "object": "model"} for m in self.loaded]
+            await self.send_json(writer, {"object": "list", "data": models})
+        elif method == "GET" and path in ("/api/tags", "/api/ps"):
+            models = [{"name": m, "model": m} for m in self.loaded]
+            await self.send_json(writer, {"models": models})
+        elif method == "GET" and path == "/api/version":
+            await self.send_json(writer, {"version": "0.0.0-fake"})
+        else:
+            await self.send_json(writer, {"error": f"not found: {path}"}, 404)
+
+    async def load_model(self, model: str) -> None:
+        """The first request for a model pays load_ms; max_loaded stay resident (LRU)."""
+        if model in self.loaded:
+            self.loaded.move_to_end(model)
+            return
+        loading = self._loading.get(model)
+        if loading is not None:  # concurrent requests share one load
+            await loading.wait()
+            return
+        loading = self._loading[model] = asyncio.Event()
+        self.stats["loads"] += 1
+        try:
+            await asyncio.sleep(self.config.load_ms / 1000)
+            self.loaded[model] = time.time()
+            while len(self.loaded) > self.config.max_loaded:
+                self.loaded.popitem(last=False)
+        finally:
+            del self._loading[model]
+            loading.set()
+
+    async def inject_failure(self, writer) -> bool:
+        """True when the request was answered with an injected error."""
+        roll = self._rng.random()
+        if roll < self.config.fail_rate:
+            self.stats["failed"] += 1
+            headers = {"Retry-After": "1"} if self.config.fail_status == 429 else {}
+            await self.send_json(
+                writer,
+                {"error": {"message": "injected failure", "type": "fake_error"}},
+                self.config.fail_status,
+                headers,
+            )
+            return True
+        if roll < self.config.fail_rate + self.config.stall_rate:
+            self.stats["stalled"] += 1
+            await asyncio.sleep(self.config.stall_sec)
+        return False
+
+    def should_drop(self) -> bool:
+        if self.config.drop_rate and self._rng.random() < self.config.drop_rate:
+            self.stats["dropped"] += 1
+            return True
+        return False
+
+    @staticmethod
+    async def send_json(
+        writer, payload: dict, status: int = 200, headers: dict | None = None
+    ) -> None:
+        data = json.dumps(payload).encode()
+        extra = "".join(f"{k}: {v}\r\n" for k, v in (headers or {}).items())
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            "Content-Type: application/json\r\n"
+            f"{extra}Content-Length: {len(data)}\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def send_chunk(writer, payload: dict, sse: bool = False) -> None:
+        data = json.dumps(payload).encode()
+        data = b"data: " + data + b"\n\n" if sse else data + b"\n"
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def start_stream(writer, content_type: str) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            + f"Content-Type: {content_type}\r\n".encode()
+            + b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+
+    @staticmethod
+    async def end_stream(writer, last: bytes = b"") -> None:
+        if last:
+            writer.write(f"{len(last):x}\r\n".encode() + last + b"\r\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def words(self) -> list[str]:
+        words = self.config.reply.split(" ")
+        return [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+    @property
+    def token_delay(self) -> float:
+        return 1 / self.config.tokens_per_sec if self.config.tokens_per_sec else 0
+
+    # ------------------------- Tool calls -------------------------
+
+    def pick_tool(self, request: dict) -> tuple[str, dict] | None:
+        """
+        Call the first offered tool whose name shares a word with the last user
+        message, unless the conversation already ends with a tool result.
+        """
+        tools = request.get("tools") or []
+        messages = request.get("messages") or []
+        if not tools or not messages or messages[-1].get("role") != "user":
+            return None
+        text = str(messages[-1].get("content") or "")
+        lowered = text.lower()
+        for tool in tools:
+            function = tool.get("function", tool)
+            name = function.get("name", "")
+            parts = {
+                p for p in re.split(r"[^a-z0-9]+", name.lower()) if len(p) > 2
+            } - _TOOL_NAME_SKIP
+            if any(p in lowered for p in parts):
+                self.stats["tool_calls"] += 1
+                return name, _fake_arguments(function.get("parameters") or {}, text)
+        return None
+
+    # ------------------------- /api/chat -------------------------
+
+    async def chat(self, request: dict, writer, path: str) -> None:
+        self.stats["chat"] += 1
+        started = time.perf_counter()
+        model = request.get("model", "fake")
+        words = self.words()
+        tool = self.pick_tool(request)
+        prompt_tokens = _prompt_tokens(request)
+        await asyncio.sleep(self.config.ttft_ms / 1000)
+
+        def final() -> dict:
+            return {
+                "model": model,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "done": True,
+                "done_reason": "stop",
+                "total_duration": int((time.perf_counter() - started) * 1e9),
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": 1 if tool else len(words),
+            }
+
+        tool_message = None
+        if tool:
+            words = []
+            tool_message = {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [{"function": {"name": tool[0], "arguments": tool[1]}}],
+            }
+
+        if not request.get("stream", True):
+            await asyncio.sleep(self.token_delay * len(words))
+            if self.should_drop():
+                raise _Dropped()
+            payload = final()
+            payload["message"] = tool_message or {
+                "role": "assistant",
+                "content": self.config.reply,
+            }
+            await self.send_json(writer, payload)
+            return
+
+        self.start_stream(writer, "application/x-ndjson")
+        drop_at = len(words) // 2 if self.should_drop() else None
+        for i, word in enumerate(words):
+            if i == drop_at:
+                raise _Dropped()
+            await self.send_chunk(
+                writer,
+                {
+                    "model": model,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "message": {"role": "assistant", "content": word},
+                    "done": False,
+                },
+            )
+            await asyncio.sleep(self.token_delay)
+        payload = final()
+        payload["message"] = tool_message or {"role": "assistant", "content": ""}
+        await self.send_chunk(writer, payload)
+        await self.end_stream(writer)
+
+    # ------------------------- /v1/chat/completions -------------------------
+
+    async def chat_completions(self, request: dict, writer, path: str) -> None:
+        self.stats["chat"] += 1
+        model = request.get("model", "fake")
+        words = self.words()
+        tool = self.pick_tool(request)
+        tool_calls = None
+        if tool:
+            words = []
+            tool_calls = [
+                {
+                    "index": 0,
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": tool[0], "arguments": json.dumps(tool[1])},
+                }
+            ]
+        finish_reason = "tool_calls" if tool else "stop"
+        usage = {
+            "prompt_tokens": _prompt_tokens(request),
+            "completion_tokens": len(words) or 1,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "created": int(time.time()),
+            "model": model,
+        }
+        await asyncio.sleep(self.config.ttft_ms / 1000)
+
+        if not request.get("stream", False):
+            await asyncio.sleep(self.token_delay * len(words))
+            if self.should_drop():
+                raise _Dropped()
+            message = {"role": "assistant", "content": None if tool else "".join(words)}
+            if tool_calls:
+                message["tool_calls"] = [
+                    {k: v for k, v in c.items() if k != "index"} for c in tool_calls
+                ]
+            await self.send_json(
+                writer,
+                base
+                | {
+                    "object": "chat.completion",
+                    "choices": [
+                        {"index": 0, "message": message, "finish_reason": finish_reason}
+                    ],
+                    "usage": usage,
+                },
+            )
+            return
+
+        self.start_stream(writer, "text/event-stream")
+        chunk = base | {"object": "chat.completion.chunk"}
+        deltas = [{"role": "assistant", "tool_calls": tool_calls}] if tool else []
+        deltas += [
+            {"content": w} | ({"role": "assistant"} if i == 0 else {})
+            for i, w in enumerate(words)
+        ]
+        drop_at = max(1, len(deltas) // 2) if self.should_drop() else None
+        for i, delta in enumerate(deltas):
+            if i == drop_at:
+                raise _Dropped()
+            await self.send_chunk(
+                writer,
+                chunk
+                | {"choices": [{"index": 0, "delta": delta, "finish_reason": None}]},
+                sse=True,
+            )
+            await asyncio.sleep(self.token_delay)
+        last = chunk | {
+            "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]
+        }
+        if (request.get("stream_options") or {}).get("include_usage"):
+            await self.send_chunk(writer, last, sse=True)
+            last = chunk | {"choices": [], "usage": usage}
+        await self.send_chunk(writer, last, sse=True)
+        await self.end_stream(writer, b"data: [DONE]\n\n")
+
+    # ------------------------- Embeddings -------------------------
+
+    async def embed(self, request: dict, writer, path: str) -> None:
+        texts = request.get("input", request.get("prompt", ""))
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        self.stats["embeddings"] += len(texts)
+        await asyncio.sleep(self.config.embedding_ms / 1000)
+        vectors = [self.vector(t) for t in texts]
+        if self.should_drop():
+            raise _Dropped()
+        if path == "/api/embeddings":  # legacy, one prompt
+            await self.send_json(writer, {"embedding": vectors[0]})
+            return
+        await self.send_json(
+            writer,
+            {
+                "model": request.get("model", "fake"),
+                "embeddings": vectors,
+                "prompt_eval_count": sum(len(t) // 4 for t in texts),
+            },
+        )
+
+    async def embeddings(self, request: dict, writer, path: str) -> None:
+        texts = request.get("input", "")
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        self.stats["embeddings"] += len(texts)
+        await asyncio.sleep(self.config.embedding_ms / 1000)
+        as_base64 = request.get("encoding_format") == "base64"
+        data = []
+        for i, text in enumerate(texts):
+            vector = self.vector(str(text))
+            if as_base64:
+                packed = struct.pack(f"<{len(vector)}f", *vector)
+                vector = base64.b64encode(packed).decode()
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+        if self.should_drop():
+            raise _Dropped()
+        tokens = sum(len(str(t)) // 4 for t in texts)
+        await self.send_json(
+            writer,
+            {
+                "object": "list",
+                "data": data,
+                "model": request.get("model", "fake"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            },
+        )
+
+    def vector(self, text: str) -> list[float]:
+        dim = self.config.embedding_dim
+        if self.config.embedding_mode != "words":
+            return list(_unit_vector(text, dim))
+        values = [0.0] * dim
+        for word in _WORD_RE.findall(text.lower()):
+            # crude plural folding: "movies" and "movie" are the same word
+            word = word[:-1] if len(word) > 3 and word.endswith("s") else word
+            values = [v + w for v, w in zip(values, _unit_vector(word, dim))]
+        norm = sum(v * v for v in values) ** 0.5 or 1.0
+        return [v / norm for v in values]
+
+
+@functools.lru_cache(maxsize=4096)
+def _unit_vector(text: str, dim: int) -> tuple[float, ...]:
+    digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+    rng = random.Random(int.from_bytes(digest, "big"))
+    values = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in values) ** 0.5 or 1.0
+    return tuple(v / norm for v in values)
+
+
+def _prompt_tokens(request: dict) -> int:
+    return sum(len(str(m.get("content", ""))) // 4 for m in request.get("messages", []))
+
+
+def _fake_arguments(schema: dict, text: str) -> dict:
+    """Schema-shaped arguments filled from the user's words where possible."""
+    properties = schema.get("properties") or {}
+    names = schema.get("required") or list(properties)
+    numbers = _NUMBER_RE.findall(text)
+    words = _CAPITALIZED_RE.findall(text) or ["Seoul"]
+    arguments = {}
+    for name in names:
+        kind = (properties.get(name) or {}).get("type", "string")
+        if kind in ("number", "integer"):
+            value = float(numbers.pop(0)) if numbers else 1
+            arguments[name] = int(value) if kind == "integer" else value
+        elif kind == "boolean":
+            arguments[name] = True
+        else:
+            arguments[name] = words.pop(0) if words else "test"
+    return arguments
+
+
+class BackgroundServer:
+    """Runs a FakeLLMServer on its own event loop thread (port 0 = any free port)."""
+
+    def __init__(
+        self, config: FakeConfig | None = None, host: str = "127.0.0.1", port: int = 0
+    ):
+        self.fake = FakeLLMServer(config)
+        self.host = host
+        self.port = port
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "BackgroundServer":
+        ready = threading.Event()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            server = self._loop.run_until_complete(
+                asyncio.start_server(
+                    self.fake.handle, self.host, self.port, backlog=1024
+                )
+            )
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+            server.close()
+            # close keep-alive connections still parked in handle()
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="fake-llm", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "BackgroundServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+async def serve(host: str, port: int, config: FakeConfig) -> None:
+    fake = FakeLLMServer(config)
+    server = await asyncio.start_server(fake.handle, host, port, backlog=1024)
+    print(f"Fake LLM listening on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def add_config_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--ttft-ms", type=float, default=150.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=60.0)
+    parser.add_argument("--embedding-dim", type=int, default=768)
+    parser.add_argument("--embedding-ms", type=float, default=5.0)
+    parser.add_argument("--embedding-mode", choices=["hash", "words"], default="hash")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--fail-status", type=int, default=500)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-sec", type=float, default=30.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--load-ms", type=float, default=0.0)
+    parser.add_argument("--parallel", type=int, default=0)
+    parser.add_argument("--max-loaded", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeConfig:
+    return FakeConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        embedding_dim=args.embedding_dim,
+        embedding_ms=args.embedding_ms,
+        embedding_mode=args.embedding_mode,
+        fail_rate=args.fail_rate,
+        fail_status=args.fail_status,
+        stall_rate=args.stall_rate,
+        stall_sec=args.stall_sec,
+        drop_rate=args.drop_rate,
+        load_ms=args.load_ms,
+        parallel=args.parallel,
+        max_loaded=args.max_loaded,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    add_config_args(parser)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, config_from_args(args)))
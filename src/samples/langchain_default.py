@@ -1,7 +1,15 @@
+import os
+import tempfile
+
 import chromadb
-from langchain_ollama import OllamaEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from src.samples.llm_clients import ollama_embeddings
+from src.samples.quantized_index import QuantizedIndex
+from src.samples.retrieval_cache import RetrievalCache
+
+EMBED_MODEL = "nomic-embed-text"
+
 if __name__ == "__main__":
     with open("./resources/text/ai_news_1.txt") as f:
         raw_text = f.read()
@@ -9,27 +17,63 @@ if __name__ == "__main__":
     splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
     docs = splitter.create_documents([raw_text])
 
-    embeddings = OllamaEmbeddings(model="nomic-embed-text")
+    embeddings = ollama_embeddings(EMBED_MODEL)
     texts = [doc.page_content for doc in docs]
     vectors = embeddings.embed_documents(texts)
 
-    client = chromadb.Client()
+    query = "Who is positive leaders for AGI?"
+    k = 3
+    # RETRIEVAL_CACHE=1 caches the query embedding and the top-k chunk ids
+    # across runs, keyed on a collection version that ingestion bumps
+    cache = RetrievalCache.from_env()
+    mode = os.getenv("VECTOR_INDEX_MODE")
 
-    # Create collection. get_collection, get_or_create_collection, delete_collection also available!
-    collection = client.create_collection("news")
-    collection.add(
-        ids=[str(i + 1) for i in range(len(docs))],
-        documents=texts,
-        embeddings=vectors,
-    )
+    if mode:
+        # int8 / binary codes in memory, float32 originals memory-mapped and
+        # only read to rescore the best candidates (see quantized_index.py)
+        index = QuantizedIndex(tempfile.mkdtemp(prefix="news-index-"))
+        index.add(vectors)
 
-    query = "Who is positive leaders for AGI?"
-    vectors = embeddings.embed_documents([query])
+        def search(query_vector, k):
+            return index.search(query_vector, k=k)[0]
+
+        def chunk(i):
+            return texts[i]
+
+    else:
+        client = chromadb.Client()
+
+        # Create collection. get_collection, get_or_create_collection, delete_collection also available!
+        collection = client.create_collection("news")
+        collection.add(
+            ids=[str(i + 1) for i in range(len(docs))],
+            documents=texts,
+            embeddings=vectors,
+        )
+
+        def search(query_vector, k):
+            results = collection.query(query_embeddings=[query_vector], n_results=k)
+            return results["ids"][0]
+
+        def chunk(i):
+            return texts[int(i) - 1]
 
-    results = collection.query(
-        query_embeddings=vectors,
-        n_results=3,
-    )
+    if cache:
+        # the same chunks as last run keep the version, and the cached results
+        cache.bump("news", fingerprint=RetrievalCache.fingerprint(texts, EMBED_MODEL))
+        ids = cache.retrieve(
+            "news",
+            query,
+            k,
+            embed=embeddings.embed_query,
+            search=search,
+            model=EMBED_MODEL,
+            params=mode or "chroma",
+        )
+        print(cache.format_summary())
+    else:
+        ids = search(embeddings.embed_query(query), k)
+    results = {"documents": [[chunk(i) for i in ids]]}
 
     for texts in results["documents"]:
         for text in texts:
@@ -0,0 +1,211 @@
+"""
+One place to get LLM clients for the OpenAI-compatible endpoint (Ollama by default).
+
+Every client is built on first use and then shared by the whole process, so
+importing a sample opens nothing and all samples reuse one keep-alive pool:
+
+  from src.samples.llm_clients import sync_client, llm_settings
+
+  completion = sync_client().chat.completions.create(
+      model=llm_settings().model, messages=[...]
+  )
+
+  kernel.add_service(chat_completion_service("ollama-gpt"))   # Semantic Kernel
+
+Async code uses `async_client()`; its connection pool belongs to the event loop
+that first uses it, so keep to one event loop per process (asyncio.run once).
+
+Configuration (all optional):
+  LLM_BASE_URL             OpenAI-compatible endpoint (default http://localhost:11434/v1)
+  LLM_API_KEY              API key (default "ollama"; Ollama accepts any value)
+  LLM_MODEL                model id (default gpt-oss:20b)
+  LLM_TIMEOUT_SEC          read timeout per request (default 600, generations are slow)
+  LLM_CONNECT_TIMEOUT_SEC  connect timeout (default 5)
+  LLM_MAX_CONNECTIONS      pool size (default 32)
+  LLM_KEEPALIVE_SEC        idle keep-alive per connection (default 60)
+  LLM_HTTP2                "0" disables HTTP/2; it is used only when the `h2`
+                           package is installed and the endpoint is https
+  LLM_ENDPOINTS            several endpoints to balance over, see llm_router.py
+  CASSETTE_MODE            record / replay traffic, see src/samples/cassettes
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from src.samples.cassettes import active_cassette
+from src.samples.llm_router import AsyncRouterTransport, RouterTransport, active_router
+
+
+@dataclass(frozen=True)
+class LLMSettings:
+    base_url: str = "http://localhost:11434/v1"
+    api_key: str = "ollama"
+    model: str = "gpt-oss:20b"
+    timeout_sec: float = 600.0
+    connect_timeout_sec: float = 5.0
+    max_connections: int = 32
+    keepalive_sec: float = 60.0
+    http2: bool = True
+
+    @classmethod
+    def from_env(cls) -> LLMSettings:
+        return cls(
+            base_url=os.getenv("LLM_BASE_URL", cls.base_url).rstrip("/"),
+            api_key=os.getenv("LLM_API_KEY", cls.api_key),
+            model=os.getenv("LLM_MODEL", cls.model),
+            timeout_sec=float(os.getenv("LLM_TIMEOUT_SEC", cls.timeout_sec)),
+            connect_timeout_sec=float(
+                os.getenv("LLM_CONNECT_TIMEOUT_SEC", cls.connect_timeout_sec)
+            ),
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", cls.max_connections)),
+            keepalive_sec=float(os.getenv("LLM_KEEPALIVE_SEC", cls.keepalive_sec)),
+            http2=os.getenv("LLM_HTTP2", "1") not in ("0", "false", "no"),
+        )
+
+    @property
+    def use_http2(self) -> bool:
+        # h2 is an optional extra of httpx, and HTTP/2 is only negotiated over TLS
+        return (
+            self.http2
+            and self.base_url.startswith("https://")
+            and importlib.util.find_spec("h2") is not None
+        )
+
+    @property
+    def ollama_host(self) -> str:
+        """Base URL of Ollama's native API (LLM_BASE_URL without /v1)."""
+        return self.base_url.removesuffix("/v1")
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout_sec, connect=self.connect_timeout_sec)
+
+    def transport_options(self) -> dict:
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=self.keepalive_sec,
+            ),
+            "http2": self.use_http2,
+        }
+
+
+@lru_cache(maxsize=1)
+def llm_settings() -> LLMSettings:
+    return LLMSettings.from_env()
+
+
+def _transport() -> httpx.BaseTransport:
+    transport = httpx.HTTPTransport(**llm_settings().transport_options())
+    router = active_router()
+    if router is not None:
+        transport = RouterTransport(transport, router)
+    cassette = active_cassette()
+    if cassette is not None:
+        from src.samples.cassettes.httpx_transport import CassetteTransport
+
+        transport = CassetteTransport(transport, cassette)
+    return transport
+
+
+def _async_transport() -> httpx.AsyncBaseTransport:
+    transport = httpx.AsyncHTTPTransport(**llm_settings().transport_options())
+    router = active_router()
+    if router is not None:
+        transport = AsyncRouterTransport(transport, router)
+    cassette = active_cassette()
+    if cassette is not None:
+        from src.samples.cassettes.httpx_transport import AsyncCassetteTransport
+
+        transport = AsyncCassetteTransport(transport, cassette)
+    return transport
+
+
+_lock = threading.Lock()
+_sync: OpenAI | None = None
+_async: AsyncOpenAI | None = None
+
+
+def sync_client() -> OpenAI:
+    global _sync
+    if _sync is None:
+        with _lock:
+            if _sync is None:
+                settings = llm_settings()
+                _sync = OpenAI(
+                    base_url=settings.base_url,
+                    api_key=settings.api_key,
+                    http_client=httpx.Client(
+                        timeout=settings.timeout(), transport=_transport()
+                    ),
+                )
+    return _sync
+
+
+def async_client() -> AsyncOpenAI:
+    global _async
+    if _async is None:
+        with _lock:
+            if _async is None:
+                settings = llm_settings()
+                _async = AsyncOpenAI(
+                    base_url=settings.base_url,
+                    api_key=settings.api_key,
+                    http_client=httpx.AsyncClient(
+                        timeout=settings.timeout(), transport=_async_transport()
+                    ),
+                )
+    return _async
+
+
+def chat_completion_service(service_id: str = "ollama-gpt"):
+    """Semantic Kernel chat service on the shared async client."""
+    from semantic_kernel.connectors.ai.open_ai import OpenAIChatCompletion
+
+    return OpenAIChatCompletion(
+        ai_model_id=llm_settings().model,
+        service_id=service_id,
+        async_client=async_client(),
+    )
+
+
+def chat_execution_settings(service_id: str = "ollama-gpt", **kwargs):
+    """Prompt execution settings matching `chat_completion_service`."""
+    from semantic_kernel.connectors.ai.open_ai import OpenAIChatPromptExecutionSettings
+
+    return OpenAIChatPromptExecutionSettings(
+        service_id=service_id, ai_model_id=llm_settings().model, **kwargs
+    )
+
+
+def ollama_embeddings(model: str = "nomic-embed-text"):
+    """LangChain OllamaEmbeddings on the configured endpoint (or router)."""
+    from langchain_ollama import OllamaEmbeddings
+
+    settings = llm_settings()
+    return OllamaEmbeddings(
+        model=model,
+        base_url=settings.ollama_host,
+        sync_client_kwargs={"timeout": settings.timeout(), "transport": _transport()},
+        async_client_kwargs={
+            "timeout": settings.timeout(),
+            "transport": _async_transport(),
+        },
+    )
+
+
+def close() -> None:
+    """Close the shared sync client (the async one is closed with its event loop)."""
+    global _sync
+    with _lock:
+        if _sync is not None:
+            _sync.close()
+            _sync = None
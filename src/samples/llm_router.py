@@ -0,0 +1,440 @@
+"""
+Spread LLM requests over several Ollama / OpenAI-compatible endpoints.
+
+When LLM_ENDPOINTS is set, every client from `llm_clients` (chat, embeddings,
+Semantic Kernel, LangChain's OllamaEmbeddings) sends its requests through one
+process-wide Router instead of straight to LLM_BASE_URL's host:
+
+  LLM_ENDPOINTS=http://gpu1:11434,http://gpu2:11434 python -m src.samples.agent_tools.movie_chat
+
+Each request goes to an endpoint that is
+  1. up: its last health check passed and its circuit is not open,
+  2. already holding the request's model (affinity), unless every such endpoint
+     has more than LLM_AFFINITY_SLACK requests in flight beyond the least busy one,
+  3. least busy: the fewest requests in flight, ties going to the lower
+     average time to response headers.
+
+A connection error or a 5xx response counts as a failure. The request is then
+tried on the next endpoint, as long as the caller has not received a
+response yet. After LLM_BREAKER_FAILURES consecutive failures an endpoint's
+circuit opens for LLM_BREAKER_COOLDOWN_SEC. After that a single trial request
+is let through, and its outcome closes or reopens the circuit. A 429 is retried
+elsewhere but is not counted against the endpoint, and neither is a request
+the caller cancelled (a trial that is cancelled lets the next request try).
+
+Health checks poll GET /api/ps (the models Ollama has loaded) on a daemon thread
+every LLM_HEALTH_SEC. Between checks, routing a request marks its model as
+loaded on that endpoint. The least recently used model is then dropped once
+the endpoint holds more models than /api/ps has ever listed, as Ollama would
+unload it. Endpoints without /api/ps only learn from requests.
+
+Configuration:
+  LLM_ENDPOINTS              comma-separated origins (scheme://host:port); the
+                             path of each request (e.g. /v1/...) is kept
+  LLM_HEALTH_SEC             health check interval (default 10, 0 disables)
+  LLM_BREAKER_FAILURES       consecutive failures that open a circuit (default 3)
+  LLM_BREAKER_COOLDOWN_SEC   seconds before a trial request (default 15)
+  LLM_AFFINITY_SLACK         extra in-flight requests accepted to reach an
+                             endpoint with the model loaded (default 6; a
+                             model load costs more than a short queue)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+
+import httpx
+
+_OK, _FAILED, _BUSY = "ok", "failed", "busy"
+_ABANDONED = "abandoned"  # cancelled or raised by the caller's side; not counted
+
+
+@dataclass(eq=False)
+class Endpoint:
+    url: httpx.URL
+    in_flight: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    opened_at: float | None = None  # circuit open since (monotonic)
+    trial: bool = False  # the one half-open request is in flight
+    healthy: bool = True
+    # models believed loaded, least recently used first; bounded by the most
+    # models /api/ps has ever listed, since the server evicts beyond that
+    models: OrderedDict[str, None] = field(default_factory=OrderedDict)
+    capacity: int | None = None
+    loading: Counter = field(default_factory=Counter)  # models of requests in flight
+    latency_ms: float | None = None  # moving average, time to headers
+
+    def served(self, model: str) -> None:
+        self.models[model] = None
+        self.models.move_to_end(model)
+        while self.capacity and len(self.models) > self.capacity:
+            self.models.popitem(last=False)
+
+    def state(self, now: float, cooldown_sec: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if now - self.opened_at < cooldown_sec else "half-open"
+
+
+class Router:
+    def __init__(
+        self,
+        endpoints: list[str],
+        health_sec: float = 10.0,
+        breaker_failures: int = 3,
+        cooldown_sec: float = 15.0,
+        affinity_slack: int = 6,
+    ):
+        if not endpoints:
+            raise ValueError("Router needs at least one endpoint")
+        self.endpoints = [Endpoint(httpx.URL(url.rstrip("/"))) for url in endpoints]
+        self.health_sec = health_sec
+        self.breaker_failures = breaker_failures
+        self.cooldown_sec = cooldown_sec
+        self.affinity_slack = affinity_slack
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread: threading.Thread | None = None
+
+    @classmethod
+    def from_env(cls) -> Router | None:
+        endpoints = [
+            url.strip()
+            for url in os.getenv("LLM_ENDPOINTS", "").split(",")
+            if url.strip()
+        ]
+        if not endpoints:
+            return None
+        return cls(
+            endpoints,
+            health_sec=float(os.getenv("LLM_HEALTH_SEC", "10")),
+            breaker_failures=int(os.getenv("LLM_BREAKER_FAILURES", "3")),
+            cooldown_sec=float(os.getenv("LLM_BREAKER_COOLDOWN_SEC", "15")),
+            affinity_slack=int(os.getenv("LLM_AFFINITY_SLACK", "6")),
+        )
+
+    # ------------------------- routing -------------------------
+
+    def pick(self, model: str | None, exclude: set[Endpoint]) -> Endpoint | None:
+        """Reserve the best endpoint for one request (release it when done)."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = []
+            for endpoint in self.endpoints:
+                if endpoint in exclude or not endpoint.healthy:
+                    continue
+                state = endpoint.state(now, self.cooldown_sec)
+                if state == "open" or (state == "half-open" and endpoint.trial):
+                    continue
+                candidates.append(endpoint)
+            if not candidates:
+                return None
+
+            def load(e: Endpoint):
+                return e.in_flight, e.latency_ms or 0.0
+
+            chosen = min(candidates, key=load)
+            warm = [e for e in candidates if model and model in e.models]
+            if warm:
+                best_warm = min(warm, key=load)
+                if best_warm.in_flight - chosen.in_flight <= self.affinity_slack:
+                    chosen = best_warm
+
+            if chosen.state(now, self.cooldown_sec) == "half-open":
+                chosen.trial = True
+            chosen.in_flight += 1
+            chosen.requests += 1
+            if model:
+                # it is loading the model now; the next request for it should
+                # follow rather than start a second load elsewhere
+                chosen.served(model)
+                chosen.loading[model] += 1
+            return chosen
+
+    def release(
+        self,
+        endpoint: Endpoint,
+        outcome: str,
+        model: str | None = None,
+        headers_ms: float | None = None,
+    ) -> None:
+        with self._lock:
+            endpoint.in_flight -= 1
+            if model:
+                endpoint.loading[model] -= 1
+            trial, endpoint.trial = endpoint.trial, False
+            if outcome == _OK:
+                endpoint.consecutive_failures = 0
+                endpoint.opened_at = None
+                if headers_ms is not None:
+                    previous = endpoint.latency_ms
+                    endpoint.latency_ms = (
+                        headers_ms
+                        if previous is None
+                        else previous * 0.8 + headers_ms * 0.2
+                    )
+            elif outcome == _FAILED:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if trial or endpoint.consecutive_failures >= self.breaker_failures:
+                    endpoint.opened_at = time.monotonic()
+
+    # ------------------------- health -------------------------
+
+    def check(self, client: httpx.Client) -> None:
+        """One health check pass over all endpoints."""
+        for endpoint in self.endpoints:
+            try:
+                response = client.get(endpoint.url.join("/api/ps"))
+                healthy = response.status_code < 500
+                models = None
+                if response.status_code == 200:
+                    models = [
+                        m.get("model") or m.get("name")
+                        for m in response.json().get("models", [])
+                    ]
+            except (httpx.HTTPError, ValueError):
+                healthy, models = False, None
+            with self._lock:
+                endpoint.healthy = healthy
+                if models is not None:
+                    endpoint.capacity = max(endpoint.capacity or 1, len(models))
+                    endpoint.models = OrderedDict.fromkeys(models)
+                    # /api/ps does not list a model that is still loading
+                    for model in +endpoint.loading:
+                        endpoint.served(model)
+
+    def start_health_checks(self) -> None:
+        if self.health_sec <= 0 or self._health_thread is not None:
+            return
+
+        def run() -> None:
+            with httpx.Client(timeout=httpx.Timeout(2.0)) as client:
+                while not self._stop.is_set():
+                    self.check(client)
+                    self._stop.wait(self.health_sec)
+
+        self._health_thread = threading.Thread(
+            target=run, name="llm-health", daemon=True
+        )
+        self._health_thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "endpoint": str(e.url),
+                    "state": e.state(now, self.cooldown_sec),
+                    "healthy": e.healthy,
+                    "in_flight": e.in_flight,
+                    "requests": e.requests,
+                    "failures": e.failures,
+                    "latency_ms": round(e.latency_ms or 0.0, 1),
+                    "models": list(e.models),
+                }
+                for e in self.endpoints
+            ]
+
+
+@lru_cache(maxsize=1)
+def active_router() -> Router | None:
+    """The process-wide router configured by LLM_ENDPOINTS, or None."""
+    router = Router.from_env()
+    if router is not None:
+        router.start_health_checks()
+    return router
+
+
+# ------------------------- httpx transports -------------------------
+
+
+def _model(request: httpx.Request) -> str | None:
+    if not request.content:
+        return None
+    try:
+        body = json.loads(request.content)
+    except ValueError:
+        return None
+    return body.get("model") if isinstance(body, dict) else None
+
+
+def _retarget(request: httpx.Request, endpoint: Endpoint) -> httpx.Request:
+    headers = request.headers.copy()
+    headers.pop("host", None)  # set again from the new URL
+    url = request.url.copy_with(
+        scheme=endpoint.url.scheme, host=endpoint.url.host, port=endpoint.url.port
+    )
+    return httpx.Request(
+        request.method,
+        url,
+        headers=headers,
+        content=request.content,
+        extensions=request.extensions,
+    )
+
+
+def _outcome(status: int) -> str:
+    if status == 429:
+        return _BUSY
+    return _FAILED if status >= 500 else _OK
+
+
+def _no_endpoint(request: httpx.Request, error: Exception | None):
+    return httpx.ConnectError(
+        f"no LLM endpoint available for {request.url.path}"
+        + (f" (last error: {error})" if error else ""),
+        request=request,
+    )
+
+
+def _replay_failure(
+    request: httpx.Request, response: httpx.Response, body: bytes
+) -> httpx.Response:
+    headers = response.headers.copy()
+    for name in ("content-length", "transfer-encoding"):
+        headers.pop(name, None)
+    return httpx.Response(
+        response.status_code, headers=headers, content=body, request=request
+    )
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Keeps the endpoint's request in flight until the body is fully read."""
+
+    def __init__(self, stream: httpx.SyncByteStream, release):
+        self.stream = stream
+        self.release = release
+
+    def __iter__(self):
+        yield from self.stream
+
+    def close(self) -> None:
+        try:
+            self.stream.close()
+        finally:
+            if self.release:
+                self.release()
+                self.release = None
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self.stream = stream
+        self.release = release
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            if self.release:
+                self.release()
+                self.release = None
+
+
+class RouterTransport(httpx.BaseTransport):
+    def __init__(self, inner: httpx.BaseTransport, router: Router):
+        self.inner = inner
+        self.router = router
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        model = _model(request)
+        tried: set[Endpoint] = set()
+        failed, error = None, None
+        while (endpoint := self.router.pick(model, tried)) is not None:
+            tried.add(endpoint)
+            started = time.perf_counter()
+            try:
+                response = self.inner.handle_request(_retarget(request, endpoint))
+            except httpx.TransportError as e:
+                self.router.release(endpoint, _FAILED, model)
+                error = e
+                continue
+            except BaseException:
+                self.router.release(endpoint, _ABANDONED, model)
+                raise
+            outcome = _outcome(response.status_code)
+            if outcome != _OK:
+                # keep the error body to return it if no other endpoint is left
+                try:
+                    body = b"".join(response.stream)
+                    response.close()
+                finally:
+                    self.router.release(endpoint, outcome, model)
+                failed = (response, body)
+                continue
+            headers_ms = (time.perf_counter() - started) * 1e3
+            response.stream = _ReleasingStream(
+                response.stream,
+                partial(self.router.release, endpoint, _OK, model, headers_ms),
+            )
+            return response
+        if failed is not None:
+            return _replay_failure(request, *failed)
+        raise _no_endpoint(request, error)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class AsyncRouterTransport(httpx.AsyncBaseTransport):
+    def __init__(self, inner: httpx.AsyncBaseTransport, router: Router):
+        self.inner = inner
+        self.router = router
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        model = _model(request)
+        tried: set[Endpoint] = set()
+        failed, error = None, None
+        while (endpoint := self.router.pick(model, tried)) is not None:
+            tried.add(endpoint)
+            started = time.perf_counter()
+            try:
+                response = await self.inner.handle_async_request(
+                    _retarget(request, endpoint)
+                )
+            except httpx.TransportError as e:
+                self.router.release(endpoint, _FAILED, model)
+                error = e
+                continue
+            except BaseException:
+                self.router.release(endpoint, _ABANDONED, model)
+                raise
+            outcome = _outcome(response.status_code)
+            if outcome != _OK:
+                try:
+                    body = b"".join([chunk async for chunk in response.stream])
+                    await response.aclose()
+                finally:
+                    self.router.release(endpoint, outcome, model)
+                failed = (response, body)
+                continue
+            headers_ms = (time.perf_counter() - started) * 1e3
+            response.stream = _AsyncReleasingStream(
+                response.stream,
+                partial(self.router.release, endpoint, _OK, model, headers_ms),
+            )
+            return response
+        if failed is not None:
+            return _replay_failure(request, *failed)
+        raise _no_endpoint(request, error)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
@@ -1,11 +1,11 @@
-from openai import OpenAI
+from src.samples.llm_clients import llm_settings, sync_client
 
 
 if __name__ == "__main__":
-    client = OpenAI(base_url="http://localhost:11434/v1", api_key="notneeded")
+    client = sync_client()
 
     completion = client.chat.completions.create(
-        model="gpt-oss:20b",
+        model=llm_settings().model,
         messages=[
             {
                 "role": "system",
@@ -0,0 +1,273 @@
+"""
+Vector index that keeps only quantized codes in memory and the float32
+originals memory-mapped on disk.
+
+A query is scored against the compact codes first (int8: one byte per
+dimension, binary: one bit), then the best `k * rescore` candidates are read
+back from the float32 file and ranked exactly. Results and scores come out in
+full precision for a quarter (int8) or a thirty-second (binary) of the memory
+of a float32 index, and only the rescored rows of the float file are ever
+paged in.
+
+  index = QuantizedIndex("./.cache/news_index", dim=1024, mode="int8")
+  ids = index.add(vectors)                 # (n, dim) floats
+  ids, scores = index.search(query, k=10)  # cosine similarity, best first
+
+Vectors are L2-normalized on add, so scores are cosine similarities. The index
+is append-only and ids are row numbers; keep the documents they stand for
+alongside (a list, or ids in your own store). Everything lives in `path`, and
+opening an existing path loads it back, dropping whatever an interrupted
+add() wrote after the last completed one.
+
+Configuration (all optional):
+  VECTOR_INDEX_MODE     "int8" (default), "binary", or "float32" (exact scan
+                        of the memory-mapped originals, for comparison)
+  VECTOR_INDEX_RESCORE  candidates rescored per result (default 4 for int8,
+                        32 for binary)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+MODES = ("int8", "binary", "float32")
+_DEFAULT_RESCORE = {"int8": 4, "binary": 32, "float32": 1}
+
+# rows per int8 block: the float32 copy of a block stays in L2 cache
+_INT8_BLOCK = 256
+_SCAN_BLOCK = 65536
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first."""
+    if k < len(scores):
+        part = np.argpartition(scores, len(scores) - k)[len(scores) - k :]
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(scores[part])[::-1]]
+
+
+class QuantizedIndex:
+    def __init__(
+        self,
+        path: str,
+        dim: int | None = None,
+        mode: str | None = None,
+        rescore: int | None = None,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_path = self.path / "meta.json"
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        self.dim = meta.get("dim", dim)
+        self.mode = meta.get("mode") or mode or os.getenv("VECTOR_INDEX_MODE", "int8")
+        if dim is not None and dim != self.dim:
+            raise ValueError(f"{path} holds {self.dim}-dim vectors, not {dim}")
+        if mode is not None and mode != self.mode:
+            raise ValueError(f"{path} is a {self.mode} index, not {mode}")
+        if self.mode not in MODES:
+            raise ValueError(f"unknown VECTOR_INDEX_MODE {self.mode!r}, use {MODES}")
+        self.rescore = rescore or int(
+            os.getenv("VECTOR_INDEX_RESCORE", _DEFAULT_RESCORE[self.mode])
+        )
+        self._count = meta.get("count", 0)
+        self._truncate()
+        self._codes: np.ndarray | None = None  # (capacity, width), first _count used
+        self._scales: np.ndarray | None = None  # int8 only, one per row
+        self._floats: np.memmap | None = None
+        self._float_rows = 0  # rows the current memmap covers
+        if self._count:
+            self._load_codes()
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ------------------------- Writing -------------------------
+
+    def add(self, vectors) -> np.ndarray:
+        """Append vectors; returns their ids."""
+        vectors = _normalize(vectors)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-dim vectors, got {vectors.shape[1]}")
+        start = self._count
+        with open(self.path / "vectors.f32", "ab") as f:
+            vectors.tofile(f)
+        if self.mode != "float32":
+            codes, scales = self._quantize(vectors)
+            self._append(codes, scales)
+            with open(self.path / f"codes.{self.mode}", "ab") as f:
+                codes.tofile(f)
+            if scales is not None:
+                with open(self.path / "scales.f32", "ab") as f:
+                    scales.tofile(f)
+        self._count += len(vectors)
+        self._write_meta()
+        return np.arange(start, self._count)
+
+    # ------------------------- Searching -------------------------
+
+    def search(
+        self, query, k: int = 10, rescore: int | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Ids and cosine similarities of the k nearest vectors, best first."""
+        if not self._count:
+            return np.empty(0, np.int64), np.empty(0, np.float32)
+        query = _normalize(query)[0]
+        k = min(k, self._count)
+        if self.mode == "float32":
+            scores = self._scan_floats(query)
+            ids = _top(scores, k)
+            return ids, scores[ids]
+
+        approx = (
+            self._scan_int8(query) if self.mode == "int8" else self._scan_bits(query)
+        )
+        candidates = np.sort(_top(approx, k * (rescore or self.rescore)))
+        # sorted ids: the rescoring reads walk the float file front to back
+        exact = self.floats()[candidates] @ query
+        order = _top(exact, k)
+        return candidates[order], exact[order]
+
+    def floats(self) -> np.memmap:
+        """The float32 originals, memory-mapped."""
+        if self._floats is None or self._float_rows != self._count:
+            self._floats = np.memmap(
+                self.path / "vectors.f32",
+                dtype=np.float32,
+                mode="r",
+                shape=(self._count, self.dim),
+            )
+            self._float_rows = self._count
+        return self._floats
+
+    def memory(self) -> dict:
+        """Bytes held in memory by the codes vs kept on disk as float32."""
+        codes = 0
+        if self._codes is not None:
+            codes = self._codes[: self._count].nbytes
+            if self._scales is not None:
+                codes += self._scales[: self._count].nbytes
+        return {
+            "vectors": self._count,
+            "codes_bytes": codes,
+            "float32_bytes": self._count * (self.dim or 0) * 4,
+        }
+
+    # ------------------------- Internals -------------------------
+
+    def _quantize(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        if self.mode == "binary":
+            return np.packbits(vectors > 0, axis=1), None
+        # symmetric, per row: the largest component maps to +-127
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1.0
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _append(self, codes: np.ndarray, scales: np.ndarray | None) -> None:
+        needed = self._count + len(codes)
+        if self._codes is None or needed > len(self._codes):
+            capacity = max(needed, 2 * (0 if self._codes is None else len(self._codes)))
+            grown = np.empty((capacity, codes.shape[1]), codes.dtype)
+            if self._codes is not None:
+                grown[: self._count] = self._codes[: self._count]
+            self._codes = grown
+            if scales is not None:
+                grown_scales = np.empty(capacity, np.float32)
+                if self._scales is not None:
+                    grown_scales[: self._count] = self._scales[: self._count]
+                self._scales = grown_scales
+        self._codes[self._count : needed] = codes
+        if scales is not None:
+            self._scales[self._count : needed] = scales
+
+    def _row_bytes(self) -> dict[str, int]:
+        """Bytes per row of each file the index appends to."""
+        dim = self.dim or 0
+        files = {"vectors.f32": dim * 4}
+        if self.mode == "int8":
+            files.update({"codes.int8": dim, "scales.f32": 4})
+        elif self.mode == "binary":
+            files["codes.binary"] = (dim + 7) // 8
+        return files
+
+    def _truncate(self) -> None:
+        """
+        Cut off rows an interrupted add() wrote past the count in meta.json,
+        which is written last; new rows would otherwise land after them and
+        ids would stop matching float rows.
+        """
+        for name, row_bytes in self._row_bytes().items():
+            file = self.path / name
+            size = self._count * row_bytes
+            if file.exists() and file.stat().st_size > size:
+                os.truncate(file, size)
+
+    def _load_codes(self) -> None:
+        if self.mode == "float32":
+            return
+        dtype, width = (
+            (np.int8, self.dim)
+            if self.mode == "int8"
+            else (np.uint8, (self.dim + 7) // 8)
+        )
+        codes = np.fromfile(self.path / f"codes.{self.mode}", dtype=dtype)
+        self._codes = codes.reshape(-1, width)[: self._count]
+        if self.mode == "int8":
+            self._scales = np.fromfile(self.path / "scales.f32", dtype=np.float32)
+
+    def _write_meta(self) -> None:
+        meta = {"dim": self.dim, "mode": self.mode, "count": self._count}
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.path / "meta.json")
+
+    def _scan_int8(self, query: np.ndarray) -> np.ndarray:
+        codes, n = self._codes, self._count
+        scores = np.empty(n, np.float32)
+        block = np.empty((_INT8_BLOCK, self.dim), np.float32)
+        for start in range(0, n, _INT8_BLOCK):
+            rows = codes[start : min(n, start + _INT8_BLOCK)]
+            np.copyto(block[: len(rows)], rows, casting="unsafe")
+            scores[start : start + len(rows)] = block[: len(rows)] @ query
+        scores *= self._scales[:n]
+        return scores
+
+    def _scan_bits(self, query: np.ndarray) -> np.ndarray:
+        codes, n = self._codes, self._count
+        packed = np.packbits(query > 0)
+        wide = codes.shape[1] % 8 == 0  # compare 64 bits at a time
+        if wide:
+            codes, packed = codes.view(np.uint64), packed.view(np.uint64)
+        scores = np.empty(n, np.float32)
+        for start in range(0, n, _SCAN_BLOCK):
+            diff = codes[start : min(n, start + _SCAN_BLOCK)] ^ packed
+            if hasattr(np, "bitwise_count") and wide:
+                distance = np.bitwise_count(diff).sum(axis=1, dtype=np.int32)
+            else:
+                distance = _POPCOUNT[diff.view(np.uint8)].sum(axis=1, dtype=np.int32)
+            scores[start : start + len(diff)] = -distance
+        return scores
+
+    def _scan_floats(self, query: np.ndarray) -> np.ndarray:
+        floats, n = self.floats(), self._count
+        scores = np.empty(n, np.float32)
+        for start in range(0, n, _SCAN_BLOCK):
+            scores[start : start + _SCAN_BLOCK] = (
+                floats[start : start + _SCAN_BLOCK] @ query
+            )
+        return scores
@@ -0,0 +1,163 @@
+"""
+Memory, query latency and recall@10 of QuantizedIndex against full precision
+on a synthetic corpus (default: 1M vectors of 1024 dims, bge-m3 sized).
+
+The corpus is clustered like real embeddings: each vector is one of
+--clusters random directions plus noise, and queries are fresh vectors drawn
+the same way, so most of a query's neighbours share its cluster with close
+scores. That is the hard case for quantization. The true top 10 of every
+query comes from an exact scan of the float32 originals. The float32 row is
+that scan, memory-mapped, since 4 GB of float32 does not fit next to
+everything else on a small machine; its latency depends on how much of the
+file the page cache holds.
+
+Both indexes are written to --dir (default: a temporary directory). That
+takes about 2 x 4.3 GB of disk at the default size.
+
+  python -m src.samples.quantized_index_benchmark
+  python -m src.samples.quantized_index_benchmark --vectors 200000 --dim 768
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from src.samples.fake_llm.benchmark import percentile
+from src.samples.quantized_index import QuantizedIndex, _normalize
+
+_CHUNK = 65536
+
+
+def clustered(rng, centers: np.ndarray, n: int, similarity: float) -> np.ndarray:
+    """n unit vectors, each at about `similarity` cosine to a random center."""
+    dim = centers.shape[1]
+    sigma = np.sqrt((1 / similarity**2 - 1) / dim)
+    vectors = centers[rng.integers(len(centers), size=n)]
+    vectors += sigma * rng.standard_normal((n, dim), dtype=np.float32)
+    return _normalize(vectors)
+
+
+def exact_top(floats: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """True top k ids per query, in one pass over the float32 file."""
+    best_ids = np.zeros((len(queries), 0), np.int64)
+    best_scores = np.zeros((len(queries), 0), np.float32)
+    for start in range(0, len(floats), _CHUNK):
+        scores = queries @ floats[start : start + _CHUNK].T
+        ids = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+        scores = np.concatenate([best_scores, scores], axis=1)
+        ids = np.concatenate([best_ids, ids], axis=1)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+    return best_ids
+
+
+def rss() -> dict:
+    status = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("RssAnon", "RssFile"):
+                status[name] = int(value.split()[0]) * 1024
+    return status
+
+
+def timed(search, queries) -> tuple[list, list[float]]:
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(search(query))
+        latencies.append((time.perf_counter() - started) * 1e3)
+    return results, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--clusters", type=int, default=4096)
+    parser.add_argument("--similarity", type=float, default=0.6)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--exact-queries", type=int, default=5)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dir", default=None)
+    args = parser.parse_args()
+
+    root = args.dir or tempfile.mkdtemp(prefix="quantized-index-")
+    rng = np.random.default_rng(7)
+    centers = _normalize(rng.standard_normal((args.clusters, args.dim)))
+    indexes = {
+        mode: QuantizedIndex(os.path.join(root, mode), dim=args.dim, mode=mode)
+        for mode in ("int8", "binary")
+    }
+    started = time.perf_counter()
+    for start in range(0, args.vectors, _CHUNK):
+        n = min(_CHUNK, args.vectors - start)
+        vectors = clustered(rng, centers, n, args.similarity)
+        for index in indexes.values():
+            index.add(vectors)
+    print(
+        f"{args.vectors} x {args.dim} vectors in {args.clusters} clusters, "
+        f"built in {time.perf_counter() - started:.0f}s under {root}"
+    )
+
+    queries = clustered(rng, centers, args.queries, args.similarity)
+    # a mapping of its own, unmapped below so the index's resident pages
+    # can be told apart from the ones the full scans touched
+    floats = np.memmap(
+        os.path.join(root, "int8", "vectors.f32"),
+        dtype=np.float32,
+        mode="r",
+        shape=(args.vectors, args.dim),
+    )
+    truth = exact_top(floats, queries, args.k)
+
+    def recall(results) -> float:
+        found = sum(len(set(ids) & set(t)) for (ids, _), t in zip(results, truth))
+        return found / truth.size
+
+    def exact(query):
+        scores = np.empty(len(floats), np.float32)
+        for start in range(0, len(floats), _CHUNK):
+            scores[start : start + _CHUNK] = floats[start : start + _CHUNK] @ query
+        return np.argsort(scores)[::-1][: args.k], None
+
+    float_bytes = args.vectors * args.dim * 4
+    _, latencies = timed(exact, queries[: args.exact_queries])
+    del floats
+    print(
+        f"{'mode':<8}{'rescore':>8}{'memory MB':>11}{'p50 ms':>9}{'p99 ms':>9}"
+        f"{'recall@' + str(args.k):>11}"
+    )
+    print(
+        f"{'float32':<8}{'-':>8}{float_bytes / 1e6:11.0f}"
+        f"{percentile(latencies, 50):9.1f}{percentile(latencies, 99):9.1f}"
+        f"{1.0:11.3f}   (exact scan, memory-mapped)"
+    )
+    sweeps = {"int8": (1, 2, 4, 8), "binary": (1, 8, 16, 32, 64)}
+    for mode, index in indexes.items():
+        memory = index.memory()["codes_bytes"]
+        for rescore in sweeps[mode]:
+            results, latencies = timed(
+                lambda q: index.search(q, args.k, rescore=rescore), queries
+            )
+            print(
+                f"{mode:<8}{rescore:>8}{memory / 1e6:11.0f}"
+                f"{percentile(latencies, 50):9.1f}{percentile(latencies, 99):9.1f}"
+                f"{recall(results):11.3f}"
+            )
+    usage = rss()
+    print(
+        f"process: {usage['RssAnon'] / 1e6:.0f} MB heap (codes of both indexes), "
+        f"{usage['RssFile'] / 1e6:.0f} MB of mapped files resident"
+    )
+    if args.dir is None:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Two-level cache in front of RAG retrieval, so a question asked again against
+an unchanged corpus skips both the query embedding and the nearest-neighbour
+search.
+
+  level 1  normalized query text + embedding model -> query embedding
+  level 2  normalized query text + embedding model + k (+ search params)
+           + collection version -> top-k chunk ids
+
+Nothing expires on a timer. Every collection has a version, and ingestion
+bumps it; level 2 entries are stored under the version they were computed
+for, so after a bump they are never read again (and are deleted). Embeddings
+do not depend on the corpus and survive bumps. A fingerprint of what was
+ingested can be passed to `bump`: ingesting the same chunks again (as the
+sample does on every run) leaves the version, and the cached results, alone.
+
+  cache = RetrievalCache.from_env()                        # RETRIEVAL_CACHE=1
+  cache.bump("news", fingerprint=RetrievalCache.fingerprint(texts, model))
+  ids = cache.retrieve(
+      "news", query, k=3,
+      embed=embeddings.embed_query,                        # text -> vector
+      search=lambda vector, k: ...,                        # -> chunk ids
+      model="nomic-embed-text",
+  )
+
+Ids are stored as JSON, so they must be ints or strings. Queries are keyed by
+normalize_prompt (see semantic_cache.py): "Who leads AGI?" and "who leads agi"
+share entries, and the vector stored is the embedding of the first of them to
+miss. Entries live in one SQLite file in WAL mode, shared by every process
+that uses it; `stats()` reports this process's hit rates and the embedding and
+search time the hits saved.
+
+Configuration (all optional):
+  RETRIEVAL_CACHE=1                 enable (from_env returns None otherwise)
+  RETRIEVAL_CACHE_PATH              sqlite file (default "./.cache/retrieval_cache.sqlite")
+  RETRIEVAL_CACHE_MAX_ENTRIES       per level, least recently used go first (default 100000)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+import numpy as np
+
+from src.samples.semantic_cache import normalize_prompt
+
+DEFAULT_PATH = "./.cache/retrieval_cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    collection TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    fingerprint TEXT
+);
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    query TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    cost_ms REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (model, query)
+);
+CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed);
+CREATE TABLE IF NOT EXISTS results (
+    collection TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    ids TEXT NOT NULL,
+    cost_ms REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (collection, version, key)
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+class RetrievalCache:
+    def __init__(self, path: str | None = None, max_entries: int | None = None):
+        self.path = Path(path or os.getenv("RETRIEVAL_CACHE_PATH", DEFAULT_PATH))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries or int(
+            os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "100000")
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters = {
+            "embedding_hits": 0,
+            "embedding_misses": 0,
+            "result_hits": 0,
+            "result_misses": 0,
+            "embed_ms": 0.0,  # spent embedding on misses
+            "search_ms": 0.0,  # spent searching on misses
+            "saved_ms": 0.0,  # what the hits cost when they were computed
+            "lookup_ms": 0.0,  # spent in the cache itself
+        }
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> RetrievalCache | None:
+        if os.getenv("RETRIEVAL_CACHE", "0") in ("0", "false", "no"):
+            return None
+        return cls()
+
+    @staticmethod
+    def fingerprint(texts: Sequence[str], model: str = "") -> str:
+        """Digest of an ingested corpus, for `bump`."""
+        digest = hashlib.blake2b(model.encode(), digest_size=16)
+        for text in texts:
+            digest.update(len(text).to_bytes(8, "little"))
+            digest.update(text.encode())
+        return digest.hexdigest()
+
+    # ------------------------- Versions -------------------------
+
+    def version(self, collection: str) -> int:
+        row = (
+            self._conn()
+            .execute("SELECT version FROM versions WHERE collection = ?", (collection,))
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def bump(self, collection: str, fingerprint: str | None = None) -> int:
+        """
+        Record an ingestion into `collection` and return its version. Without a
+        fingerprint, or with one that differs from the last ingestion's, the
+        version goes up and the collection's cached results are dropped.
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT version, fingerprint FROM versions WHERE collection = ?",
+                (collection,),
+            ).fetchone()
+            version, previous = row or (0, None)
+            if fingerprint is not None and fingerprint == previous:
+                return version
+            version += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO versions VALUES (?, ?, ?)",
+                (collection, version, fingerprint),
+            )
+            conn.execute(
+                "DELETE FROM results WHERE collection = ? AND version < ?",
+                (collection, version),
+            )
+        return version
+
+    # ------------------------- Lookup -------------------------
+
+    def embedding(
+        self, query: str, embed: Callable[[str], Sequence[float]], model: str = ""
+    ) -> np.ndarray:
+        """Level 1: the query's embedding, computed with `embed` on a miss."""
+        started = time.perf_counter()
+        conn = self._conn()
+        key = normalize_prompt(query)
+        row = conn.execute(
+            "SELECT vector, cost_ms FROM embeddings WHERE model = ? AND query = ?",
+            (model, key),
+        ).fetchone()
+        if row is not None:
+            with conn:
+                conn.execute(
+                    "UPDATE embeddings SET accessed = ? WHERE model = ? AND query = ?",
+                    (time.time(), model, key),
+                )
+            self._count(
+                embedding_hits=1,
+                saved_ms=row[1],
+                lookup_ms=(time.perf_counter() - started) * 1e3,
+            )
+            return np.frombuffer(row[0], dtype=np.float32)
+
+        lookup_ms = (time.perf_counter() - started) * 1e3
+        started = time.perf_counter()
+        vector = np.asarray(embed(query), dtype=np.float32)
+        cost_ms = (time.perf_counter() - started) * 1e3
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                (model, key, vector.tobytes(), cost_ms, time.time()),
+            )
+            self._evict(conn, "embeddings")
+        self._count(embedding_misses=1, embed_ms=cost_ms, lookup_ms=lookup_ms)
+        return vector
+
+    def retrieve(
+        self,
+        collection: str,
+        query: str,
+        k: int,
+        embed: Callable[[str], Sequence[float]],
+        search: Callable[[np.ndarray, int], Sequence],
+        model: str = "",
+        params: str = "",
+    ) -> list:
+        """
+        Level 2: ids of the top k chunks for `query` in the collection's current
+        version. On a miss the query is embedded (through level 1) and passed
+        to `search(vector, k)`. `params` names anything else that changes the
+        result, e.g. an index's quantization mode.
+        """
+        started = time.perf_counter()
+        conn = self._conn()
+        version = self.version(collection)
+        key = json.dumps([model, normalize_prompt(query), k, params])
+        row = conn.execute(
+            "SELECT ids, cost_ms FROM results "
+            "WHERE collection = ? AND version = ? AND key = ?",
+            (collection, version, key),
+        ).fetchone()
+        if row is not None:
+            with conn:
+                conn.execute(
+                    "UPDATE results SET accessed = ? "
+                    "WHERE collection = ? AND version = ? AND key = ?",
+                    (time.time(), collection, version, key),
+                )
+            self._count(
+                result_hits=1,
+                saved_ms=row[1],
+                lookup_ms=(time.perf_counter() - started) * 1e3,
+            )
+            return json.loads(row[0])
+
+        self._count(result_misses=1, lookup_ms=(time.perf_counter() - started) * 1e3)
+        started = time.perf_counter()
+        vector = self.embedding(query, embed, model)
+        embedded = time.perf_counter()
+        ids = [i.item() if isinstance(i, np.generic) else i for i in search(vector, k)]
+        search_ms = (time.perf_counter() - embedded) * 1e3
+        # a hit later saves the search and the embedding, even if this miss
+        # found the embedding in level 1
+        cost_ms = search_ms + self._embedding_cost(model, query, embedded - started)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (collection, version, key, json.dumps(ids), cost_ms, time.time()),
+            )
+            self._evict(conn, "results")
+        self._count(search_ms=search_ms)
+        return ids
+
+    def clear(self) -> None:
+        """Drop cached embeddings and results; versions are kept."""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM embeddings")
+            conn.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ------------------------- Stats -------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+        for level in ("embedding", "result"):
+            lookups = stats[f"{level}_hits"] + stats[f"{level}_misses"]
+            stats[f"{level}_hit_rate"] = (
+                stats[f"{level}_hits"] / lookups if lookups else 0.0
+            )
+        conn = self._conn()
+        stats["embeddings"] = conn.execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()[0]
+        stats["results"] = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return stats
+
+    def format_summary(self) -> str:
+        s = self.stats()
+        return (
+            f"retrieval cache: results {s['result_hits']}/"
+            f"{s['result_hits'] + s['result_misses']} hits "
+            f"({s['result_hit_rate']:.0%}), embeddings {s['embedding_hits']}/"
+            f"{s['embedding_hits'] + s['embedding_misses']} hits "
+            f"({s['embedding_hit_rate']:.0%}), ~{s['saved_ms']:.0f} ms saved "
+            f"for {s['lookup_ms']:.0f} ms of lookups"
+        )
+
+    # ------------------------- Internals -------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _embedding_cost(self, model: str, query: str, measured_sec: float) -> float:
+        row = (
+            self._conn()
+            .execute(
+                "SELECT cost_ms FROM embeddings WHERE model = ? AND query = ?",
+                (model, normalize_prompt(query)),
+            )
+            .fetchone()
+        )
+        return row[0] if row else measured_sec * 1e3
+
+    def _evict(self, conn: sqlite3.Connection, table: str) -> None:
+        count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # evict in bulk, not one row per insert
+        conn.execute(
+            f"DELETE FROM {table} WHERE rowid IN "
+            f"(SELECT rowid FROM {table} ORDER BY accessed LIMIT ?)",
+            (count - int(self.max_entries * 0.9),),
+        )
+
+    def _count(self, **amounts: float) -> None:
+        with self._lock:
+            for name, amount in amounts.items():
+                self.counters[name] += amount
@@ -0,0 +1,145 @@
+"""
+Hit rate, latency and staleness of RetrievalCache on a repeated-query RAG
+workload.
+
+Queries come from --questions distinct questions, popular ones asked much more
+often (Zipf), each in a few spellings that normalize to the same text
+("Who leads AGI?", "who leads agi"). Embeddings come from the fake server
+(--embedding-ms per call, nomic-embed-text on a CPU is in the tens of ms) and
+the search is a QuantizedIndex over --chunks synthetic chunks. Halfway through,
+--ingest more chunks are added and the collection version bumped, as an
+ingestion job would.
+
+Every cached answer is checked against a fresh search of the current index;
+"stale" counts cached ids that differ, which the version key should keep at 0.
+The "no version" row reuses results across the ingestion, like a cache keyed
+on the query alone, to show what that costs.
+
+  python -m src.samples.retrieval_cache_benchmark --queries 2000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from src.samples.fake_llm.benchmark import percentile
+from src.samples.fake_llm.server import BackgroundServer, FakeConfig
+from src.samples.quantized_index import QuantizedIndex, _normalize
+from src.samples.retrieval_cache import RetrievalCache
+
+_SPELLINGS = ("{q}?", "{q}", "{Q}?", "  {q} ?", "{q}, please")
+
+
+def workload(questions: int, queries: int, seed: int = 5) -> list[str]:
+    rng = random.Random(seed)
+    pool = [f"what did lab {i} say about agi timelines" for i in range(questions)]
+    weights = [1 / (rank + 1) for rank in range(questions)]
+    prompts = []
+    for question in rng.choices(pool, weights, k=queries):
+        spelling = rng.choice(_SPELLINGS)
+        prompts.append(spelling.format(q=question, Q=question.capitalize()))
+    return prompts
+
+
+def run(args, root, prompts, embed, cache, versioned: bool = True) -> dict:
+    rng = np.random.default_rng(11)
+    dim = args.dim
+    index = QuantizedIndex(tempfile.mkdtemp(dir=root), dim=dim)
+    index.add(_normalize(rng.standard_normal((args.chunks, dim), dtype=np.float32)))
+    if cache:
+        cache.bump("bench")
+
+    def search(vector, k):
+        return index.search(vector, k=k)[0]
+
+    latencies, stale = [], 0
+    for i, prompt in enumerate(prompts):
+        if i == len(prompts) // 2:
+            # the new chunks sit close to queries, so they change top-k results
+            near = np.stack([np.asarray(embed(p)) for p in prompts[: args.ingest]])
+            noise = rng.standard_normal(near.shape, dtype=np.float32) * 0.01
+            index.add(near + noise)
+            if cache and versioned:
+                cache.bump("bench")
+        started = time.perf_counter()
+        if cache:
+            ids = cache.retrieve("bench", prompt, args.k, embed, search)
+        else:
+            ids = list(search(embed(prompt), args.k))
+        latencies.append((time.perf_counter() - started) * 1e3)
+        if cache:
+            # the vector the cache used (it may be another spelling's), without
+            # counting the check as a hit
+            counters = dict(cache.counters)
+            vector = cache.embedding(prompt, embed)
+            cache.counters = counters
+            stale += list(search(vector, args.k)) != ids
+    return {
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "mean": sum(latencies) / len(latencies),
+        "stale": stale,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--ingest", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--embedding-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    from ollama import Client
+
+    fake = BackgroundServer(
+        FakeConfig(embedding_dim=args.dim, embedding_ms=args.embedding_ms)
+    ).start()
+    client = Client(host=fake.base_url)
+
+    def embed(text):
+        return client.embed(model="nomic-embed-text", input=text)["embeddings"][0]
+
+    prompts = workload(args.questions, args.queries)
+    print(
+        f"{len(prompts)} queries, {len(set(prompts))} distinct strings, "
+        f"{args.questions} questions, {args.chunks} chunks "
+        f"(+{args.ingest} halfway)"
+    )
+    print(
+        f"{'cache':<12}{'p50 ms':>8}{'p99 ms':>8}{'mean ms':>9}{'results':>9}"
+        f"{'embeds':>8}{'saved s':>9}{'stale':>7}"
+    )
+    root = tempfile.mkdtemp(prefix="retrieval-cache-")
+    try:
+        s = run(args, root, prompts, embed, None)
+        print(
+            f"{'none':<12}{s['p50']:8.1f}{s['p99']:8.1f}{s['mean']:9.1f}"
+            f"{'-':>9}{'-':>8}{'-':>9}{'-':>7}"
+        )
+        for name, versioned in (("versioned", True), ("no version", False)):
+            cache = RetrievalCache(os.path.join(root, f"{name}.sqlite"))
+            s = run(args, root, prompts, embed, cache, versioned)
+            c = cache.stats()
+            print(
+                f"{name:<12}{s['p50']:8.1f}{s['p99']:8.1f}{s['mean']:9.1f}"
+                f"{c['result_hit_rate']:9.0%}"
+                f"{c['embedding_misses']:8d}"
+                f"{c['saved_ms'] / 1e3:9.1f}"
+                f"{s['stale']:7d}"
+            )
+    finally:
+        fake.stop()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Semantic response cache: answer a prompt with the stored answer to a
+near-identical earlier prompt instead of running the model again.
+
+"recommend sci-fi movies" and "recommend some sci-fi movies please" are
+different strings but the same question. Prompts are normalized, embedded with
+the local embedding model (nomic-embed-text through Ollama by default) and
+looked up in an in-memory vector index; the best neighbour above the threshold
+is a hit. Entries are scoped by system prompt, tools and model, so a bot with
+other instructions or tools never gets another bot's answers.
+
+  cache = SemanticCache.from_env()                      # SEMANTIC_CACHE=1
+  scope = cache.scope(SYSTEM_MESSAGE, tools=["TMDbService-get_top_movies_by_genre"])
+  hit = cache.lookup(user_input, scope)
+  if hit:
+      answer = hit.answer
+  else:
+      answer = ...                                      # run the model
+      cache.store(user_input, answer, scope, generation_ms=...)
+
+Follow-ups that lean on the conversation ("something like that", "any more?")
+are not looked up or stored: their answer depends on the history, which is not
+part of the key. For the same reason callers look up and store only while the
+session has no turns of its own: "recommend heist movies" after "I've seen
+Heat" must not get, or become, an answer that ignores Heat.
+
+A hit can be wrong: close in embedding space, different question ("horror
+movies for kids" / "horror movies"). A sample of hits (SEMANTIC_CACHE_AUDIT_RATE)
+is flagged for audit; the caller generates a fresh answer anyway and passes it
+to `audit()`, which compares it with the cached one. Diverging answers count
+as false hits, drop the entry and go to SEMANTIC_CACHE_AUDIT_LOG for review.
+The false-hit rate is what the threshold should be tuned against.
+
+Configuration (all optional):
+  SEMANTIC_CACHE=1                  enable (from_env returns None otherwise)
+  SEMANTIC_CACHE_EMBED_MODEL        embedding model (default "nomic-embed-text")
+  SEMANTIC_CACHE_THRESHOLD          cosine similarity for a hit (default 0.92)
+  SEMANTIC_CACHE_TTL_SEC            entry lifetime (default 1800)
+  SEMANTIC_CACHE_MAX_ENTRIES        least recently used entries go first (default 5000)
+  SEMANTIC_CACHE_AUDIT_RATE         fraction of hits to audit (default 0.05)
+  SEMANTIC_CACHE_AUDIT_THRESHOLD    answer similarity below which a hit was false (default 0.8)
+  SEMANTIC_CACHE_AUDIT_LOG          JSONL file for false hits
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import numpy as np
+
+_WS_RE = re.compile(r"\s+")
+_PUNCT_RE = re.compile(r"[^\w\s'-]")
+_FILLER_RE = re.compile(
+    r"^(?:(?:hi|hello|hey|please|pls|ok|okay)\b[\s,]*)+"
+    r"|^(?:can|could|would|will) you\s+"
+    r"|\s+please$"
+)
+# pronouns and words that point back into the conversation
+_FOLLOW_UP_RE = re.compile(
+    r"\b(?:that|those|these|it|them|more|another|else|again|same|"
+    r"above|previous|earlier|last one|first one|second one)\b"
+)
+
+
+def normalize_prompt(text: str) -> str:
+    """Lowercase, strip punctuation and politeness, collapse whitespace."""
+    text = _PUNCT_RE.sub(" ", (text or "").lower())
+    text = _WS_RE.sub(" ", text).strip()
+    previous = None
+    while previous != text:
+        previous, text = text, _FILLER_RE.sub("", text).strip()
+    return text
+
+
+def is_follow_up(text: str) -> bool:
+    return bool(_FOLLOW_UP_RE.search(normalize_prompt(text)))
+
+
+@dataclass
+class _Entry:
+    prompt: str
+    answer: str
+    scope: str
+    row: int
+    expires: float
+    generation_ms: float
+    last_used: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+
+@dataclass
+class CacheHit:
+    answer: str
+    prompt: str  # the normalized prompt the answer was stored for
+    similarity: float
+    audit: bool  # generate anyway and pass the answer to SemanticCache.audit
+    entry: _Entry = field(repr=False)
+    query: str = ""  # the normalized prompt that hit
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        embed: Callable[[str], list[float]] | None = None,
+        threshold: float | None = None,
+        ttl_sec: float | None = None,
+        max_entries: int | None = None,
+        audit_rate: float | None = None,
+        audit_threshold: float | None = None,
+        audit_log: str | None = None,
+        seed: int | None = None,
+    ):
+        env = os.environ.get
+        if embed is None:
+            from src.samples.llm_clients import ollama_embeddings
+
+            model = env("SEMANTIC_CACHE_EMBED_MODEL", "nomic-embed-text")
+            embed = ollama_embeddings(model).embed_query
+        self.embed = embed
+        self.threshold = (
+            threshold
+            if threshold is not None
+            else float(env("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+        )
+        self.ttl_sec = (
+            ttl_sec
+            if ttl_sec is not None
+            else float(env("SEMANTIC_CACHE_TTL_SEC", "1800"))
+        )
+        self.max_entries = max_entries or int(env("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+        self.audit_rate = (
+            audit_rate
+            if audit_rate is not None
+            else float(env("SEMANTIC_CACHE_AUDIT_RATE", "0.05"))
+        )
+        self.audit_threshold = (
+            audit_threshold
+            if audit_threshold is not None
+            else float(env("SEMANTIC_CACHE_AUDIT_THRESHOLD", "0.8"))
+        )
+        self.audit_log = audit_log or env("SEMANTIC_CACHE_AUDIT_LOG") or None
+        self._rng = random.Random(seed)
+
+        self._lock = threading.Lock()
+        self._entries: dict[int, _Entry] = {}  # row -> entry
+        self._vectors: np.ndarray | None = None  # (max_entries, dim), unit rows
+        self._rows_scope = np.full(self.max_entries, -1, dtype=np.int32)
+        self._scope_ids: dict[str, int] = {}
+        self._free = list(range(self.max_entries - 1, -1, -1))
+        # the lookup's embedding, reused by the store that follows a miss
+        self._recent: OrderedDict[str, np.ndarray] = OrderedDict()
+        self.counters = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "near_misses": 0,  # best neighbour within 0.05 under the threshold
+            "bypassed": 0,  # follow-ups, never looked up
+            "stores": 0,
+            "expired": 0,
+            "evicted": 0,
+            "audits": 0,
+            "false_hits": 0,
+            "errors": 0,
+            "embed_ms": 0.0,
+            "saved_ms": 0.0,
+            "hit_similarity": 0.0,  # summed, see stats()
+        }
+
+    @classmethod
+    def from_env(cls) -> SemanticCache | None:
+        if os.getenv("SEMANTIC_CACHE", "0") in ("0", "false", "no"):
+            return None
+        return cls()
+
+    @staticmethod
+    def scope(
+        system_prompt: str, tools: list[str] | None = None, model: str | None = None
+    ) -> str:
+        """Key for the things besides the prompt that change an answer."""
+        if model is None:
+            from src.samples.llm_clients import llm_settings
+
+            model = llm_settings().model
+        payload = json.dumps(
+            [_WS_RE.sub(" ", system_prompt or "").strip(), sorted(tools or []), model]
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+    # ------------------------- Lookup / store -------------------------
+
+    def lookup(self, prompt: str, scope: str) -> CacheHit | None:
+        query = normalize_prompt(prompt)
+        if not query or _FOLLOW_UP_RE.search(query):
+            self._count("bypassed")
+            return None
+        vector = self._vector(query)
+        if vector is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self.counters["lookups"] += 1
+            best, similarity = self._nearest(vector, scope, now)
+            if best is None or similarity < self.threshold:
+                self.counters["misses"] += 1
+                if best is not None and similarity >= self.threshold - 0.05:
+                    self.counters["near_misses"] += 1
+                return None
+            best.hits += 1
+            best.last_used = now
+            self.counters["hits"] += 1
+            self.counters["saved_ms"] += best.generation_ms
+            self.counters["hit_similarity"] += similarity
+            audit = self._rng.random() < self.audit_rate
+        return CacheHit(best.answer, best.prompt, similarity, audit, best, query)
+
+    def store(
+        self, prompt: str, answer: str, scope: str, generation_ms: float = 0.0
+    ) -> bool:
+        query = normalize_prompt(prompt)
+        if not query or not answer or _FOLLOW_UP_RE.search(query):
+            return False
+        vector = self._vector(query)
+        if vector is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), np.float32)
+            existing, similarity = self._nearest(vector, scope, now)
+            if existing is not None and similarity >= 0.999:
+                self._drop(existing)  # same question answered again: replace
+            row = self._free.pop() if self._free else self._evict(now)
+            self._vectors[row] = vector
+            self._rows_scope[row] = self._scope_ids.setdefault(
+                scope, len(self._scope_ids)
+            )
+            self._entries[row] = _Entry(
+                query, answer, scope, row, now + self.ttl_sec, generation_ms
+            )
+            self.counters["stores"] += 1
+        return True
+
+    def audit(self, hit: CacheHit, fresh_answer: str) -> bool:
+        """
+        Compare a hit's cached answer with one generated for the new prompt.
+        Returns False (and drops the entry) when they diverge.
+        """
+        similarity = 1.0
+        if normalize_prompt(hit.answer) != normalize_prompt(fresh_answer):
+            cached = self._vector(normalize_prompt(hit.answer), remember=False)
+            fresh = self._vector(normalize_prompt(fresh_answer), remember=False)
+            if cached is None or fresh is None:
+                return True
+            similarity = float(cached @ fresh)
+        ok = similarity >= self.audit_threshold
+        with self._lock:
+            self.counters["audits"] += 1
+            if ok:
+                return True
+            self.counters["false_hits"] += 1
+            if self._entries.get(hit.entry.row) is hit.entry:
+                self._drop(hit.entry)
+        if self.audit_log:
+            record = {
+                "time": time.time(),
+                "prompt": hit.query,
+                "cached_prompt": hit.prompt,
+                "prompt_similarity": round(hit.similarity, 4),
+                "answer_similarity": round(similarity, 4),
+                "cached_answer": hit.answer,
+                "fresh_answer": fresh_answer,
+            }
+            with open(self.audit_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return False
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in list(self._entries.values()):
+                self._drop(entry)
+            self._recent.clear()
+
+    # ------------------------- Stats -------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["lookups"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["mean_hit_similarity"] = (
+            stats.pop("hit_similarity") / stats["hits"] if stats["hits"] else 0.0
+        )
+        stats["false_hit_rate"] = (
+            stats["false_hits"] / stats["audits"] if stats["audits"] else 0.0
+        )
+        return stats
+
+    def format_summary(self) -> str:
+        s = self.stats()
+        return (
+            f"semantic cache: {s['hits']}/{s['lookups']} hits ({s['hit_rate']:.0%}, "
+            f"mean similarity {s['mean_hit_similarity']:.3f}), "
+            f"{s['near_misses']} near misses, {s['bypassed']} follow-ups bypassed, "
+            f"{s['false_hits']}/{s['audits']} audited hits false, "
+            f"{s['entries']} entries, ~{s['saved_ms'] / 1e3:.1f} s generation saved"
+        )
+
+    # ------------------------- Internals -------------------------
+
+    def _count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def _vector(self, text: str, remember: bool = True) -> np.ndarray | None:
+        with self._lock:
+            vector = self._recent.get(text)
+            if vector is not None:
+                self._recent.move_to_end(text)
+                return vector
+        started = time.perf_counter()
+        try:
+            vector = np.asarray(self.embed(text), dtype=np.float32)
+        except Exception:  # no cache is better than a failed turn
+            self._count("errors")
+            return None
+        self._count("embed_ms", (time.perf_counter() - started) * 1e3)
+        vector /= np.linalg.norm(vector) or 1.0
+        if remember:
+            with self._lock:
+                self._recent[text] = vector
+                if len(self._recent) > 256:
+                    self._recent.popitem(last=False)
+        return vector
+
+    def _nearest(
+        self, vector: np.ndarray, scope: str, now: float
+    ) -> tuple[_Entry | None, float]:
+        scope_id = self._scope_ids.get(scope)
+        if scope_id is None or self._vectors is None:
+            return None, 0.0
+        rows = np.flatnonzero(self._rows_scope == scope_id)
+        if rows.size == 0:
+            return None, 0.0
+        similarities = self._vectors[rows] @ vector
+        for i in np.argsort(similarities)[::-1]:
+            entry = self._entries[int(rows[i])]
+            if entry.expires >= now:
+                return entry, float(similarities[i])
+            self._drop(entry)
+            self.counters["expired"] += 1
+        return None, 0.0
+
+    def _evict(self, now: float) -> int:
+        """Free rows: every expired entry, else the least recently used one."""
+        expired = [e for e in self._entries.values() if e.expires < now]
+        for entry in expired:
+            self._drop(entry)
+        self.counters["expired"] += len(expired)
+        if not self._free:
+            self._drop(min(self._entries.values(), key=lambda e: e.last_used))
+            self.counters["evicted"] += 1
+        return self._free.pop()
+
+    def _drop(self, entry: _Entry) -> None:
+        del self._entries[entry.row]
+        self._rows_scope[entry.row] = -1
+        self._free.append(entry.row)
@@ -0,0 +1,516 @@
+"""
+movie_chat_server on every core: N worker processes share one port.
+
+Each worker opens its own listening socket on the port with SO_REUSEPORT, so
+the kernel spreads new connections over the workers and no process does all
+the accepting, frame parsing and JSON work. Sessions live in the worker that
+owns them, chosen from the ?user= id or the user in a ?token= (hash(user) % N).
+A worker peeks at the request line of every connection it accepts and, if
+another worker owns that user, passes the socket to it over a unix datagram
+socket (SCM_RIGHTS) before a byte is read, so reconnecting to any worker
+resumes the same session. Connections without an id get a new one that maps
+to the worker they landed on.
+
+  python -m src.samples.websocket.movie_chat_cluster --workers 4 --port 8765
+
+  kill -HUP <launcher pid>    rolling restart: each worker is replaced by a
+                              new process, which takes over its share of
+                              sessions, then the old one drains: it stops
+                              accepting, lets running turns finish (up to
+                              CHAT_DRAIN_SEC, default 30) and closes its
+                              connections with 1012 (service restart)
+  kill -TERM <launcher pid>   drain every worker and exit
+
+Workers watch the launcher and drain and exit if it dies, so a killed
+launcher does not leave orphans holding the port.
+
+With CHAT_SESSION_LOG=1 every worker writes its sessions to the same log, so
+a replacement worker resumes the sessions of the one it replaced.
+
+GET http://host:port/stats answers from whichever worker gets the request
+with every worker's counters (connections, sessions, turns, hand-offs).
+
+Configuration: as movie_chat_server, plus CHAT_DRAIN_SEC.
+"""
+
+from __future__ import annotations
+
+import argparse
+import array
+import asyncio
+import hashlib
+import http
+import json
+import multiprocessing as mp
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import websockets
+from websockets.asyncio.server import ServerConnection
+from websockets.exceptions import ConnectionClosed
+from websockets.extensions.permessage_deflate import enable_server_permessage_deflate
+from websockets.server import ServerProtocol
+
+# one row of shared counters per worker process; two generations per slot so a
+# replacement and the worker it replaces can both report during a restart
+_FIELDS = (
+    "pid",
+    "slot",
+    "connections",
+    "sessions",
+    "turns",
+    "handoffs_in",
+    "handoffs_out",
+    "draining",
+)
+_F = {name: i for i, name in enumerate(_FIELDS)}
+
+
+def owner(user: str, workers: int) -> int:
+    digest = hashlib.blake2b(user.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % workers
+
+
+def user_from_request_line(data: bytes) -> str | None:
+    line = data.split(b"\r\n", 1)[0].decode("latin-1")
+    parts = line.split(" ")
+    if len(parts) < 2:
+        return None
+    query = parse_qs(urlparse(parts[1]).query)
+    if query.get("token"):  # "<user>.<signature>", see session_log.py
+        return query["token"][0].rpartition(".")[0] or None
+    return (query.get("user") or [None])[0]
+
+
+class Counters:
+    """Per-worker counters in shared memory, readable by every worker."""
+
+    def __init__(self, array, workers: int):
+        self.array = array
+        self.workers = workers
+
+    @classmethod
+    def create(cls, ctx, workers: int) -> Counters:
+        return cls(ctx.Array("q", 2 * workers * len(_FIELDS), lock=False), workers)
+
+    def row(self, slot: int, generation: int) -> int:
+        return ((generation % 2) * self.workers + slot) * len(_FIELDS)
+
+    def set(self, row: int, name: str, value: int) -> None:
+        self.array[row + _F[name]] = value
+
+    def add(self, row: int, name: str, amount: int = 1) -> None:
+        self.array[row + _F[name]] += amount  # each row has a single writer
+
+    def snapshot(self) -> list[dict]:
+        rows = []
+        for start in range(0, len(self.array), len(_FIELDS)):
+            row = dict(zip(_FIELDS, self.array[start : start + len(_FIELDS)]))
+            if row["pid"]:
+                rows.append(row)
+        return sorted(rows, key=lambda r: (r["slot"], r["draining"]))
+
+
+# ------------------------- Worker -------------------------
+
+
+class Worker:
+    def __init__(
+        self,
+        slot: int,
+        workers: int,
+        generation: int,
+        host: str,
+        port: int,
+        run_dir: str,
+        counters: Counters,
+    ):
+        self.slot = slot
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.run_dir = Path(run_dir)
+        self.counters = counters
+        self.row = counters.row(slot, generation)
+        self.drain_sec = float(os.getenv("CHAT_DRAIN_SEC", "30"))
+        self._tasks: set[asyncio.Task] = set()
+
+    def handoff_path(self, slot: int) -> str:
+        return str(self.run_dir / f"worker-{slot}.sock")
+
+    def new_user_id(self) -> str:
+        while True:  # about `workers` tries
+            user = uuid.uuid4().hex
+            if owner(user, self.workers) == self.slot:
+                return user
+
+    async def run(self, ready, launcher: int) -> None:
+        # the kernel stack is only needed in workers, not in the launcher
+        from src.samples.agent_tools.plugins.tmdb import TMDbService
+        from src.samples.agent_tools.tmdb_prefetch import GenrePrefetcher
+        from src.samples.semantic_cache import SemanticCache
+        from src.samples.websocket.session_log import SessionLog
+        from src.samples.websocket.movie_chat_server import (
+            MovieChatServer,
+            build_kernel,
+        )
+
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, stopped.set)
+
+        kernel, function = build_kernel()
+        prefetcher = GenrePrefetcher.from_env(
+            TMDbService() if os.getenv("TMDB_BEARER_TOKEN") else None
+        )
+        cache = SemanticCache.from_env()
+        log = SessionLog.from_env()  # one file for all workers and restarts
+        self.chat = MovieChatServer(kernel, function, prefetcher, cache, log)
+        self.chat.new_user_id = self.new_user_id
+
+        # websockets' own server, on a private unix socket nobody connects
+        # to: it tracks the connections, runs the handlers and closes them
+        options = dict(ping_interval=20, ping_timeout=60, close_timeout=10)
+        self.ws_server = await websockets.serve(
+            self.handler,
+            path=str(self.run_dir / f"ws-{self.slot}-{os.getpid()}.sock"),
+            unix=True,
+            process_request=self.process_request,
+            **options,
+        )
+
+        def factory() -> ServerConnection:
+            # what serve() builds for each connection, for sockets accepted here
+            protocol = ServerProtocol(extensions=enable_server_permessage_deflate(None))
+            return ServerConnection(protocol, self.ws_server, **options)
+
+        self.factory = factory
+        self.listener = self.listen()
+        self.handoff = self.bind_handoff()
+        loop.add_reader(self.handoff.fileno(), self.receive_handoff)
+        accepting = asyncio.create_task(self.accept_loop())
+        evictor = asyncio.create_task(self.chat.evict_loop())
+        orphaned = asyncio.create_task(self.watch_launcher(launcher, stopped))
+        self.counters.set(self.row, "pid", os.getpid())
+        self.counters.set(self.row, "slot", self.slot)
+        print(f"worker {self.slot} (pid {os.getpid()}) ready", flush=True)
+        try:
+            ready.send_bytes(b"ready")
+        except OSError:
+            pass  # the launcher is gone; watch_launcher stops this worker
+        ready.close()
+
+        await stopped.wait()
+        await self.drain(accepting)
+        evictor.cancel()
+        orphaned.cancel()
+        if prefetcher:
+            print(prefetcher.format_summary(), flush=True)
+            prefetcher.close()
+        if cache:
+            print(cache.format_summary(), flush=True)
+        for name in _FIELDS:
+            self.counters.set(self.row, name, 0)
+
+    @staticmethod
+    async def watch_launcher(
+        launcher: int, stopped: asyncio.Event, every_sec: float = 1.0
+    ) -> None:
+        """Drain and exit when the launcher dies, instead of serving on as an orphan."""
+        while os.getppid() == launcher:
+            await asyncio.sleep(every_sec)
+        print(f"launcher {launcher} is gone, stopping", flush=True)
+        stopped.set()
+
+    # ------------------------- Accepting -------------------------
+
+    def listen(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(4096)
+        sock.setblocking(False)
+        return sock
+
+    def bind_handoff(self) -> socket.socket:
+        """Take over this slot's hand-off address (from a predecessor, if any)."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        path = self.handoff_path(self.slot)
+        temporary = f"{path}.{os.getpid()}"
+        sock.bind(temporary)
+        os.replace(temporary, path)  # atomic: senders never see no socket
+        sock.setblocking(False)
+        self.handoff_inode = os.stat(path).st_ino
+        return sock
+
+    def successor(self) -> bool:
+        """Has a newer worker taken over this slot's hand-off address?"""
+        try:
+            return os.stat(self.handoff_path(self.slot)).st_ino != self.handoff_inode
+        except FileNotFoundError:
+            return False
+
+    def pass_on(self, conn: socket.socket, slot: int, kind: bytes = b"c") -> bool:
+        """Send the socket to the worker at `slot`; kind b"r" asks it to route."""
+        try:
+            # socket.send_fds ignores its address argument before 3.12
+            fds = array.array("i", [conn.fileno()])
+            self.handoff.sendmsg(
+                [kind],
+                [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)],
+                0,
+                self.handoff_path(slot),
+            )
+        except OSError:
+            return False  # that worker is gone or restarting
+        self.counters.add(self.row, "handoffs_out")
+        conn.close()
+        return True
+
+    def background(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def accept_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            conn, _ = await loop.sock_accept(self.listener)
+            self.background(self.route(conn))
+
+    async def route(self, conn: socket.socket) -> None:
+        """Serve the connection here or pass it to the worker owning its user."""
+        conn.setblocking(False)
+        try:
+            head = await self.peek_request_line(conn)
+        except (OSError, asyncio.TimeoutError):
+            conn.close()
+            return
+        user = user_from_request_line(head)
+        target = self.slot if user is None else owner(user, self.workers)
+        if target != self.slot and self.pass_on(conn, target):
+            return
+        await self.serve_socket(conn)  # ours, or the owner is away: serve it here
+
+    async def peek_request_line(self, conn: socket.socket, timeout: float = 10.0):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                data = conn.recv(2048, socket.MSG_PEEK)
+            except BlockingIOError:
+                data = None
+            if data is not None:
+                if not data:
+                    raise ConnectionResetError("closed before the request")
+                if b"\r\n" in data or len(data) >= 2048:
+                    return data
+                await asyncio.sleep(0.002)  # the rest of the line is in flight
+            else:
+                ready = loop.create_future()
+                loop.add_reader(
+                    conn.fileno(), lambda: ready.done() or ready.set_result(None)
+                )
+                try:
+                    await asyncio.wait_for(ready, deadline - loop.time())
+                finally:
+                    loop.remove_reader(conn.fileno())
+            if loop.time() > deadline:
+                raise asyncio.TimeoutError
+
+    def receive_handoff(self) -> None:
+        while True:
+            try:
+                kind, fds, _, _ = socket.recv_fds(self.handoff, 16, 1)
+            except BlockingIOError:
+                return
+            for fd in fds:
+                self.counters.add(self.row, "handoffs_in")
+                conn = socket.socket(fileno=fd)
+                conn.setblocking(False)
+                if kind == b"r":  # from a draining predecessor, not yet routed
+                    self.background(self.route(conn))
+                else:
+                    self.background(self.serve_socket(conn))
+
+    async def serve_socket(self, conn: socket.socket) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.connect_accepted_socket(self.factory, conn)
+
+    # ------------------------- Websocket side -------------------------
+
+    async def handler(self, websocket) -> None:
+        self.counters.add(self.row, "connections")
+        try:
+            await self.chat.handler(websocket)
+        except ConnectionClosed:
+            pass  # 1012 from drain() counts as an error close
+        finally:
+            self.counters.add(self.row, "connections", -1)
+            self.counters.set(self.row, "sessions", len(self.chat.sessions))
+            self.counters.set(self.row, "turns", self.chat.turns)
+
+    async def process_request(self, connection, request):
+        path = urlparse(request.path).path
+        if path == "/stats":
+            self.counters.set(self.row, "sessions", len(self.chat.sessions))
+            self.counters.set(self.row, "turns", self.chat.turns)
+            body = {"workers": self.counters.snapshot(), "answered_by": self.slot}
+            return connection.respond(http.HTTPStatus.OK, json.dumps(body) + "\n")
+        if path == "/healthz":
+            return connection.respond(http.HTTPStatus.OK, "ok\n")
+        return await self.chat.process_request(connection, request)
+
+    async def drain(self, accepting: asyncio.Task) -> None:
+        loop = asyncio.get_running_loop()
+        self.counters.set(self.row, "draining", 1)
+        # stop taking new connections; whatever is already queued on this
+        # listener is accepted and passed on rather than reset by close()
+        accepting.cancel()
+        successor = self.successor()
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except BlockingIOError:
+                break
+            if not (successor and self.pass_on(conn, self.slot, b"r")):
+                conn.close()  # shutting down: the client reconnects elsewhere
+        self.listener.close()
+        loop.remove_reader(self.handoff.fileno())
+        self.handoff.close()
+
+        finished = await self.chat.drain(self.drain_sec)
+        print(
+            f"worker {self.slot} (pid {os.getpid()}) draining "
+            f"{len(self.ws_server.connections)} connections"
+            + ("" if finished else ", some turns cut off"),
+            flush=True,
+        )
+        closing = [
+            asyncio.create_task(c.close(1012, "server restarting"))
+            for c in self.ws_server.connections
+        ]
+        if closing:
+            await asyncio.wait(closing, timeout=10)
+        self.ws_server.close()
+        await self.ws_server.wait_closed()
+
+
+def worker_main(slot, workers, generation, host, port, run_dir, array, ready, launcher):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the launcher handles Ctrl-C
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    counters = Counters(array, workers)
+    worker = Worker(slot, workers, generation, host, port, run_dir, counters)
+    asyncio.run(worker.run(ready, launcher))
+
+
+# ------------------------- Launcher -------------------------
+
+
+class Cluster:
+    def __init__(self, workers: int, host: str, port: int):
+        self.ctx = mp.get_context("spawn")  # no inherited event loops or pools
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.run_dir = tempfile.mkdtemp(prefix="movie-chat-")
+        self.counters = Counters.create(self.ctx, workers)
+        self.procs: dict[int, tuple[mp.Process, int]] = {}  # slot -> (proc, generation)
+        self.stopping = False
+        self.restart_requested = False
+
+    def spawn(self, slot: int, generation: int) -> mp.Process:
+        # a pipe, not an Event: an Event's lock dies with a launcher killed
+        # while waiting on it, and the worker's set() then blocks forever
+        ready, announce = self.ctx.Pipe(duplex=False)
+        proc = self.ctx.Process(
+            target=worker_main,
+            args=(
+                slot,
+                self.workers,
+                generation,
+                self.host,
+                self.port,
+                self.run_dir,
+                self.counters.array,
+                announce,
+                os.getpid(),
+            ),
+            name=f"movie-chat-worker-{slot}",
+        )
+        proc.start()
+        announce.close()
+        while not ready.poll(0.2) and proc.is_alive():
+            pass
+        ready.close()
+        return proc
+
+    def start(self) -> None:
+        for slot in range(self.workers):
+            if self.stopping:
+                return
+            self.procs[slot] = (self.spawn(slot, 0), 0)
+        print(
+            f"Movie chat cluster: {self.workers} workers on ws://{self.host}:{self.port}",
+            flush=True,
+        )
+
+    def rolling_restart(self) -> None:
+        for slot in range(self.workers):
+            old, generation = self.procs[slot]
+            self.procs[slot] = (self.spawn(slot, generation + 1), generation + 1)
+            old.terminate()  # SIGTERM: drain
+            old.join()
+        print("rolling restart done", flush=True)
+
+    def stop(self) -> None:
+        self.stopping = True
+        for proc, _ in self.procs.values():
+            proc.terminate()
+        for proc, _ in self.procs.values():
+            proc.join()
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    def supervise(self) -> None:
+        """Start the workers and keep them running until SIGTERM or Ctrl-C."""
+        # before the first spawn: a signal during startup must not kill the
+        # launcher and leave its workers behind
+        signal.signal(
+            signal.SIGHUP, lambda *_: setattr(self, "restart_requested", True)
+        )
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "stopping", True))
+        try:
+            self.start()
+            while not self.stopping:
+                time.sleep(0.2)
+                if self.restart_requested:
+                    self.restart_requested = False
+                    self.rolling_restart()
+                for slot, (proc, generation) in list(self.procs.items()):
+                    if not proc.is_alive() and not self.stopping:
+                        print(f"worker {slot} exited ({proc.exitcode}), restarting")
+                        self.procs[slot] = (
+                            self.spawn(slot, generation + 1),
+                            generation + 1,
+                        )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    Cluster(args.workers, args.host, args.port).supervise()
@@ -0,0 +1,177 @@
+"""
+Drive N concurrent simulated users against the movie chat websocket server and
+report throughput and latency percentiles (time to first token and full turn).
+
+With --spawn, a fake LLM endpoint and the server are started locally first:
+
+  python -m src.samples.websocket.movie_chat_load_test --spawn --users 50 --turns 5
+
+Otherwise point it at a running server:
+
+  python -m src.samples.websocket.movie_chat_load_test --url ws://localhost:8765
+
+--workers N spawns movie_chat_cluster with N worker processes instead of the
+single server; --idle N holds N more connections open that never send (what
+most browser tabs are doing). At the end the cluster's per-worker counters
+are fetched from /stats (also with --cluster, for a cluster started separately).
+
+  python -m src.samples.websocket.movie_chat_load_test --spawn --workers 4 \
+      --users 200 --idle 4000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+
+_QUESTIONS = [
+    "I loved Heat. What should I watch next?",
+    "Something lighter, maybe a comedy?",
+    "Any good science fiction from the last ten years?",
+    "What about a movie to watch with kids?",
+    "One more thriller, please.",
+]
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+async def simulated_user(url: str, user: int, turns: int, think_sec: float, stats):
+    async with websockets.connect(f"{url}/?user=load-{user}") as websocket:
+        await websocket.recv()  # session frame
+        for turn in range(turns):
+            started = time.perf_counter()
+            first = None
+            await websocket.send(_QUESTIONS[(user + turn) % len(_QUESTIONS)])
+            while True:
+                frame = json.loads(await websocket.recv())
+                if frame["type"] == "delta" and first is None:
+                    first = time.perf_counter()
+                elif frame["type"] == "done":
+                    break
+                elif frame["type"] == "error":
+                    stats["errors"] += 1
+                    break
+            done = time.perf_counter()
+            stats["ttft"].append(((first or done) - started) * 1e3)
+            stats["total"].append((done - started) * 1e3)
+            if think_sec:
+                await asyncio.sleep(think_sec)
+
+
+async def idle_user(url: str, user: int, opened: asyncio.Event, stop: asyncio.Event):
+    async with websockets.connect(f"{url}/?user=idle-{user}") as websocket:
+        await websocket.recv()  # session frame
+        opened.set()
+        await stop.wait()
+
+
+async def open_idle(url: str, idle: int, stop: asyncio.Event) -> list[asyncio.Task]:
+    tasks = []
+    for start in range(0, idle, 200):  # in batches, not one SYN flood
+        batch = [asyncio.Event() for _ in range(start, min(idle, start + 200))]
+        tasks += [
+            asyncio.create_task(idle_user(url, start + i, opened, stop))
+            for i, opened in enumerate(batch)
+        ]
+        await asyncio.gather(*(opened.wait() for opened in batch))
+    return tasks
+
+
+async def run(
+    url: str,
+    users: int,
+    turns: int,
+    think_sec: float,
+    idle: int = 0,
+    cluster: bool = False,
+) -> None:
+    stats = {"ttft": [], "total": [], "errors": 0}
+    stop = asyncio.Event()
+    idlers = await open_idle(url, idle, stop) if idle else []
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(simulated_user(url, u, turns, think_sec, stats) for u in range(users))
+    )
+    elapsed = time.perf_counter() - started
+    workers = await asyncio.to_thread(fetch_stats, url) if cluster else []
+    stop.set()
+    await asyncio.gather(*idlers, return_exceptions=True)
+
+    completed = len(stats["total"])
+    held = f" (+{idle} idle connections)" if idle else ""
+    print(f"{users} users x {turns} turns in {elapsed:.1f}s{held}")
+    print(f"throughput: {completed / elapsed:.1f} turns/s, errors: {stats['errors']}")
+    for name in ("ttft", "total"):
+        values = stats[name]
+        print(
+            f"{name:<6} ms  p50 {percentile(values, 50):8.1f}  "
+            f"p95 {percentile(values, 95):8.1f}  p99 {percentile(values, 99):8.1f}"
+        )
+    for worker in workers:
+        print(
+            f"worker {worker['slot']} pid {worker['pid']}: "
+            f"{worker['connections']} connections, {worker['sessions']} sessions, "
+            f"{worker['turns']} turns, hand-offs in {worker['handoffs_in']} "
+            f"out {worker['handoffs_out']}"
+        )
+
+
+def fetch_stats(url: str) -> list[dict]:
+    """Per-worker counters from movie_chat_cluster's /stats."""
+    with urllib.request.urlopen(url.replace("ws", "http", 1) + "/stats") as r:
+        return json.load(r)["workers"]
+
+
+def spawn(fake_port: int, server_port: int, workers: int = 0) -> list[subprocess.Popen]:
+    env = dict(os.environ, LLM_BASE_URL=f"http://127.0.0.1:{fake_port}/v1")
+    env.pop("TMDB_BEARER_TOKEN", None)  # keep the test off the real TMDb API
+    server = ["-m", "src.samples.websocket.movie_chat_server"]
+    if workers:
+        server = ["-m", "src.samples.websocket.movie_chat_cluster"]
+        server += ["--workers", str(workers)]
+    commands = [
+        [sys.executable, "-m", "src.samples.fake_llm.server", "--port", str(fake_port)],
+        [sys.executable, *server, "--host", "127.0.0.1", "--port", str(server_port)],
+    ]
+    procs = []
+    for command in commands:
+        proc = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, text=True)
+        while "://" not in proc.stdout.readline():  # wait for the "listening" line
+            pass
+        procs.append(proc)
+    return procs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="ws://localhost:8765")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--think-sec", type=float, default=0.0)
+    parser.add_argument("--idle", type=int, default=0)
+    parser.add_argument("--spawn", action="store_true")
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--cluster", action="store_true")
+    args = parser.parse_args()
+
+    procs = spawn(11435, 8765, args.workers) if args.spawn else []
+    try:
+        url = "ws://127.0.0.1:8765" if args.spawn else args.url
+        cluster = args.cluster or bool(args.spawn and args.workers)
+        asyncio.run(
+            run(url, args.users, args.turns, args.think_sec, args.idle, cluster)
+        )
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()  # let the server drain and print its summary
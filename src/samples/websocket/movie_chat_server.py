@@ -0,0 +1,452 @@
+"""
+The movie_chat bot served to many users at once over websockets.
+
+One kernel (the shared LLM client with its keep-alive pool, one TMDb connection
+pool) is shared by every connection; each user gets their own ChatWindow
+session. Replies are streamed as they are generated:
+
+  -> "any heist movies like Heat?"                 (plain text frame)
+  <- {"type": "delta", "text": "Try"}              (repeated)
+  <- {"type": "done", "ttft_ms": 180.2, "total_ms": 940.7}
+
+Connect to ws://localhost:8765/?user=<id> to resume the same session from
+another connection; without `user` every connection is a new session.
+
+With CHAT_SESSION_LOG=1 every turn is also written to disk (see
+session_log.py) and only a small window of each session stays in memory. The
+session frame then carries a token, and reconnecting with ?token=<token>
+resumes the session, even after a server restart. With the log, ?user= can
+no longer attach to a session that already exists (that takes the token), and
+a session started by ?user= alone gets no token:
+
+  <- {"type": "session", "user": "3f2a...", "token": "3f2a....Jx9...", "turns": 12}
+
+A session's window is dropped once it has been idle for CHAT_SESSION_PARK_SEC
+or its last connection closes, and rebuilt from the log on the next message.
+Older turns are paged over plain HTTP:
+
+  GET /history?token=<token>&before=<seq>&limit=20
+
+  python -m src.samples.websocket.movie_chat_server
+
+Configuration (all optional):
+  LLM_BASE_URL, LLM_MODEL, ...  endpoint and model, see src/samples/llm_clients.py
+  CHAT_SESSION_IDLE_SEC drop sessions idle for longer than this (default 1800)
+  CHAT_SESSION_LOG=1    keep history on disk, see src/samples/websocket/session_log.py
+  TMDB_BEARER_TOKEN     enables the TMDb tools
+  TMDB_PREFETCH=1       fetch genres the user mentions while the model is
+                        still generating, see src/samples/agent_tools/tmdb_prefetch.py
+  SEMANTIC_CACHE=1      answer near-identical questions from earlier answers,
+                        see src/samples/semantic_cache.py; such replies come as
+                        one delta and a done frame with "cached": true
+"""
+
+import argparse
+import asyncio
+import http
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from urllib.parse import parse_qs, urlparse
+
+import semantic_kernel as sk
+import websockets
+from semantic_kernel.connectors.ai import FunctionChoiceBehavior
+from semantic_kernel.functions import KernelArguments, KernelFunction, kernel_function
+from semantic_kernel.prompt_template import InputVariable, PromptTemplateConfig
+
+from src.samples.agent_tools.chat_window import ChatWindow
+from src.samples.agent_tools.plugins.tmdb import TMDbService
+from src.samples.agent_tools.tmdb_prefetch import GenrePrefetcher
+from src.samples.llm_clients import chat_completion_service, chat_execution_settings
+from src.samples.semantic_cache import CacheHit, SemanticCache
+from src.samples.websocket.session_log import SessionLog
+
+SERVICE_ID = "ollama-gpt"
+SYSTEM_MESSAGE = "You recommend movies and TV shows"
+
+
+class TMDbTools:
+    """
+    TMDbService's tools as async functions. Semantic Kernel calls sync plugin
+    methods inline, which would block every other session while TMDb answers.
+    """
+
+    def __init__(self, service: TMDbService):
+        self.service = service
+
+    @kernel_function(
+        name="get_movie_genre_id",
+        description="Return the TMDb numeric genre id for a given movie genre name. Case-insensitive.",
+    )
+    async def get_movie_genre_id(self, genre_name: str) -> int:
+        return await asyncio.to_thread(self.service.get_movie_genre_id, genre_name)
+
+    @kernel_function(
+        name="get_top_movies_by_genre",
+        description=(
+            "Return a concise list of top-rated movies for a given genre name. "
+            "Uses TMDb Discover API with sensible filters."
+        ),
+    )
+    async def get_top_movies_by_genre(self, genre_name: str) -> str:
+        return await asyncio.to_thread(self.service.get_top_movies_by_genre, genre_name)
+
+
+def build_kernel() -> tuple[sk.Kernel, KernelFunction]:
+    kernel = sk.Kernel()
+    kernel.add_service(chat_completion_service(SERVICE_ID))
+    settings = chat_execution_settings(
+        SERVICE_ID,
+        max_tokens=5120,
+        temperature=0.7,
+        top_p=0.8,
+        function_choice_behavior=FunctionChoiceBehavior.Auto(
+            filters={"excluded_plugins": ["ChatBot"]}
+        ),
+    )
+    function = kernel.add_function(
+        plugin_name="ChatBot",
+        function_name="chat",
+        prompt_template_config=PromptTemplateConfig(
+            template="{{$chat_history}}{{$user_input}}",
+            execution_settings=settings,
+            input_variables=[
+                InputVariable(name="chat_history", description="Recent conversation"),
+                InputVariable(name="user_input", description="User's request"),
+            ],
+        ),
+    )
+    if os.getenv("TMDB_BEARER_TOKEN"):
+        kernel.add_plugin(TMDbTools(TMDbService()), plugin_name="TMDbService")
+    return kernel, function
+
+
+@dataclass
+class Session:
+    user: str
+    window: ChatWindow | None = None  # None while parked (history on disk)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_seen: float = field(default_factory=time.monotonic)
+    connections: int = 0
+
+
+def new_window() -> ChatWindow:
+    window = ChatWindow()
+    window.add_system_message(SYSTEM_MESSAGE)
+    return window
+
+
+class SessionStore:
+    def __init__(self, idle_sec: float | None = None, log: SessionLog | None = None):
+        self.idle_sec = idle_sec or float(os.getenv("CHAT_SESSION_IDLE_SEC", "1800"))
+        self.log = log
+        self._sessions: dict[str, Session] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, user: str) -> bool:
+        return user in self._sessions
+
+    def get(self, user: str) -> Session:
+        session = self._sessions.get(user)
+        if session is None:
+            session = self._sessions[user] = Session(user)
+            if self.log is None:
+                session.window = new_window()
+        session.last_seen = time.monotonic()
+        return session
+
+    async def window(self, session: Session) -> ChatWindow:
+        """The session's window, rebuilt from the log if it was parked."""
+        if session.window is None:
+            window = new_window()
+            if self.log:
+                for user_text, reply in await asyncio.to_thread(
+                    self.log.recent, session.user, window.max_tokens - window.tokens
+                ):
+                    window.add_exchange(user_text, reply)
+            session.window = window
+        return session.window
+
+    async def record(self, session: Session, user_text: str, reply: str) -> None:
+        session.window.add_exchange(user_text, reply)
+        if self.log:
+            await asyncio.to_thread(self.log.append, session.user, user_text, reply)
+
+    def disconnect(self, session: Session) -> None:
+        """With a log, a session nobody is connected to needs no memory at all."""
+        session.connections -= 1
+        if self.log and session.connections <= 0 and not session.lock.locked():
+            if self._sessions.get(session.user) is session:
+                del self._sessions[session.user]
+
+    def busy(self) -> int:
+        """Sessions with a turn in progress."""
+        return sum(s.lock.locked() for s in self._sessions.values())
+
+    def park_idle(self) -> int:
+        """Drop the windows of logged sessions idle for log.park_sec."""
+        if self.log is None:
+            return 0
+        cutoff = time.monotonic() - self.log.park_sec
+        parked = 0
+        for s in self._sessions.values():
+            if s.window is not None and s.last_seen < cutoff and not s.lock.locked():
+                s.window = None
+                parked += 1
+        return parked
+
+    def evict_idle(self) -> int:
+        cutoff = time.monotonic() - self.idle_sec
+        idle = [
+            user
+            for user, s in self._sessions.items()
+            if s.last_seen < cutoff
+            and not s.lock.locked()
+            and not (self.log and s.connections)  # parked; disconnect() drops it
+        ]
+        for user in idle:
+            del self._sessions[user]
+        return len(idle)
+
+
+class MovieChatServer:
+    def __init__(
+        self,
+        kernel: sk.Kernel,
+        function: KernelFunction,
+        prefetcher: GenrePrefetcher | None = None,
+        cache: SemanticCache | None = None,
+        log: SessionLog | None = None,
+    ):
+        self.kernel = kernel
+        self.function = function
+        self.prefetcher = prefetcher
+        self.cache = cache
+        self.cache_scope = None
+        if cache:
+            tools = [
+                f.fully_qualified_name
+                for f in kernel.get_full_list_of_function_metadata()
+                if f.plugin_name != "ChatBot"
+            ]
+            self.cache_scope = cache.scope(SYSTEM_MESSAGE, tools)
+        self._audits: set[asyncio.Task] = set()
+        self.sessions = SessionStore(log=log)
+        self.turns = 0
+        # id for a connection that did not bring one (movie_chat_cluster
+        # picks ids that map back to the same worker)
+        self.new_user_id = lambda: uuid.uuid4().hex
+
+    async def handler(self, websocket) -> None:
+        query = parse_qs(urlparse(websocket.request.path).query)
+        user, owned = await self.resolve_user(query)
+        frame = {"type": "session", "user": user}
+        log = self.sessions.log
+        if log:
+            if owned:
+                frame["token"] = log.token(user)
+            frame["turns"] = await asyncio.to_thread(log.turns, user)
+        await websocket.send(json.dumps(frame))
+        session = self.sessions.get(user)
+        session.connections += 1
+        try:
+            async for message in websocket:
+                session = self.sessions.get(user)
+                # one turn at a time per user; other users are not blocked
+                async with session.lock:
+                    await self.turn(session, str(message), websocket)
+        finally:
+            self.sessions.disconnect(session)
+
+    async def resolve_user(self, query: dict) -> tuple[str, bool]:
+        """
+        The connection's user, and whether it may be given the session's
+        token. ?user= names the session. With a session log, an existing
+        session (in memory or on disk) is only attached to with its ?token=;
+        a ?user= id nobody has used yet starts a session but gets no token,
+        since anyone could have picked that id. Anything else gets a new
+        session of its own rather than someone else's history.
+        """
+        log = self.sessions.log
+        user = (query.get("user") or [None])[0]
+        if log is None:
+            return user or self.new_user_id(), False
+        token = (query.get("token") or [None])[0]
+        if token:
+            user = log.user_for(token)
+            return (user, True) if user else (self.new_user_id(), True)
+        if user and user not in self.sessions:
+            unused = not await asyncio.to_thread(log.turns, user)
+            # checked again after the await, and claimed before the next one
+            if unused and user not in self.sessions:
+                self.sessions.get(user)
+                return user, False
+        return self.new_user_id(), True
+
+    async def process_request(self, connection, request):
+        """GET /history?token=...&before=...&limit=... pages a logged session."""
+        url = urlparse(request.path)
+        if url.path != "/history":
+            return None
+        query = parse_qs(url.query)
+        token = (query.get("token") or [""])[0]
+        user = self.sessions.log.user_for(token) if self.sessions.log else None
+        if user is None:
+            return connection.respond(http.HTTPStatus.FORBIDDEN, "bad token\n")
+        before = query.get("before")
+        limit = min(int((query.get("limit") or ["20"])[0]), 200)
+        turns = await asyncio.to_thread(
+            self.sessions.log.page, user, int(before[0]) if before else None, limit
+        )
+        return connection.respond(http.HTTPStatus.OK, json.dumps(turns) + "\n")
+
+    async def turn(self, session: Session, user_input: str, websocket) -> None:
+        started = time.perf_counter()
+        window = await self.sessions.window(session)
+        # once this user has turns ("I've seen Heat"), answers depend on them:
+        # another user's cached answer would ignore them, and this one must not
+        # be replayed to others
+        cacheable = window.turns + window.dropped_turns == 0
+        if self.cache and cacheable:
+            hit = await asyncio.to_thread(
+                self.cache.lookup, user_input, self.cache_scope
+            )
+            if hit:
+                await self.cached_turn(session, user_input, hit, websocket, started)
+                return
+        first = None
+        parts = []
+        arguments = KernelArguments(user_input=user_input, chat_history=window.history)
+        watcher = None
+        if self.prefetcher:
+            self.prefetcher.watch(user_input)
+            watcher = self.prefetcher.watcher()
+        try:
+            async for chunks in self.kernel.invoke_stream(self.function, arguments):
+                if watcher:
+                    watcher.feed(chunks)
+                text = "".join(str(c) for c in chunks)
+                if not text:
+                    continue
+                if first is None:
+                    first = time.perf_counter()
+                parts.append(text)
+                await websocket.send(json.dumps({"type": "delta", "text": text}))
+        except Exception as e:  # report to this user, keep serving the others
+            await websocket.send(json.dumps({"type": "error", "error": str(e)}))
+            return
+
+        answer = "".join(parts)
+        await self.sessions.record(session, user_input, answer)
+        self.turns += 1
+        done = time.perf_counter()
+        await websocket.send(
+            json.dumps(
+                {
+                    "type": "done",
+                    "ttft_ms": round(((first or done) - started) * 1e3, 1),
+                    "total_ms": round((done - started) * 1e3, 1),
+                }
+            )
+        )
+        if self.cache and cacheable:
+            await asyncio.to_thread(
+                self.cache.store,
+                user_input,
+                answer,
+                self.cache_scope,
+                (done - started) * 1e3,
+            )
+
+    async def cached_turn(
+        self, session: Session, user_input: str, hit: CacheHit, websocket, started
+    ) -> None:
+        await websocket.send(json.dumps({"type": "delta", "text": hit.answer}))
+        await self.sessions.record(session, user_input, hit.answer)
+        self.turns += 1
+        done = round((time.perf_counter() - started) * 1e3, 1)
+        await websocket.send(
+            json.dumps(
+                {
+                    "type": "done",
+                    "ttft_ms": done,
+                    "total_ms": done,
+                    "cached": True,
+                    "similarity": round(hit.similarity, 3),
+                }
+            )
+        )
+        if hit.audit:
+            task = asyncio.create_task(self.audit(hit, user_input))
+            self._audits.add(task)
+            task.add_done_callback(self._audits.discard)
+
+    async def audit(self, hit: CacheHit, user_input: str) -> None:
+        """Answer the question for real, off the user's path, and check the hit."""
+        window = ChatWindow()
+        window.add_system_message(SYSTEM_MESSAGE)
+        arguments = KernelArguments(user_input=user_input, chat_history=window.history)
+        try:
+            result = await self.kernel.invoke(self.function, arguments)
+        except Exception:
+            return
+        await asyncio.to_thread(self.cache.audit, hit, str(result))
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait until no turn is running; False if some still are after timeout."""
+        deadline = time.monotonic() + timeout
+        while self.sessions.busy():
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def evict_loop(self, every_sec: float = 60) -> None:
+        if self.sessions.log:
+            every_sec = min(every_sec, self.sessions.log.park_sec)
+        while True:
+            await asyncio.sleep(every_sec)
+            self.sessions.park_idle()
+            self.sessions.evict_idle()
+
+
+async def main(host: str, port: int) -> None:
+    kernel, function = build_kernel()
+    prefetcher = GenrePrefetcher.from_env(
+        TMDbService() if os.getenv("TMDB_BEARER_TOKEN") else None
+    )
+    cache = SemanticCache.from_env()
+    server = MovieChatServer(kernel, function, prefetcher, cache, SessionLog.from_env())
+    evictor = asyncio.create_task(server.evict_loop())
+    async with websockets.serve(
+        server.handler,
+        host,
+        port,
+        process_request=server.process_request,
+        ping_interval=20,
+        ping_timeout=60,
+        close_timeout=10,
+    ):
+        print(f"Movie chat server started at ws://{host}:{port}", flush=True)
+        try:
+            await asyncio.Future()  # run forever
+        finally:
+            evictor.cancel()
+            if prefetcher:
+                print(prefetcher.format_summary(), flush=True)
+                prefetcher.close()
+            if cache:
+                print(cache.format_summary(), flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(main(args.host, args.port))
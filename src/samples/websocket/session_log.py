@@ -0,0 +1,184 @@
+"""
+Websocket chat history kept on disk, so sessions survive reconnects and idle
+sessions cost (almost) no memory.
+
+The servers keep only a small hot window of each session in memory (the
+prompt's ChatWindow, or the last few turns). Every finished turn is appended
+to one SQLite file (WAL mode, so the workers of movie_chat_cluster share it
+and a restarted worker finds its sessions). An idle session drops its window;
+when the user comes back the window is rebuilt lazily from the newest turns
+that fit, and older turns are read only when a client pages back through
+them.
+
+A session is resumed with its token, `<user>.<signature>`: an HMAC of the
+user id under a secret stored in the same file (or CHAT_SESSION_SECRET), so
+the server can check it without a lookup and nobody can resume a session by
+guessing its id.
+
+  log = SessionLog.from_env()           # None unless CHAT_SESSION_LOG=1
+  token = log.token(user)
+  log.append(user, "any heist movies?", "Try Heat, Ronin, Inside Man.")
+  log.recent(user, max_tokens=3000)     # newest turns that fit, oldest first
+  log.page(user, before=40, limit=20)   # turns 20..39
+
+Configuration (all optional):
+  CHAT_SESSION_LOG=1        enable (without it history lives only in memory)
+  CHAT_SESSION_LOG_PATH     sqlite file (default "./.cache/chat_sessions.sqlite")
+  CHAT_SESSION_SECRET       token signing secret (default: random, kept in the file)
+  CHAT_SESSION_PARK_SEC     drop the in-memory window of a session idle this
+                            long (default 60)
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_PATH = "./.cache/chat_sessions.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    user TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    user_text TEXT NOT NULL,
+    reply TEXT NOT NULL,
+    at REAL NOT NULL,
+    PRIMARY KEY (user, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value BLOB NOT NULL);
+"""
+
+
+class SessionLog:
+    def __init__(self, path: str | None = None, secret: bytes | None = None):
+        self.path = Path(path or os.getenv("CHAT_SESSION_LOG_PATH", DEFAULT_PATH))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.park_sec = float(os.getenv("CHAT_SESSION_PARK_SEC", "60"))
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+        if secret is None and os.getenv("CHAT_SESSION_SECRET"):
+            secret = os.environ["CHAT_SESSION_SECRET"].encode()
+        self._secret = secret or self._stored_secret()
+
+    @classmethod
+    def from_env(cls) -> SessionLog | None:
+        if os.getenv("CHAT_SESSION_LOG", "").lower() not in ("1", "true", "yes"):
+            return None
+        return cls()
+
+    # ------------------------- Tokens -------------------------
+
+    def token(self, user: str) -> str:
+        digest = hmac.new(self._secret, user.encode(), hashlib.sha256).digest()
+        return f"{user}.{base64.urlsafe_b64encode(digest[:16]).decode().rstrip('=')}"
+
+    def user_for(self, token: str) -> str | None:
+        """The user a token belongs to, or None if it is not one of ours."""
+        user, _, _ = token.rpartition(".")
+        if user and hmac.compare_digest(self.token(user), token):
+            return user
+        return None
+
+    # ------------------------- Turns -------------------------
+
+    def append(self, user: str, user_text: str, reply: str) -> int:
+        """Append one turn; returns its sequence number (1 for the first)."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            (seq,) = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM turns WHERE user = ?", (user,)
+            ).fetchone()
+            conn.execute(
+                "INSERT INTO turns (user, seq, user_text, reply, at) VALUES (?, ?, ?, ?, ?)",
+                (user, seq, user_text, reply, time.time()),
+            )
+        return seq
+
+    def turns(self, user: str) -> int:
+        (seq,) = (
+            self._conn()
+            .execute("SELECT COALESCE(MAX(seq), 0) FROM turns WHERE user = ?", (user,))
+            .fetchone()
+        )
+        return seq
+
+    def recent(
+        self, user: str, max_tokens: int | None = None, max_turns: int | None = None
+    ) -> list[tuple[str, str]]:
+        """
+        The newest (user_text, reply) turns, oldest first, that fit in
+        max_tokens (estimated as ChatWindow does) and/or max_turns. Reads
+        backwards from the newest turn and stops there, so a long history
+        costs no more to resume than a short one.
+        """
+        from src.samples.agent_tools.chat_window import estimate_text_tokens
+
+        rows = self._conn().execute(
+            "SELECT user_text, reply FROM turns WHERE user = ? ORDER BY seq DESC",
+            (user,),
+        )
+        turns, tokens = [], 0
+        for user_text, reply in rows:
+            if max_turns is not None and len(turns) >= max_turns:
+                break
+            if max_tokens is not None:
+                tokens += estimate_text_tokens(user_text) + estimate_text_tokens(reply)
+                if tokens > max_tokens and turns:
+                    break
+            turns.append((user_text, reply))
+        rows.close()
+        turns.reverse()
+        return turns
+
+    def page(self, user: str, before: int | None = None, limit: int = 20) -> list[dict]:
+        """Up to `limit` turns with seq < before (default: the newest), oldest first."""
+        rows = (
+            self._conn()
+            .execute(
+                "SELECT seq, user_text, reply, at FROM turns"
+                " WHERE user = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+                (user, before if before is not None else 2**62, limit),
+            )
+            .fetchall()
+        )
+        return [
+            {"seq": seq, "user": user_text, "assistant": reply, "at": at}
+            for seq, user_text, reply, at in reversed(rows)
+        ]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ------------------------- Internals -------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _stored_secret(self) -> bytes:
+        conn = self._conn()
+        with conn:
+            # first process to get here picks it; everyone else reads the same one
+            conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('secret', ?)",
+                (secrets.token_bytes(32),),
+            )
+        row = conn.execute("SELECT value FROM meta WHERE name = 'secret'").fetchone()
+        return row[0]
@@ -0,0 +1,121 @@
+"""
+Memory per session and resume cost of the movie chat SessionStore, with and
+without the on-disk session log.
+
+Fills a store with --sessions sessions of --turns turns each (question and
+reply sizes like the movie bot's), then measures with tracemalloc:
+  memory only   every session keeps its ChatWindow (the only copy of history)
+  log, hot      the same, while the turns are also in the log
+  log, parked   after the windows of idle sessions are dropped
+and times appending a turn, rebuilding a parked window (for a session of
+--turns turns and one of --long-turns turns) and paging 20 old turns.
+
+  python -m src.samples.websocket.session_log_benchmark --sessions 2000 --turns 30
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from src.samples.fake_llm.benchmark import percentile
+from src.samples.websocket.movie_chat_server import SessionStore
+from src.samples.websocket.session_log import SessionLog
+
+_WORDS = (
+    "heat ronin collateral thief crime heist noir classic slow tense stylish".split()
+)
+
+
+def text(rng: random.Random, chars: int) -> str:
+    words = []
+    while sum(len(w) + 1 for w in words) < chars:
+        words.append(rng.choice(_WORDS))
+    return " ".join(words)
+
+
+async def fill(store: SessionStore, sessions: int, turns: int, seed: int = 1):
+    rng = random.Random(seed)
+    append_ms = []
+    for s in range(sessions):
+        session = store.get(f"user-{s}")
+        await store.window(session)
+        for _ in range(turns):
+            started = time.perf_counter()
+            await store.record(session, text(rng, 60), text(rng, 600))
+            append_ms.append((time.perf_counter() - started) * 1e3)
+    return append_ms
+
+
+async def main(args) -> None:
+    path = os.path.join(tempfile.mkdtemp(prefix="session-log-"), "chat.sqlite")
+    log = SessionLog(path)
+    log.park_sec = 0
+
+    # tracemalloc around the whole fill, so windows and their messages count
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    store = SessionStore()
+    await fill(store, args.sessions, args.turns)
+    gc.collect()
+    mem_only = tracemalloc.get_traced_memory()[0] - base
+    del store
+    gc.collect()
+
+    base = tracemalloc.get_traced_memory()[0]
+    store = SessionStore(log=log)
+    append_ms = await fill(store, args.sessions, args.turns)
+    gc.collect()
+    hot = tracemalloc.get_traced_memory()[0] - base
+    store.park_idle()
+    gc.collect()
+    parked = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    n = args.sessions
+    print(
+        f"{n} sessions x {args.turns} turns, log {os.path.getsize(path) / 1e6:.1f} MB"
+    )
+    print(f"  memory only   {mem_only / n / 1e3:8.1f} KB/session")
+    print(f"  log, hot      {hot / n / 1e3:8.1f} KB/session")
+    print(f"  log, parked   {parked / n / 1e3:8.1f} KB/session")
+    print(
+        f"append a turn: p50 {percentile(append_ms, 50):.2f} ms, "
+        f"p99 {percentile(append_ms, 99):.2f} ms"
+    )
+
+    rng = random.Random(2)
+    long_user = "user-long"
+    for _ in range(args.long_turns):
+        log.append(long_user, text(rng, 60), text(rng, 600))
+    for user, turns in (("user-0", args.turns), (long_user, args.long_turns)):
+        timings = []
+        for _ in range(50):
+            session = store.get(user)
+            session.window = None
+            started = time.perf_counter()
+            window = await store.window(session)
+            timings.append((time.perf_counter() - started) * 1e3)
+        print(
+            f"resume a {turns}-turn session: p50 {percentile(timings, 50):.2f} ms "
+            f"({len(window) - 1} messages back in the window)"
+        )
+    timings = []
+    for _ in range(50):
+        started = time.perf_counter()
+        log.page(long_user, before=args.long_turns // 2, limit=20)
+        timings.append((time.perf_counter() - started) * 1e3)
+    print(f"page 20 old turns: p50 {percentile(timings, 50):.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--long-turns", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
@@ -1,17 +1,33 @@
 import asyncio
+import sys
 
 import websockets
 
+URL = "ws://localhost:8765"
 
-async def hello():
-    async with websockets.connect("ws://localhost:8765") as websocket:
-        while True:
-            user_input = input("User >> ")
-            await websocket.send(user_input)
 
-            response = await websocket.recv()
-            print(f"Assistant >>: {response}")
+async def hello(token: str | None = None):
+    while True:
+        url = f"{URL}/?token={token}" if token else URL
+        try:
+            async with websockets.connect(url) as websocket:
+                # set when the server keeps sessions on disk (CHAT_SESSION_LOG=1)
+                token = websocket.response.headers.get("X-Chat-Session", token)
+                if token:
+                    print(f"(session {token})")
+                while True:
+                    user_input = input("User >> ")
+                    await websocket.send(user_input)
+
+                    response = await websocket.recv()
+                    print(f"Assistant >>: {response}")
+        except (websockets.ConnectionClosed, OSError):
+            if not token:
+                raise
+            print("(connection lost, resuming the session)")
+            await asyncio.sleep(1)
 
 
 if __name__ == "__main__":
-    asyncio.run(hello())
+    # pass a token from an earlier run to continue that conversation
+    asyncio.run(hello(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -1,18 +1,60 @@
+"""
+Minimal websocket chat with Ollama. Every connection is its own conversation,
+and only its last CHAT_HOT_TURNS turns (default 8) are kept in memory and sent
+to the model.
+
+With CHAT_SESSION_LOG=1 each turn is also appended to disk (see
+session_log.py). The handshake response then carries an X-Chat-Session token,
+and connecting with ?token=<token> resumes that conversation, its recent turns
+read back from disk when the first message arrives.
+"""
+
 import asyncio
+import os
+from collections import deque
+from urllib.parse import parse_qs, urlparse
 
 import websockets
 from ollama import Client
 
+from src.samples.websocket.session_log import SessionLog
+
 ollama_client = Client(host="http://localhost:11434")
 
-messages = [
-    {"role": "system", "content": "You are too much talker."},
-]
+SYSTEM_MESSAGE = {"role": "system", "content": "You are too much talker."}
+HOT_TURNS = int(os.getenv("CHAT_HOT_TURNS", "8"))
+
+log = SessionLog.from_env()
+
+
+def session_user(path: str, connection_id) -> str:
+    token = parse_qs(urlparse(path).query).get("token")
+    user = log.user_for(token[0]) if log and token else None
+    return user or connection_id.hex
+
+
+def add_session_header(connection, request, response):
+    if log:
+        user = session_user(request.path, connection.id)
+        response.headers["X-Chat-Session"] = log.token(user)
+    return response
 
 
 async def echo(websocket):
+    user = session_user(websocket.request.path, websocket.id)
+    turns = None  # (user, assistant) pairs, loaded on the first message
     async for message in websocket:
         print(f"Received message: {message}")
+        if turns is None:
+            turns = deque(maxlen=HOT_TURNS)
+            if log:
+                turns.extend(
+                    await asyncio.to_thread(log.recent, user, max_turns=HOT_TURNS)
+                )
+        messages = [SYSTEM_MESSAGE]
+        for question, answer in turns:
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "assistant", "content": answer})
         messages.append({"role": "user", "content": message})
         response = await asyncio.to_thread(
             ollama_client.chat,
@@ -21,12 +63,9 @@ async def echo(websocket):
         )
 
         response_content = response["message"]["content"]
-        messages.append(
-            {
-                "role": "assistant",
-                "content": response_content,
-            }
-        )
+        turns.append((message, response_content))
+        if log:
+            await asyncio.to_thread(log.append, user, message, response_content)
         await websocket.send(response_content)
         print(f"Sent message: {response_content}")
 
@@ -39,6 +78,7 @@ async def main():
         ping_interval=20,
         ping_timeout=60,
         close_timeout=10,
+        process_response=add_session_header,
     ):
         print("WebSocket server started at ws://localhost:8765")
         await asyncio.Future()  # run forever